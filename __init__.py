@@ -6,22 +6,228 @@ from datetime import datetime, timedelta
 from aqt.qt import QAction
 import os
 import csv
+import gzip
 import json
+import math
 import re
 import traceback
 import time
 import urllib.request
 import hashlib
+import hmac
+import secrets
+import struct
 import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Optional: AES-GCM für verschlüsselte Backups (sonst Ersatzverfahren, siehe BackupCipher)
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.exceptions import InvalidTag
+except ImportError:
+    AESGCM = None
+    InvalidTag = None
 
 # Konstanten
 ADDON_PATH = os.path.dirname(__file__)
 DB_PATH = os.path.join(ADDON_PATH, "study_tracker.db")
 BACKUP_DIR = os.path.join(ADDON_PATH, "backups")
+BACKUP_PAGES_PER_STEP = 256  # Seiten pro Schritt der Online-Backup-API
+AUTO_BACKUP_PREFIX = "study_tracker_auto_"  # Dateinamen der automatischen Backups in BACKUP_DIR
+ERROR_SNAPSHOT_PREFIX = "study_tracker_error_backup_"  # Dateinamen der Backups nach Datenbankfehlern
+ERROR_SNAPSHOT_INTERVAL = 15 * 60  # Mindestabstand zwischen zwei Fehler-Backups in Sekunden
+ERROR_SNAPSHOT_MAX_BYTES = 200 * 1024 * 1024  # Gesamtgröße aller Fehler-Backups
+REPORT_CACHE_DIR = os.path.join(ADDON_PATH, "report_cache")
+REPORT_SECTION_WORKERS = 4  # Parallel gesammelte Abschnitte bei mehrteiligen Berichten
+REPORT_ASSET_DIR = os.path.join(ADDON_PATH, "report_assets")
+REPORT_STYLE_PLACEHOLDER = "/*report-style*/"  # Wird nach dem Rendern durch das eingebettete CSS ersetzt
 MOBILE_SCREEN_WIDTH = 600  # Pixel für Smartphone-Erkennung
 GITHUB_REPO = "Study-Tracker/anki-addon"
 VERSION = "2.1.0"
 
+# Tabellen, deren Änderungen den Datenversionszähler erhöhen, mit dem
+# SQL-Ausdruck für den betroffenen Tag (None = nicht tagesbezogen)
+DATA_VERSION_TABLES = {
+    'daily_stats': "{row}.date",
+    'studied_cards': "{row}.date",
+    'validation_codes': "substr({row}.date, 1, 10)",
+    'level_history': "substr({row}.change_date, 1, 10)",
+    'chat_links': None
+}
+
+# Tabellen des Rohdaten-Exports (Tagesausdruck aus DATA_VERSION_TABLES)
+EXPORT_TABLES = ('daily_stats', 'studied_cards', 'validation_codes', 'level_history')
+EXPORT_BATCH_SIZE = 1000  # Zeilen pro fetchmany beim Export
+ALL_DECKS_BITMAP_ID = -1  # Tages-Bitmaps für die Summe über alle Decks
+CARD_ID_TABLES = ('validation_codes', 'chat_links', 'studied_cards')  # Tabellen mit Anki-Karten-IDs
+TITLE_INDEX_TABLES = ('validation_codes', 'chat_links')  # Quellen des Volltextindex für Kartentitel
+
+# Tabellen mit Integer-Spalten neben dem Datumstext: Datumsspalte und ob die
+# Spalte einen Zeitstempel enthält. day_num = Tage seit 1970-01-01,
+# ts_ms = Millisekunden seit 1970-01-01 (lokale Zeit wie im Datumstext)
+DAY_NUMBER_TABLES = {
+    'daily_stats': ('date', False),
+    'studied_cards': ('date', False),
+    'validation_codes': ('date', True),
+    'level_history': ('change_date', True)
+}
+DAY_NUMBER_SQL = "CAST(julianday(substr({value}, 1, 10)) - 2440587.5 AS INTEGER)"
+EPOCH_MILLIS_SQL = "CAST(round((julianday({value}) - 2440587.5) * 86400000) AS INTEGER)"
+DAY_NUMBER_EPOCH = datetime(1970, 1, 1)
+# Ab SQLite 3.31 sind day_num/ts_ms generierte Spalten, ältere Versionen pflegen sie per Trigger
+GENERATED_COLUMNS_SUPPORTED = sqlite3.sqlite_version_info >= (3, 31, 0)
+
+# Speichert den Level-Fortschritt eines Decks (deck_id ist eindeutig, siehe migrate_database)
+LEVEL_PROGRESS_UPSERT_SQL = """
+    INSERT INTO level_progress (deck_id, current_level, level_start_date, last_updated)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(deck_id) DO UPDATE SET
+        current_level = excluded.current_level,
+        level_start_date = excluded.level_start_date,
+        last_updated = excluded.last_updated
+"""
+
+# Häufige Abfragen auf großen Tabellen. Die Aufrufer verwenden diese Konstanten
+# direkt, test_query_plans prüft über HOT_QUERIES dieselben Anweisungen auf
+# Full Table Scans. {placeholders} steht für die Platzhalter einer IN-Liste.
+STUDIED_CARDS_BY_DECK_RANGE_SQL = """
+    SELECT DISTINCT s.card_id, s.date
+    FROM studied_cards s
+    WHERE s.deck_id = ? AND s.day_num BETWEEN ? AND ?
+"""
+STUDIED_CARDS_BY_DAY_SQL = """
+    SELECT 
+        s.card_id, 
+        s.deck_id, 
+        s.review_time, 
+        c.link as chat_link,
+        (SELECT card_title FROM validation_codes WHERE card_id = s.card_id LIMIT 1) as card_title
+    FROM studied_cards s
+    LEFT JOIN chat_links c ON s.card_id = c.card_id
+    WHERE s.date = ? AND s.deck_id = ?
+"""
+VALIDATION_CODES_BY_CARDS_SQL = """
+    SELECT card_id, date, code, correct_percent, difficulty
+    FROM validation_codes
+    WHERE card_id IN ({placeholders})
+    ORDER BY date
+"""
+VALIDATION_TITLES_BY_CARDS_SQL = """
+    SELECT card_id, card_title
+    FROM validation_codes
+    WHERE card_id IN ({placeholders}) AND card_title IS NOT NULL
+    GROUP BY card_id
+"""
+CHAT_LINK_TITLES_BY_CARDS_SQL = """
+    SELECT card_id, card_title
+    FROM chat_links
+    WHERE card_id IN ({placeholders}) AND card_title IS NOT NULL
+"""
+CHAT_LINKS_BY_CARDS_SQL = """
+    SELECT card_id, link
+    FROM chat_links
+    WHERE card_id IN ({placeholders})
+"""
+# Parameter: deck_id, erster Tag, letzter Tag, deck_id, deck_id, erster Tag, letzter Tag
+VALIDATION_CODES_BY_DECK_RANGE_SQL = """
+    SELECT 
+        v.date, 
+        v.code, 
+        v.correct_percent, 
+        v.difficulty, 
+        v.page_number, 
+        COALESCE(v.chat_link, c.link) as chat_link, 
+        v.card_id, 
+        COALESCE(v.card_title, c.card_title, 'Unbekannte Karte') as card_title
+    FROM validation_codes v
+    LEFT JOIN chat_links c ON v.card_id = c.card_id
+    WHERE v.deck_id = ? AND v.day_num BETWEEN ? AND ?
+    
+    UNION
+    
+    -- Hole alle ChatGPT-Links, selbst wenn kein Validierungscode existiert
+    SELECT 
+        NULL as date, 
+        NULL as code, 
+        NULL as correct_percent,
+        NULL as difficulty,
+        NULL as page_number,
+        c.link as chat_link,
+        c.card_id,
+        c.card_title
+    FROM chat_links c
+    WHERE c.deck_id = ? 
+    AND c.card_id NOT IN (
+        SELECT card_id FROM validation_codes 
+        WHERE deck_id = ? AND day_num BETWEEN ? AND ?
+    )
+    ORDER BY date
+"""
+LEVEL_HISTORY_BY_DECK_RANGE_SQL = """
+    SELECT change_date, change_type, old_level, new_level
+    FROM level_history
+    WHERE deck_id = ? AND day_num BETWEEN ? AND ?
+    ORDER BY change_date ASC
+"""
+# Von LevelReplayEngine verwaltete Einträge; {types} = Platzhalter der Änderungstypen,
+# {deck_filter} = " AND deck_id = ?" für ein einzelnes Deck oder ""
+LEVEL_HISTORY_MANAGED_SQL = """
+    SELECT deck_id, id, substr(change_date, 1, 10), change_type, old_level, new_level
+    FROM level_history
+    WHERE change_type IN ({types}){deck_filter}
+    ORDER BY change_date, id
+"""
+DAILY_STATS_BY_DECK_RANGE_SQL = """
+    SELECT date, cards_due, cards_studied, study_time
+    FROM daily_stats
+    WHERE deck_id = ? AND day_num BETWEEN ? AND ?
+"""
+DAILY_STATS_RANGE_SQL = """
+    SELECT date, SUM(cards_due), SUM(cards_studied), SUM(study_time)
+    FROM daily_stats
+    WHERE day_num BETWEEN ? AND ?
+    GROUP BY date
+"""
+# Bedingungen für Deck und Zeitraum hängt get_competency_daily an
+COMPETENCY_DAILY_SQL = """
+    SELECT date, code_count, correct_sum, max_difficulty, last_values
+    FROM competency_daily
+    WHERE 1=1
+"""
+
+# Standardregeln des Levelsystems, überschreibbar über "levelRules" in config.json
+DEFAULT_LEVEL_RULES = {
+    'periodDays': 7,        # Länge eines Abschnitts in Tagen
+    'requiredDays': 5,      # Erfolgreiche Tage für ein Level-Up
+    'dueShare': 1.0,        # Anteil der fälligen Karten, der gelernt werden muss
+    'minCardsStudied': 0,   # Mindestanzahl gelernter Karten pro Tag
+    'calendarWeeks': False, # Abschnitte als Kalenderwochen (Montag bis Sonntag)
+    'cooldownDays': 3       # Ohne Wirkung seit der Bewertung über LevelReplayEngine, bleibt für bestehende Konfigurationen
+}
+
+# Aufbewahrung der gelernten Karten, überschreibbar über "studiedCardsRetention" in config.json.
+# Die Verdichtung ist optional: Verdichtete Tage zeigen in Berichten keine einzelnen Karten mehr.
+DEFAULT_STUDIED_CARDS_RETENTION = {
+    'detailMonths': 0,        # Einzelne Karten so viele Monate behalten (0 = unbegrenzt)
+    'summaryPeriod': 'month'  # Ältere Einträge pro Deck und 'week' oder 'month' zusammenfassen
+}
+COMPACTION_PERIODS_PER_RUN = 12  # Zusammengefasste Zeiträume pro Hintergrundlauf
+
+# Automatische Backups, überschreibbar über "autoBackup" in config.json
+DEFAULT_AUTO_BACKUP = {
+    'intervalDays': 7,  # Abstand zwischen zwei Backups (0 = keine automatischen Backups)
+    'keep': 5           # Anzahl aufbewahrter automatischer Backups
+}
+
+# Integritätsprüfung, überschreibbar über "integrityCheck" in config.json
+DEFAULT_INTEGRITY_CHECK = {
+    'fullCheckDays': 7,  # Abstand zwischen zwei vollständigen Prüfungen (0 = keine)
+    'idleSeconds': 120   # Wartezeit, bevor eine fällige Prüfung im Leerlauf startet
+}
+
 # Hilfsfunktion für Qt-Enum Kompatibilität
 def get_qt_enum(enum_class, enum_value):
     """
@@ -95,6 +301,67 @@ def escape_html(text):
                 .replace('"', "&quot;")
                 .replace("'", "&#39;"))
 
+def normalize_card_id(card_id):
+    """
+    Bringt eine Karten-ID in die gespeicherte Form: Integer wie in Anki.
+    Nicht-numerische IDs (z.B. aus Tests) bleiben unverändert.
+    """
+    if card_id is None:
+        return None
+    try:
+        return int(card_id)
+    except (TypeError, ValueError):
+        return card_id
+
+def collection_accessible():
+    """
+    True, wenn die Anki-Sammlung verfügbar ist und gelesen werden darf. Die Sammlung
+    ist nicht threadsicher; Hintergrundthreads arbeiten mit einem CollectionSnapshot.
+    """
+    return bool(mw and mw.col) and threading.current_thread() is threading.main_thread()
+
+def note_title(note):
+    """Kartentitel aus der Vorderseite einer Notiz (ohne HTML, höchstens 50 Zeichen)"""
+    title = None
+    for field in ['Vorderseite', 'Front', 'Question', 'Frage']:
+        if field in note:
+            title = note[field]
+            break
+    
+    # Fallback: Erstes Feld
+    if not title and note.keys():
+        title = note[note.keys()[0]]
+    
+    if not title:
+        return None
+    title = clean_html(title)
+    if len(title) > 50:
+        title = title[:47] + "..."
+    return title
+
+def day_number(value):
+    """
+    Tagesnummer (Tage seit 1970-01-01) für ein Datum, einen Zeitstempel oder
+    einen String im Format YYYY-MM-DD[ HH:MM:SS], wie in den day_num-Spalten
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], "%Y-%m-%d")
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - DAY_NUMBER_EPOCH.date()).days
+
+def date_from_day_number(number):
+    """Gegenstück zu day_number: Datum zu einer Tagesnummer"""
+    return (DAY_NUMBER_EPOCH + timedelta(days=number)).date()
+
+def epoch_millis(value):
+    """Millisekunden seit 1970-01-01 für einen Zeitstempel, wie in den ts_ms-Spalten"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:19], "%Y-%m-%d %H:%M:%S" if len(value) > 10 else "%Y-%m-%d")
+    return int(round((value - DAY_NUMBER_EPOCH).total_seconds() * 1000))
+
 def check_updates():
     """Überprüft, ob eine neue Version des Add-ons verfügbar ist"""
     try:
@@ -113,6 +380,244 @@ def check_updates():
     except Exception as e:
         print(f"Fehler bei Update-Prüfung: {e}")
 
+def copy_database(source_conn, target_path, progress_callback=None, cancel_token=None):
+    """
+    Kopiert eine Datenbank schrittweise mit der Online-Backup-API. Zwischen den
+    Schritten (BACKUP_PAGES_PER_STEP Seiten) können andere Verbindungen weiterarbeiten.
+    Die Kopie entsteht als .partial-Datei und ersetzt target_path erst nach Abschluss.
+    
+    Args:
+        source_conn: Verbindung zur Quelldatenbank (im aufrufenden Thread erstellt)
+        target_path: Zieldatei
+        progress_callback: Optional, wird mit dem Fortschritt in Prozent aufgerufen
+        cancel_token: Optional, CancelToken zum Abbrechen zwischen zwei Schritten
+        
+    Raises:
+        OperationCancelledError: Wenn der Vorgang abgebrochen wurde
+    """
+    directory = os.path.dirname(target_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = target_path + ".partial"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    
+    def on_progress(status, remaining, total):
+        # Eine Ausnahme hier bricht das Backup ab
+        if cancel_token:
+            cancel_token.raise_if_cancelled()
+        if progress_callback and total:
+            progress_callback(int(100 * (total - remaining) / total))
+    
+    target_conn = sqlite3.connect(temp_path)
+    try:
+        source_conn.backup(target_conn, pages=BACKUP_PAGES_PER_STEP, progress=on_progress)
+    except BaseException:
+        target_conn.close()
+        os.remove(temp_path)
+        raise
+    target_conn.close()
+    os.replace(temp_path, target_path)
+
+def backup_in_background(db_path, backup_path, on_finished=None):
+    """
+    Erstellt ein Backup in einem eigenen Thread mit eigener Verbindung,
+    ohne den aufrufenden Thread zu blockieren
+
+    Args:
+        on_finished: Optional, wird im Backup-Thread mit True/False (Erfolg) aufgerufen
+
+    Returns:
+        threading.Thread: Der gestartete Thread
+    """
+    def run():
+        source_conn = None
+        success = False
+        try:
+            source_conn = sqlite3.connect(db_path)
+            copy_database(source_conn, backup_path)
+            success = True
+            print(f"Datenbank-Backup erstellt unter: {backup_path}")
+        except Exception as e:
+            print(f"Backup konnte nicht erstellt werden: {e}")
+        finally:
+            if source_conn:
+                source_conn.close()
+            if on_finished:
+                on_finished(success)
+    
+    thread = threading.Thread(target=run, name="StudyTrackerBackup", daemon=True)
+    thread.start()
+    return thread
+
+def copy_read_only(source_path, target_path, cancel_token=None):
+    """
+    Kopiert eine fremde Datenbank (z.B. ein Schüler-Backup), ohne sie zu verändern:
+    die Quelle wird nur lesend geöffnet
+    """
+    uri = "file:" + urllib.request.pathname2url(os.path.abspath(source_path)) + "?mode=ro"
+    source_conn = sqlite3.connect(uri, uri=True)
+    try:
+        copy_database(source_conn, target_path, cancel_token=cancel_token)
+    finally:
+        source_conn.close()
+
+def rotate_backups(directory=BACKUP_DIR, prefix=AUTO_BACKUP_PREFIX, keep=DEFAULT_AUTO_BACKUP['keep']):
+    """
+    Löscht die ältesten Backups mit dem angegebenen Präfix, bis nur noch keep übrig sind
+
+    Returns:
+        list: Pfade der gelöschten Backups
+    """
+    try:
+        names = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(".db")
+        )
+    except FileNotFoundError:
+        return []
+    
+    removed = []
+    # Zeitstempel im Namen: alphabetisch = chronologisch
+    for name in names[:max(0, len(names) - keep)]:
+        path = os.path.join(directory, name)
+        try:
+            os.remove(path)
+            removed.append(path)
+        except OSError as e:
+            print(f"Study Tracker: Altes Backup {name} konnte nicht gelöscht werden: {e}")
+    return removed
+
+def latest_auto_backup_time(directory=BACKUP_DIR, prefix=AUTO_BACKUP_PREFIX):
+    """Zeitpunkt des neuesten automatischen Backups oder None"""
+    try:
+        names = [
+            name for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(".db")
+        ]
+    except FileNotFoundError:
+        return None
+    times = []
+    for name in names:
+        try:
+            times.append(datetime.strptime(name[len(prefix):-3], "%Y%m%d_%H%M%S"))
+        except ValueError:
+            continue
+    return max(times) if times else None
+
+def prune_backups_by_size(directory, prefix, max_bytes):
+    """
+    Löscht die ältesten Backups mit dem angegebenen Präfix, bis alle zusammen
+    höchstens max_bytes belegen. Das neueste Backup bleibt immer erhalten.
+
+    Returns:
+        list: Pfade der gelöschten Backups
+    """
+    try:
+        names = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(prefix) and name.endswith(".db")
+        )
+    except FileNotFoundError:
+        return []
+    
+    sizes = {}
+    for name in names:
+        try:
+            sizes[name] = os.path.getsize(os.path.join(directory, name))
+        except OSError:
+            sizes[name] = 0
+    total = sum(sizes.values())
+    
+    removed = []
+    for name in names[:-1]:
+        if total <= max_bytes:
+            break
+        path = os.path.join(directory, name)
+        try:
+            os.remove(path)
+            total -= sizes[name]
+            removed.append(path)
+        except OSError as e:
+            print(f"Study Tracker: Altes Backup {name} konnte nicht gelöscht werden: {e}")
+    return removed
+
+class ErrorSnapshots:
+    """
+    Entscheidet, wann nach einem Datenbankfehler ein Backup erstellt wird.
+
+    Pro Fehlersignatur (Fehlertyp, Meldung ohne Zahlen, auslösende Funktion)
+    gibt es höchstens ein Backup, insgesamt höchstens eines pro
+    ERROR_SNAPSHOT_INTERVAL und nie zwei gleichzeitig. Alle weiteren Fehler
+    werden nur gezählt. Die Backups liegen in BACKUP_DIR und werden auf
+    ERROR_SNAPSHOT_MAX_BYTES begrenzt.
+    """
+    
+    def __init__(self, directory=BACKUP_DIR, interval=ERROR_SNAPSHOT_INTERVAL,
+                 max_bytes=ERROR_SNAPSHOT_MAX_BYTES):
+        self.directory = directory
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.snapshotted = set()
+        self.last_snapshot = 0
+        self.running = False
+    
+    @staticmethod
+    def signature(error):
+        """Fehlersignatur, unabhängig von IDs und Zeitstempeln in der Meldung"""
+        message = re.sub(r"\d+", "#", str(error))
+        location = ""
+        tb = getattr(error, "__traceback__", None)
+        while tb is not None:
+            location = tb.tb_frame.f_code.co_name
+            tb = tb.tb_next
+        return f"{type(error).__name__}:{location}:{message}"
+    
+    def record(self, db_path, error):
+        """
+        Zählt einen Fehler und startet bei Bedarf ein Backup im Hintergrund
+        
+        Returns:
+            int: Wie oft diese Fehlersignatur bisher aufgetreten ist
+        """
+        signature = self.signature(error)
+        with self.lock:
+            count = self.counts.get(signature, 0) + 1
+            self.counts[signature] = count
+            now = time.time()
+            if (signature in self.snapshotted or self.running
+                    or now - self.last_snapshot < self.interval):
+                return count
+            try:
+                if os.path.getsize(db_path) > self.max_bytes:
+                    print("Study Tracker: Datenbank zu groß für ein Fehler-Backup")
+                    self.snapshotted.add(signature)
+                    return count
+            except OSError:
+                return count
+            self.snapshotted.add(signature)
+            self.last_snapshot = now
+            self.running = True
+        
+        os.makedirs(self.directory, exist_ok=True)
+        backup_path = os.path.join(self.directory, f"{ERROR_SNAPSHOT_PREFIX}{int(now)}.db")
+        try:
+            backup_in_background(db_path, backup_path, on_finished=self._finished)
+        except Exception:
+            self._finished(False)
+            raise
+        return count
+    
+    def _finished(self, success):
+        if success:
+            prune_backups_by_size(self.directory, ERROR_SNAPSHOT_PREFIX, self.max_bytes)
+        with self.lock:
+            self.running = False
+
+error_snapshots = ErrorSnapshots()
+
 def migrate_database(db):
     """Führt Migrationen für alte Datenbanktabellen durch"""
     try:
@@ -164,6 +669,50 @@ def migrate_database(db):
             
             print("Study Tracker: Migration der level_progress Tabelle abgeschlossen")
         
+        # level_progress: höchstens ein Eintrag pro Deck, damit Speichern ein Upsert ist.
+        # Ältere Versionen haben mit INSERT OR REPLACE ohne eindeutigen Schlüssel
+        # weitere Zeilen angehängt; gelesen wurde immer die erste, sie bleibt erhalten.
+        cursor.execute("PRAGMA index_list(level_progress)")
+        if not any(index[1] == 'idx_level_progress_deck' and index[2] for index in cursor.fetchall()):
+            with db.conn:
+                removed = db.conn.execute("""
+                    DELETE FROM level_progress
+                    WHERE id NOT IN (SELECT MIN(id) FROM level_progress GROUP BY deck_id)
+                """).rowcount
+                db.conn.execute("DROP INDEX IF EXISTS idx_level_progress_deck")
+                db.conn.execute("CREATE UNIQUE INDEX idx_level_progress_deck ON level_progress(deck_id)")
+            print(f"Study Tracker: Migration - level_progress eindeutig pro Deck ({removed} doppelte Einträge entfernt)")
+        
+        # card_id-Spalten von TEXT auf INTEGER umstellen (Anki-Karten-IDs sind 64-Bit-Integer)
+        migrated_tables = []
+        for table in CARD_ID_TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = cursor.fetchall()
+            card_id_column = next((col for col in columns if col[1] == 'card_id'), None)
+            if not card_id_column or card_id_column[2].upper() == 'INTEGER':
+                continue
+            
+            print(f"Study Tracker: Migration - Stelle card_id in {table} auf INTEGER um")
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            create_sql = cursor.fetchone()[0]
+            new_sql = re.sub(r"\bcard_id\s+TEXT\b", "card_id INTEGER", create_sql, count=1, flags=re.IGNORECASE)
+            new_sql = new_sql.replace(table, f"{table}_migrated", 1)
+            column_list = ", ".join(col[1] for col in columns)
+            
+            with db.conn:
+                db.conn.execute(f"DROP TABLE IF EXISTS {table}_migrated")
+                db.conn.execute(new_sql)
+                # Numerische Texte werden durch die INTEGER-Affinität beim Einfügen umgewandelt
+                db.conn.execute(f"INSERT INTO {table}_migrated ({column_list}) SELECT {column_list} FROM {table}")
+                db.conn.execute(f"DROP TABLE {table}")
+                db.conn.execute(f"ALTER TABLE {table}_migrated RENAME TO {table}")
+            migrated_tables.append(table)
+        
+        if migrated_tables:
+            # Indizes (und Trigger) wurden mit den alten Tabellen entfernt
+            db.create_tables()
+            print(f"Study Tracker: Migration der card_id-Spalten abgeschlossen: {', '.join(migrated_tables)}")
+        
         db.conn.commit()
         return True
     except Exception as e:
@@ -171,18 +720,314 @@ def migrate_database(db):
         traceback.print_exc()
         return False
 
+class SettingsCache:
+    """
+    Write-through-Cache der Tabelle settings.
+
+    Wird für die Datenbank des Add-ons beim ersten Verbindungsaufbau einmal
+    geladen und von allen Database-Instanzen (auch in Hintergrundthreads)
+    geteilt; andere Dateien (z.B. Schüler-Backups, die ersetzt werden können)
+    erhalten einen eigenen Cache pro Verbindung. Database.save_setting schreibt zuerst in
+    die Datenbank und danach in den Cache. Geparste Werte der typisierten
+    Zugriffe (Datum, Zahl) werden ebenfalls zwischengespeichert.
+    """
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+        self.parsed = {}
+        self.loaded = False
+
+    @classmethod
+    def for_database(cls, db_path, conn):
+        """Liefert den Cache einer Datenbankdatei und lädt ihn bei Bedarf"""
+        path = os.path.abspath(db_path)
+        if path != os.path.abspath(DB_PATH):
+            cache = cls()
+            cache.load(conn)
+            return cache
+        with cls._caches_lock:
+            cache = cls._caches.get(path)
+            if cache is None:
+                cache = cls._caches[path] = cls()
+        if not cache.loaded:
+            cache.load(conn)
+        return cache
+
+    def load(self, conn):
+        """Liest alle Einstellungen (erneut) aus der Datenbank"""
+        rows = conn.execute("SELECT key, value FROM settings").fetchall()
+        with self.lock:
+            self.values = dict(rows)
+            self.parsed.clear()
+            self.loaded = True
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.values.get(key, default)
+
+    def set(self, key, value):
+        """Übernimmt einen gespeicherten Wert (wie SQLite ihn in der TEXT-Spalte ablegt)"""
+        if value is not None and not isinstance(value, (str, bytes)):
+            value = str(value)
+        with self.lock:
+            self.values[key] = value
+            for parsed_key in [k for k in self.parsed if k[0] == key]:
+                del self.parsed[parsed_key]
+
+    def get_parsed(self, key, kind, parse):
+        """
+        Liefert den mit parse umgewandelten Wert oder None, wenn die
+        Einstellung fehlt oder nicht umgewandelt werden kann
+        """
+        with self.lock:
+            if (key, kind) in self.parsed:
+                return self.parsed[(key, kind)]
+            raw = self.values.get(key)
+        try:
+            value = parse(raw) if raw is not None else None
+        except (TypeError, ValueError):
+            value = None
+        with self.lock:
+            if self.values.get(key) == raw:
+                self.parsed[(key, kind)] = value
+        return value
+
+
+class BackupCipher:
+    """
+    Verschlüsselung von Backups in Blöcken fester Größe.
+
+    Aus Passwort und Salt wird per scrypt (ohne OpenSSL-Unterstützung PBKDF2)
+    der Schlüssel abgeleitet. Jeder Block wird mit AES-256-GCM verschlüsselt und
+    authentifiziert (Nonce aus Datei-Präfix und Blocknummer, zusätzlich
+    authentifiziert: Kopf, Blocknummer, Ende-Markierung). Ohne das Paket
+    cryptography wird ersatzweise ein SHAKE256-Schlüsselstrom mit HMAC-SHA256
+    (Encrypt-then-MAC) verwendet. Vertauschte, fehlende oder abgeschnittene
+    Blöcke und ein falsches Passwort fallen in beiden Fällen auf.
+
+    Dateiformat:
+        Kopf:  MAGIC, Version, Verfahren, KDF-Kennung, KDF-Parameter, Salt, Nonce, Blockgröße
+        Block: Ende-Markierung (1 Byte), Länge (4 Byte), Geheimtext, Tag (16 bzw. 32 Byte)
+
+    KDF-Parameter und Blockgröße stehen ungeschützt im Kopf und werden vor der
+    Schlüsselableitung auf die bekannten Werte begrenzt. Version 1 (ohne
+    Verfahrens-Byte, immer SHAKE256/HMAC) und Dateien ohne MAGIC (XOR mit dem
+    SHA-256 des Passworts) werden weiterhin entschlüsselt.
+    """
+    MAGIC = b"STBACKUP"
+    VERSION = 2
+    CIPHER_AES_GCM = 1
+    CIPHER_SHAKE_HMAC = 2
+    KDF_SCRYPT = 1
+    KDF_PBKDF2 = 2
+    SCRYPT_N = 2 ** 15
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    SCRYPT_MAX_N = 2 ** 16  # Obergrenze beim Lesen (128 * r * N = 64 MiB Speicher)
+    PBKDF2_ITERATIONS = 600000
+    PBKDF2_MAX_ITERATIONS = 2000000
+    CHUNK_SIZE = 1024 * 1024
+    MAX_CHUNK_SIZE = 4 * 1024 * 1024
+    # Magic, Version, Verfahren, KDF, N/Iterationen, r, p, Salt, Nonce, Blockgröße
+    HEADER_FORMATS = {1: ">8sBBIBB16s16sI", 2: ">8sBBBIBB16s16sI"}
+    BLOCK_FORMAT = ">BI"  # Ende-Markierung, Länge des Geheimtexts
+    TAG_SIZES = {CIPHER_AES_GCM: 16, CIPHER_SHAKE_HMAC: 32}
+
+    def __init__(self, password):
+        self.password = password.encode("utf-8")
+
+    def _check_parameters(self, cipher, kdf, cost, r, p, chunk_size):
+        """
+        Lässt nur bekannte Verfahren und Parameter in sinnvollen Grenzen zu
+
+        Raises:
+            ValueError: Bei unbekannten oder zu teuren Parametern
+        """
+        if cipher not in self.TAG_SIZES:
+            raise ValueError(f"Unbekanntes Verschlüsselungsverfahren {cipher}")
+        if cipher == self.CIPHER_AES_GCM and AESGCM is None:
+            raise ValueError("Für dieses Backup wird das Paket cryptography benötigt")
+        if kdf == self.KDF_SCRYPT:
+            if not (2 <= cost <= self.SCRYPT_MAX_N and cost & (cost - 1) == 0
+                    and r == self.SCRYPT_R and p == self.SCRYPT_P):
+                raise ValueError("Ungültige scrypt-Parameter im Backup")
+        elif kdf == self.KDF_PBKDF2:
+            if not 1 <= cost <= self.PBKDF2_MAX_ITERATIONS:
+                raise ValueError("Ungültige PBKDF2-Parameter im Backup")
+        else:
+            raise ValueError(f"Unbekanntes Schlüsselableitungsverfahren {kdf}")
+        if not 1 <= chunk_size <= self.MAX_CHUNK_SIZE:
+            raise ValueError("Ungültige Blockgröße im Backup")
+
+    def _derive_keys(self, kdf, cost, r, p, salt):
+        """Leitet (Verschlüsselungs-Schlüssel, HMAC-Schlüssel) aus dem Passwort ab"""
+        if kdf == self.KDF_SCRYPT:
+            material = hashlib.scrypt(
+                self.password, salt=salt, n=cost, r=r, p=p, dklen=64, maxmem=256 * cost * r * p
+            )
+        else:
+            material = hashlib.pbkdf2_hmac("sha256", self.password, salt, cost, dklen=64)
+        return material[:32], material[32:]
+
+    def _xor_keystream(self, data, key, nonce, index):
+        """Verknüpft einen Block mit dem Schlüsselstrom (Ver- und Entschlüsselung)"""
+        keystream = hashlib.shake_256(key + nonce + struct.pack(">Q", index)).digest(len(data))
+        # Über große Ganzzahlen statt Byte für Byte in Python
+        return (int.from_bytes(data, "big") ^ int.from_bytes(keystream, "big")).to_bytes(len(data), "big")
+
+    def _tag(self, mac_key, header, index, final, ciphertext):
+        mac = hmac.new(mac_key, header, hashlib.sha256)
+        mac.update(struct.pack(">QB", index, final))
+        mac.update(ciphertext)
+        return mac.digest()
+
+    def _seal(self, cipher, keys, header, nonce, index, final, chunk):
+        """Verschlüsselt einen Block, liefert (Geheimtext, Tag)"""
+        key, mac_key = keys
+        if cipher == self.CIPHER_AES_GCM:
+            sealed = AESGCM(key).encrypt(
+                nonce[:4] + struct.pack(">Q", index), chunk,
+                hashlib.sha256(header).digest() + struct.pack(">QB", index, final)
+            )
+            return sealed[:-16], sealed[-16:]
+        ciphertext = self._xor_keystream(chunk, key, nonce, index)
+        return ciphertext, self._tag(mac_key, header, index, final, ciphertext)
+
+    def _open(self, cipher, keys, header, nonce, index, final, ciphertext, tag):
+        """Prüft und entschlüsselt einen Block"""
+        key, mac_key = keys
+        if cipher == self.CIPHER_AES_GCM:
+            try:
+                return AESGCM(key).decrypt(
+                    nonce[:4] + struct.pack(">Q", index), ciphertext + tag,
+                    hashlib.sha256(header).digest() + struct.pack(">QB", index, final)
+                )
+            except InvalidTag:
+                raise ValueError("Falsches Passwort oder beschädigtes Backup")
+        if not hmac.compare_digest(tag, self._tag(mac_key, header, index, final, ciphertext)):
+            raise ValueError("Falsches Passwort oder beschädigtes Backup")
+        return self._xor_keystream(ciphertext, key, nonce, index)
+
+    def encrypt(self, source, target):
+        """Verschlüsselt den Dateistrom source blockweise nach target"""
+        cipher = self.CIPHER_AES_GCM if AESGCM is not None else self.CIPHER_SHAKE_HMAC
+        if hasattr(hashlib, "scrypt"):
+            kdf, cost, r, p = self.KDF_SCRYPT, self.SCRYPT_N, self.SCRYPT_R, self.SCRYPT_P
+        else:
+            kdf, cost, r, p = self.KDF_PBKDF2, self.PBKDF2_ITERATIONS, 0, 0
+        salt, nonce = secrets.token_bytes(16), secrets.token_bytes(16)
+        header = struct.pack(
+            self.HEADER_FORMATS[self.VERSION], self.MAGIC, self.VERSION, cipher,
+            kdf, cost, r, p, salt, nonce, self.CHUNK_SIZE
+        )
+        keys = self._derive_keys(kdf, cost, r, p, salt)
+        target.write(header)
+        
+        index = 0
+        chunk = source.read(self.CHUNK_SIZE)
+        while True:
+            # Einen Block vorauslesen, um den letzten markieren zu können
+            following = source.read(self.CHUNK_SIZE)
+            final = 0 if following else 1
+            ciphertext, tag = self._seal(cipher, keys, header, nonce, index, final, chunk)
+            target.write(struct.pack(self.BLOCK_FORMAT, final, len(ciphertext)))
+            target.write(ciphertext)
+            target.write(tag)
+            if final:
+                return
+            chunk = following
+            index += 1
+
+    def decrypt(self, source, target):
+        """
+        Entschlüsselt den Dateistrom source nach target
+
+        Raises:
+            ValueError: Bei falschem Passwort, manipulierten oder unvollständigen Daten
+        """
+        prefix = source.read(len(self.MAGIC) + 1)
+        if not prefix.startswith(self.MAGIC):
+            # Altes Format: XOR mit dem SHA-256 des Passworts, blockweise
+            key = hashlib.sha256(self.password).digest()
+            block_size = len(key) * (self.CHUNK_SIZE // len(key))
+            chunk = prefix + source.read(block_size - len(prefix))
+            while chunk:
+                keystream = (key * (len(chunk) // len(key) + 1))[:len(chunk)]
+                target.write((int.from_bytes(chunk, "big") ^ int.from_bytes(keystream, "big")).to_bytes(len(chunk), "big"))
+                chunk = source.read(block_size)
+            return
+        
+        version = prefix[-1] if len(prefix) > len(self.MAGIC) else None
+        if version not in self.HEADER_FORMATS:
+            raise ValueError(f"Nicht unterstützte Backup-Version {version}")
+        header_format = self.HEADER_FORMATS[version]
+        header = prefix + source.read(struct.calcsize(header_format) - len(prefix))
+        if len(header) < struct.calcsize(header_format):
+            raise ValueError("Unvollständiger Backup-Kopf")
+        if version == 1:
+            _, _, kdf, cost, r, p, salt, nonce, chunk_size = struct.unpack(header_format, header)
+            cipher = self.CIPHER_SHAKE_HMAC
+        else:
+            _, _, cipher, kdf, cost, r, p, salt, nonce, chunk_size = struct.unpack(header_format, header)
+        
+        # Vor der Schlüsselableitung: der Kopf ist noch nicht authentifiziert
+        self._check_parameters(cipher, kdf, cost, r, p, chunk_size)
+        keys = self._derive_keys(kdf, cost, r, p, salt)
+        tag_size = self.TAG_SIZES[cipher]
+        
+        block_header_size = struct.calcsize(self.BLOCK_FORMAT)
+        index = 0
+        while True:
+            block_header = source.read(block_header_size)
+            if len(block_header) < block_header_size:
+                raise ValueError("Backup ist unvollständig")
+            final, length = struct.unpack(self.BLOCK_FORMAT, block_header)
+            if length > chunk_size:
+                raise ValueError("Ungültige Blocklänge im Backup")
+            ciphertext = source.read(length)
+            tag = source.read(tag_size)
+            if len(ciphertext) < length or len(tag) < tag_size:
+                raise ValueError("Backup ist unvollständig")
+            target.write(self._open(cipher, keys, header, nonce, index, final, ciphertext, tag))
+            if final:
+                if source.read(1):
+                    raise ValueError("Unerwartete Daten nach dem letzten Block")
+                return
+            index += 1
+
+
 class Database:
     """Verbesserte Datenbankklasse mit robuster Fehlerbehandlung"""
-    def __init__(self):
+    def __init__(self, db_path=None, source_path=None):
         self.conn = None
         self.last_error = None
+        # Standardmäßig die Datenbank des Add-ons, für Sammelberichte die Arbeitskopie
+        # eines Schüler-Backups (source_path = Originaldatei, bleibt unverändert)
+        self.db_path = db_path or DB_PATH
+        self.source_path = source_path
+        # Regel-Signatur, mit der die Tages-Bitmaps dieser Verbindung geprüft wurden
+        self._day_bitmap_rules = None
+        # False, wenn SQLite ohne FTS5 gebaut ist (Titelsuche dann per LIKE)
+        self.title_index_available = False
+        # Geteilter Cache der Einstellungen (None = direkt aus der Datenbank lesen)
+        self.settings_cache = None
         try:
             print("Study Tracker: Initialisiere Datenbankverbindung")
-            os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-            self.conn = sqlite3.connect(DB_PATH)
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path)
+            # Wirkt nur bei neuen Dateien; bestehende stellt StudiedCardsCompactor.reclaim_space um
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
             self.create_tables()
             migrate_database(self)  # Führe Migrationen aus
+            self.ensure_day_number_columns()  # Integer-Tagesnummern neben den Datumstexten
             self.ensure_optimized_indices()  # Erstelle optimierte Indices
+            self.ensure_data_version_triggers()  # Versionszähler für Caches
+            self.ensure_competency_aggregates()  # Kompetenz-Tagesaggregate
+            self.ensure_title_index()  # Volltextindex für Kartentitel
+            self.settings_cache = SettingsCache.for_database(self.db_path, self.conn)
             print("Study Tracker: Datenbankverbindung hergestellt")
         except Exception as e:
             self.last_error = str(e)
@@ -192,8 +1037,8 @@ class Database:
     def initialize_connection(self):
         """Stellt die Verbindung zur Datenbank her und erstellt Tabellen"""
         try:
-            os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-            self.conn = sqlite3.connect(DB_PATH)
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self.conn = sqlite3.connect(self.db_path)
             self.create_tables()
             print("Study Tracker: Datenbankverbindung hergestellt")
         except Exception as e:
@@ -235,7 +1080,7 @@ class Database:
                     CREATE TABLE IF NOT EXISTS validation_codes (
                         id INTEGER PRIMARY KEY,
                         deck_id INTEGER,
-                        card_id TEXT,
+                        card_id INTEGER,
                         date TEXT,
                         code TEXT,
                         correct_percent INTEGER,
@@ -273,7 +1118,7 @@ class Database:
                     -- Tabelle für ChatGPT-Links
                     CREATE TABLE IF NOT EXISTS chat_links (
                         id INTEGER PRIMARY KEY,
-                        card_id TEXT NOT NULL,
+                        card_id INTEGER NOT NULL,
                         deck_id INTEGER,
                         link TEXT NOT NULL,
                         card_title TEXT,
@@ -285,45 +1130,64 @@ class Database:
                     CREATE TABLE IF NOT EXISTS studied_cards (
                         id INTEGER PRIMARY KEY,
                         date TEXT NOT NULL,
-                        card_id TEXT NOT NULL,
+                        card_id INTEGER NOT NULL,
                         deck_id INTEGER,
                         review_time INTEGER DEFAULT 0,
                         UNIQUE(date, card_id)
                     );
                     
-                    -- Indizes für schnelleren Zugriff
-                    CREATE INDEX IF NOT EXISTS idx_daily_stats_date 
-                    ON daily_stats(date);
-                    
-                    CREATE INDEX IF NOT EXISTS idx_daily_stats_deck 
-                    ON daily_stats(deck_id);
-                    
-                    CREATE INDEX IF NOT EXISTS idx_level_history_deck 
-                    ON level_history(deck_id);
-                    
+                    -- Indizes für schnelleren Zugriff (zusammengesetzte Indizes
+                    -- für die Berichtsabfragen in ensure_optimized_indices)
                     CREATE INDEX IF NOT EXISTS idx_validation_codes_date 
                     ON validation_codes(date);
                     
-                    CREATE INDEX IF NOT EXISTS idx_validation_codes_deck 
-                    ON validation_codes(deck_id);
+                    CREATE INDEX IF NOT EXISTS idx_chat_links_deck 
+                    ON chat_links(deck_id);
                     
-                    CREATE INDEX IF NOT EXISTS idx_validation_codes_card 
-                    ON validation_codes(card_id);
+                    -- idx_level_progress_deck (UNIQUE) legt migrate_database an,
+                    -- da bestehende Datenbanken zuerst bereinigt werden müssen
                     
-                    CREATE INDEX IF NOT EXISTS idx_chat_links_card 
-                    ON chat_links(card_id);
+                    -- Tages-Bitmaps pro Deck (ein Bit pro Tag ab origin)
+                    CREATE TABLE IF NOT EXISTS day_bitmaps (
+                        deck_id INTEGER PRIMARY KEY,
+                        origin TEXT NOT NULL,
+                        has_data BLOB,
+                        success BLOB,
+                        missed BLOB
+                    );
                     
-                    CREATE INDEX IF NOT EXISTS idx_chat_links_deck 
-                    ON chat_links(deck_id);
+                    -- Zusammenfassungen verdichteter gelernter Karten pro Deck und Woche/Monat
+                    CREATE TABLE IF NOT EXISTS studied_cards_summary (
+                        deck_id INTEGER NOT NULL,
+                        period_start TEXT NOT NULL,
+                        period_end TEXT NOT NULL,
+                        start_day INTEGER NOT NULL,
+                        end_day INTEGER NOT NULL,
+                        distinct_cards INTEGER NOT NULL,
+                        review_count INTEGER NOT NULL,
+                        review_time INTEGER NOT NULL,
+                        PRIMARY KEY (deck_id, start_day)
+                    );
                     
-                    CREATE INDEX IF NOT EXISTS idx_studied_cards_date 
-                    ON studied_cards(date);
+                    -- Kompetenz-Aggregate pro Deck und Tag (per Trigger aus validation_codes gepflegt)
+                    CREATE TABLE IF NOT EXISTS competency_daily (
+                        deck_id INTEGER NOT NULL,
+                        date TEXT NOT NULL,
+                        code_count INTEGER NOT NULL,
+                        correct_sum INTEGER NOT NULL,
+                        max_difficulty INTEGER,
+                        last_values TEXT,
+                        PRIMARY KEY (deck_id, date)
+                    );
                     
-                    CREATE INDEX IF NOT EXISTS idx_studied_cards_deck 
-                    ON studied_cards(deck_id);
+                    -- Versionszähler für Datenänderungen (global und pro Tag)
+                    CREATE TABLE IF NOT EXISTS data_versions (
+                        scope TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL DEFAULT 0
+                    );
                     
-                    CREATE INDEX IF NOT EXISTS idx_level_progress_deck 
-                    ON level_progress(deck_id);
+                    INSERT OR IGNORE INTO data_versions (scope, version)
+                    VALUES ('global', 0);
                 """)
 
                 print("Study Tracker: Datenbanktabellen erfolgreich erstellt")
@@ -337,17 +1201,58 @@ class Database:
         try:
             with self.conn:
                 self.conn.executescript("""
-                    -- Optimiert für Berichte über lange Zeiträume
+                    -- Redundante Indizes: Präfix eines zusammengesetzten Index,
+                    -- des Primärschlüssels oder eines UNIQUE-Constraints
+                    DROP INDEX IF EXISTS idx_chat_links_card;
+                    DROP INDEX IF EXISTS idx_daily_stats_date;
+                    DROP INDEX IF EXISTS idx_daily_stats_deck;
+                    DROP INDEX IF EXISTS idx_studied_cards_date;
+                    DROP INDEX IF EXISTS idx_studied_cards_deck;
+                    DROP INDEX IF EXISTS idx_validation_codes_deck;
+                    DROP INDEX IF EXISTS idx_level_history_deck;
+                    
+                    -- Durch die abdeckenden Indizes unten ersetzt
+                    DROP INDEX IF EXISTS idx_level_history_deck_date;
+                    DROP INDEX IF EXISTS idx_level_history_deck_day;
+                    DROP INDEX IF EXISTS idx_daily_stats_deck_day;
+                    DROP INDEX IF EXISTS idx_studied_cards_deck_day;
+                    DROP INDEX IF EXISTS idx_validation_codes_card;
+                    
+                    -- Optimiert für Berichte über lange Zeiträume und die Kompetenz-Trigger
                     CREATE INDEX IF NOT EXISTS idx_validation_codes_deck_date 
                     ON validation_codes(deck_id, date);
                     
+                    CREATE INDEX IF NOT EXISTS idx_validation_codes_deck_day 
+                    ON validation_codes(deck_id, day_num);
+                    
+                    CREATE INDEX IF NOT EXISTS idx_validation_codes_day 
+                    ON validation_codes(day_num);
+                    
+                    -- Codes mehrerer Karten nach Datum, ohne Zugriff auf die Tabelle
+                    CREATE INDEX IF NOT EXISTS idx_validation_codes_card_date 
+                    ON validation_codes(card_id, date, code, correct_percent, difficulty);
+                    
                     -- Optimiert für ChatGPT-Link-Lookups
                     CREATE INDEX IF NOT EXISTS idx_chat_links_compound 
                     ON chat_links(card_id, deck_id);
                     
-                    -- Optimiert für Level-Historie-Abfragen
-                    CREATE INDEX IF NOT EXISTS idx_level_history_deck_date 
-                    ON level_history(deck_id, date(change_date));
+                    -- Level-Historie pro Deck und Zeitraum, inkl. Prüfung auf Periodenwechsel
+                    CREATE INDEX IF NOT EXISTS idx_level_history_deck_day_type 
+                    ON level_history(deck_id, day_num, change_type);
+                    
+                    CREATE INDEX IF NOT EXISTS idx_level_history_day 
+                    ON level_history(day_num);
+                    
+                    -- Tagesstatistiken pro Deck und Zeitraum (abdeckend)
+                    CREATE INDEX IF NOT EXISTS idx_daily_stats_deck_day_totals 
+                    ON daily_stats(deck_id, day_num, date, cards_due, cards_studied, study_time);
+                    
+                    CREATE INDEX IF NOT EXISTS idx_daily_stats_day 
+                    ON daily_stats(day_num);
+                    
+                    -- Gelernte Karten pro Deck und Zeitraum (abdeckend)
+                    CREATE INDEX IF NOT EXISTS idx_studied_cards_deck_day_card 
+                    ON studied_cards(deck_id, day_num, card_id, date);
                 """)
             print("Study Tracker: Optimierte Indices erstellt")
             return True
@@ -356,88 +1261,683 @@ class Database:
             self.handle_db_error(e)
             return False
     
-    def repair_database_if_needed(self):
-        """Prüft und repariert die Datenbank, falls nötig"""
-        try:
-            # Prüfe Integrität
-            cursor = self.conn.execute("PRAGMA integrity_check")
-            result = cursor.fetchone()[0]
+    def _day_number_expressions(self, date_column, has_timestamp, row=""):
+        """
+        SQL-Ausdrücke für die abgeleiteten Integer-Spalten einer Zeile
+        
+        Args:
+            date_column: Name der Datumsspalte
+            has_timestamp: True, wenn zusätzlich ts_ms gepflegt wird
+            row: Präfix der Zeile im Trigger (z.B. "NEW."), sonst leer
             
-            if result != "ok":
-                print(f"Study Tracker: Datenbank-Integritätsprobleme: {result}")
-                
-                # Erstelle Backup
-                backup_path = os.path.join(BACKUP_DIR, f"corrupt_db_backup_{int(time.time())}.db")
-                os.makedirs(BACKUP_DIR, exist_ok=True)
-                
-                with sqlite3.connect(backup_path) as backup_db:
-                    self.conn.backup(backup_db)
+        Returns:
+            dict: Spaltenname -> Ausdruck
+        """
+        value = f"{row}{date_column}"
+        expressions = {'day_num': DAY_NUMBER_SQL.format(value=value)}
+        if has_timestamp:
+            expressions['ts_ms'] = EPOCH_MILLIS_SQL.format(value=value)
+        return expressions
+    
+    def _day_number_assignments(self, date_column, has_timestamp, row=""):
+        """SET-Ausdrücke für die abgeleiteten Integer-Spalten (siehe _day_number_expressions)"""
+        return ", ".join(
+            f"{column} = {expression}"
+            for column, expression in self._day_number_expressions(date_column, has_timestamp, row).items()
+        )
+    
+    def ensure_day_number_columns(self):
+        """
+        Stellt sicher, dass day_num (und ts_ms) in allen Tabellen aus
+        DAY_NUMBER_TABLES existieren.
+        
+        Die Spalten sind virtuelle generierte Spalten: SQLite berechnet sie aus
+        der Datumsspalte, beim Schreiben werden nur die Indizes gepflegt. Tabellen
+        mit gespeicherten Spalten früherer Versionen werden einmalig umgebaut.
+        Ohne Unterstützung (SQLite vor 3.31) werden gespeicherte Spalten per Trigger gepflegt.
+        """
+        if not GENERATED_COLUMNS_SUPPORTED:
+            return self._ensure_day_number_triggers()
+        
+        try:
+            rebuilt_tables = []
+            with self.conn:
+                for table, (date_column, has_timestamp) in DAY_NUMBER_TABLES.items():
+                    expressions = self._day_number_expressions(date_column, has_timestamp)
+                    # hidden: 0 = normale Spalte, 2/3 = generierte Spalte
+                    columns = {
+                        col[1]: col[6]
+                        for col in self.conn.execute(f"PRAGMA table_xinfo({table})").fetchall()
+                    }
                     
-                print(f"Study Tracker: Backup der beschädigten Datenbank erstellt: {backup_path}")
-                
-                # Versuche Reparatur
-                self.conn.execute("VACUUM")
-                return False
+                    stored = [column for column in expressions if columns.get(column) == 0]
+                    if stored:
+                        self._drop_day_number_columns(table, stored, columns)
+                        rebuilt_tables.append(table)
+                    
+                    for column, expression in expressions.items():
+                        if column in stored or column not in columns:
+                            self.conn.execute(
+                                f"ALTER TABLE {table} ADD COLUMN {column} INTEGER "
+                                f"GENERATED ALWAYS AS ({expression}) VIRTUAL"
+                            )
+                
+                # Trigger früherer Versionen schreiben jede neue Zeile ein zweites Mal
+                for (name,) in self.conn.execute("""
+                    SELECT name FROM sqlite_master
+                    WHERE type = 'trigger' AND name LIKE 'trg_day_number_%'
+                """).fetchall():
+                    self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            
+            if rebuilt_tables:
+                # Indizes der Tabellen wurden mit den alten Tabellen entfernt; Trigger
+                # und übrige Indizes legen die folgenden ensure_*-Schritte wieder an
+                self.create_tables()
+                print(f"Study Tracker: Migration - Tagesnummern als generierte Spalten: {', '.join(rebuilt_tables)}")
             return True
         except Exception as e:
-            print(f"Study Tracker: Fehler bei Datenbank-Integritätsprüfung: {e}")
+            print(f"Study Tracker: Fehler beim Anlegen der Tagesnummern: {e}")
+            traceback.print_exc()
             return False
     
-    def handle_db_error(self, error):
-        """Zentrale Fehlerbehandlung für Datenbankoperationen"""
-        print(f"Datenbankfehler: {str(error)}")
-        traceback.print_exc()
+    def _drop_day_number_columns(self, table, stored, columns):
+        """
+        Baut eine Tabelle ohne die gespeicherten Tagesnummer-Spalten neu auf
+        (wie die card_id-Migration in migrate_database)
         
-        # Erstelle Backup bei Datenbankfehlern
-        try:
-            if self.conn:
-                backup_path = os.path.join(
-                    BACKUP_DIR, 
-                    f"study_tracker_error_backup_{int(time.time())}.db"
-                )
-                os.makedirs(BACKUP_DIR, exist_ok=True)
-                with sqlite3.connect(backup_path) as backup_db:
-                    self.conn.backup(backup_db)
-                print(f"Datenbank-Backup erstellt unter: {backup_path}")
-        except Exception as backup_error:
-            print(f"Backup konnte nicht erstellt werden: {backup_error}")
-    
-    def close(self):
-        """Schließt die Datenbankverbindung sicher"""
-        if hasattr(self, 'conn') and self.conn:
-            try:
-                self.conn.commit()
-                self.conn.close()
-                print("Study Tracker: Datenbankverbindung geschlossen")
-            except Exception as e:
-                print(f"Study Tracker: Fehler beim Schließen der Datenbank: {e}")
+        Args:
+            table: Name der Tabelle
+            stored: Zu entfernende Spalten
+            columns: Alle Spalten der Tabelle (Name -> hidden aus table_xinfo)
+        """
+        create_sql = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()[0]
+        for column in stored:
+            create_sql = re.sub(rf"\s*,\s*{column}\s+INTEGER\b(?=\s*[,)])", "", create_sql, count=1)
+        create_sql = create_sql.replace(table, f"{table}_migrated", 1)
+        column_list = ", ".join(
+            name for name, hidden in columns.items() if hidden == 0 and name not in stored
+        )
+        
+        # Trigger anderer Tabellen, die diese Tabelle lesen (z.B. der Titelindex), verhindern
+        # das Umbenennen; alle Trigger werden von den ensure_*-Schritten neu angelegt
+        for (name,) in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE ?", (f"%{table}%",)
+        ).fetchall():
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        
+        self.conn.execute(f"DROP TABLE IF EXISTS {table}_migrated")
+        self.conn.execute(create_sql)
+        self.conn.execute(f"INSERT INTO {table}_migrated ({column_list}) SELECT {column_list} FROM {table}")
+        self.conn.execute(f"DROP TABLE {table}")
+        self.conn.execute(f"ALTER TABLE {table}_migrated RENAME TO {table}")
     
-    def get_setting(self, key, default=None):
-        """Holt eine Einstellung aus der Datenbank"""
+    def _ensure_day_number_triggers(self):
+        """
+        Gespeicherte day_num/ts_ms-Spalten für SQLite ohne generierte Spalten:
+        per Trigger bei INSERT und bei Änderung des Datums gepflegt und für
+        vorhandene Zeilen befüllt
+        """
         try:
+            expected = {}
+            for table, (date_column, has_timestamp) in DAY_NUMBER_TABLES.items():
+                assignments = self._day_number_assignments(date_column, has_timestamp, "NEW.")
+                for operation, event in (('insert', 'INSERT'), ('update', f"UPDATE OF {date_column}")):
+                    name = f"trg_day_number_{table}_{operation}"
+                    expected[name] = (
+                        f"CREATE TRIGGER {name} AFTER {event} ON {table}\nBEGIN\n"
+                        f"    UPDATE {table} SET {assignments} WHERE rowid = NEW.rowid;\nEND"
+                    )
+            
             cursor = self.conn.execute("""
-                SELECT value FROM settings WHERE key = ?
-            """, (key,))
-            result = cursor.fetchone()
-            return result[0] if result else default
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'trigger' AND name LIKE 'trg_day_number_%'
+            """)
+            existing = dict(cursor.fetchall())
+            
+            with self.conn:
+                for table, (date_column, has_timestamp) in DAY_NUMBER_TABLES.items():
+                    columns = [col[1] for col in self.conn.execute(f"PRAGMA table_info({table})").fetchall()]
+                    added = False
+                    for column in ('day_num', 'ts_ms') if has_timestamp else ('day_num',):
+                        if column not in columns:
+                            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} INTEGER")
+                            added = True
+                    if added:
+                        print(f"Study Tracker: Migration - Integer-Tagesnummern für {table} hinzugefügt")
+                    
+                    # Zeilen ohne Tagesnummer (alte Daten, importierte Backups) nachziehen
+                    self.conn.execute(f"""
+                        UPDATE {table} SET {self._day_number_assignments(date_column, has_timestamp)}
+                        WHERE day_num IS NULL AND {date_column} IS NOT NULL
+                    """)
+                
+                for name, sql in existing.items():
+                    if expected.get(name) != sql:
+                        self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for name, sql in expected.items():
+                    if existing.get(name) != sql:
+                        self.conn.execute(sql)
+            return True
         except Exception as e:
-            print(f"Fehler beim Abrufen der Einstellung '{key}': {e}")
-            return default
+            print(f"Study Tracker: Fehler beim Anlegen der Tagesnummern: {e}")
+            traceback.print_exc()
+            return False
     
-    def save_setting(self, key, value):
-        """Speichert eine Einstellung in der Datenbank"""
-        try:
+    def _build_data_version_trigger(self, table, operation, date_expr, columns):
+        """
+        Erzeugt das SQL für einen Trigger, der bei Änderungen an einer Tabelle
+        den globalen Datenversionszähler erhöht und den betroffenen Tag markiert
+        
+        Args:
+            table: Name der überwachten Tabelle
+            operation: INSERT, UPDATE oder DELETE
+            date_expr: SQL-Ausdruck für den Tag mit Platzhalter {row}, oder None
+            columns: Spalten, deren Änderung bei UPDATE relevant ist
+            
+        Returns:
+            tuple: (Triggername, CREATE TRIGGER-Anweisung)
+        """
+        name = f"trg_data_version_{table}_{operation.lower()}"
+        rows = {'INSERT': ['NEW'], 'UPDATE': ['OLD', 'NEW'], 'DELETE': ['OLD']}[operation]
+        
+        statements = ["UPDATE data_versions SET version = version + 1 WHERE scope = 'global';"]
+        for row in rows:
+            scope = f"COALESCE({date_expr.format(row=row)}, 'undated')" if date_expr else "'undated'"
+            statements.append(f"INSERT OR IGNORE INTO data_versions (scope, version) VALUES ({scope}, 0);")
+            statements.append(
+                f"UPDATE data_versions SET version = (SELECT version FROM data_versions WHERE scope = 'global') "
+                f"WHERE scope = {scope};"
+            )
+        
+        # Updates ohne inhaltliche Änderung sollen Caches nicht invalidieren
+        when = ""
+        if operation == 'UPDATE' and columns:
+            when = " WHEN " + " OR ".join(f"OLD.{col} IS NOT NEW.{col}" for col in columns)
+        
+        body = "\n    ".join(statements)
+        sql = f"CREATE TRIGGER {name} AFTER {operation} ON {table}{when}\nBEGIN\n    {body}\nEND"
+        return name, sql
+    
+    def ensure_data_version_triggers(self):
+        """
+        Stellt sicher, dass alle Trigger für den Datenversionszähler existieren.
+        Veraltete Trigger (z.B. nach Schemaänderungen) werden neu erstellt.
+        """
+        try:
+            expected = {}
+            for table, date_expr in DATA_VERSION_TABLES.items():
+                columns = [
+                    col[1] for col in self.conn.execute(f"PRAGMA table_info({table})").fetchall()
+                    if col[1] not in ('id', 'created_at', 'updated_at', 'day_num', 'ts_ms')
+                ]
+                for operation in ('INSERT', 'UPDATE', 'DELETE'):
+                    name, sql = self._build_data_version_trigger(table, operation, date_expr, columns)
+                    expected[name] = sql
+            
+            cursor = self.conn.execute("""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'trigger' AND name LIKE 'trg_data_version_%'
+            """)
+            existing = dict(cursor.fetchall())
+            
+            with self.conn:
+                for name, sql in existing.items():
+                    if expected.get(name) != sql:
+                        self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for name, sql in expected.items():
+                    if existing.get(name) != sql:
+                        self.conn.execute(sql)
+                # Ältere Trigger markierten Validierungscodes mit dem vollen Zeitstempel;
+                # diese Einträge in die Tageseinträge übernehmen
+                self.conn.execute("""
+                    INSERT INTO data_versions (scope, version)
+                    SELECT substr(scope, 1, 10), MAX(version) FROM data_versions
+                    WHERE length(scope) > 10
+                    GROUP BY substr(scope, 1, 10)
+                    ON CONFLICT (scope) DO UPDATE SET version = MAX(version, excluded.version)
+                """)
+                self.conn.execute("DELETE FROM data_versions WHERE length(scope) > 10")
+            return True
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Erstellen der Datenversions-Trigger: {e}")
+            traceback.print_exc()
+            return False
+    
+    def _build_competency_trigger(self, operation):
+        """
+        Erzeugt das SQL für einen Trigger, der nach Änderungen an validation_codes
+        die Tagesaggregate (Anzahl, Summe der Korrektheit, maximale Schwierigkeit,
+        letzte drei Werte) des betroffenen Decks und Tages neu berechnet
+        
+        Args:
+            operation: INSERT, UPDATE oder DELETE
+            
+        Returns:
+            tuple: (Triggername, CREATE TRIGGER-Anweisung)
+        """
+        name = f"trg_competency_daily_{operation.lower()}"
+        rows = {'INSERT': ['NEW'], 'UPDATE': ['OLD', 'NEW'], 'DELETE': ['OLD']}[operation]
+        
+        # Wie parse_code: fehlende Werte aus den ersten vier Zeichen des Codes
+        correct = "COALESCE(v.correct_percent, CAST(substr(trim(v.code), 1, 2) AS INTEGER))"
+        difficulty = "COALESCE(v.difficulty, CAST(substr(trim(v.code), 3, 2) AS INTEGER))"
+        
+        statements = []
+        for row in rows:
+            day = f"substr({row}.date, 1, 10)"
+            # Codes ohne Deck werden unter -1 zusammengefasst
+            deck = f"COALESCE({row}.deck_id, -1)"
+            match = f"v.deck_id IS {row}.deck_id AND v.date >= {day} AND v.date < {day} || 'z'"
+            statements.append(
+                f"DELETE FROM competency_daily WHERE deck_id = {deck} AND date = {day};"
+            )
+            statements.append(
+                f"INSERT INTO competency_daily (deck_id, date, code_count, correct_sum, max_difficulty, last_values) "
+                f"SELECT {deck}, {day}, COUNT(*), SUM(correct), MAX(difficulty), "
+                f"(SELECT group_concat(correct, ',') FROM ("
+                f"SELECT correct FROM (SELECT v.date, v.id, {correct} AS correct FROM validation_codes v "
+                f"WHERE {match} ORDER BY v.date DESC, v.id DESC LIMIT 3) ORDER BY date, id)) "
+                f"FROM (SELECT {correct} AS correct, {difficulty} AS difficulty FROM validation_codes v WHERE {match}) "
+                f"WHERE {row}.date IS NOT NULL HAVING COUNT(*) > 0;"
+            )
+        
+        # Nur Änderungen an Deck, Datum oder Code betreffen die Aggregate
+        when = ""
+        if operation == 'UPDATE':
+            when = " WHEN " + " OR ".join(
+                f"OLD.{col} IS NOT NEW.{col}"
+                for col in ('deck_id', 'date', 'code', 'correct_percent', 'difficulty')
+            )
+        
+        body = "\n    ".join(statements)
+        sql = f"CREATE TRIGGER {name} AFTER {operation} ON validation_codes{when}\nBEGIN\n    {body}\nEND"
+        return name, sql
+    
+    def ensure_competency_aggregates(self, rebuild=False):
+        """
+        Stellt sicher, dass die Trigger für die Kompetenz-Tagesaggregate existieren,
+        und baut die Aggregate auf, wenn sie fehlen (oder rebuild gesetzt ist)
+        """
+        try:
+            expected = dict(
+                self._build_competency_trigger(operation)
+                for operation in ('INSERT', 'UPDATE', 'DELETE')
+            )
+            cursor = self.conn.execute("""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'trigger' AND name LIKE 'trg_competency_daily_%'
+            """)
+            existing = dict(cursor.fetchall())
+            
+            with self.conn:
+                for name, sql in existing.items():
+                    if expected.get(name) != sql:
+                        self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for name, sql in expected.items():
+                    if existing.get(name) != sql:
+                        self.conn.execute(sql)
+                
+                # Neue oder geänderte Trigger: Aggregate der vorhandenen Codes nachziehen
+                if rebuild or existing != expected:
+                    self.rebuild_competency_aggregates()
+            return True
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Erstellen der Kompetenz-Aggregate: {e}")
+            traceback.print_exc()
+            return False
+    
+    def rebuild_competency_aggregates(self):
+        """Berechnet alle Kompetenz-Tagesaggregate aus validation_codes neu"""
+        cursor = self.conn.execute("""
+            SELECT COALESCE(deck_id, -1), substr(date, 1, 10), code, correct_percent, difficulty
+            FROM validation_codes
+            WHERE date IS NOT NULL
+            ORDER BY deck_id, substr(date, 1, 10), date, id
+        """)
+        aggregates = OrderedDict()
+        for deck_id, day, code, correct_percent, difficulty in cursor:
+            if correct_percent is None or difficulty is None:
+                code_str = str(code or "").strip()
+                correct_percent = correct_percent if correct_percent is not None else self._code_number(code_str[:2])
+                difficulty = difficulty if difficulty is not None else self._code_number(code_str[2:4])
+            entry = aggregates.get((deck_id, day))
+            if entry is None:
+                entry = aggregates[(deck_id, day)] = [0, 0, None, []]
+            entry[0] += 1
+            entry[1] += correct_percent
+            entry[2] = difficulty if entry[2] is None else max(entry[2], difficulty)
+            entry[3] = (entry[3] + [correct_percent])[-3:]
+        
+        self.conn.execute("DELETE FROM competency_daily")
+        self.conn.executemany("""
+            INSERT INTO competency_daily (deck_id, date, code_count, correct_sum, max_difficulty, last_values)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [
+            (deck_id, day, count, correct_sum, max_difficulty, ",".join(str(value) for value in last_values))
+            for (deck_id, day), (count, correct_sum, max_difficulty, last_values) in aggregates.items()
+        ])
+        print(f"Study Tracker: {len(aggregates)} Kompetenz-Tagesaggregate aufgebaut")
+    
+    def _code_number(self, text):
+        """Zahl aus einem Teil des Validierungscodes wie CAST in SQLite (führende Ziffern, sonst 0)"""
+        match = re.match(r"\s*([+-]?\d+)", text)
+        return int(match.group(1)) if match else 0
+    
+    def get_competency_aggregates(self, deck_id=None, start_date=None, end_date=None):
+        """
+        Holt die Kompetenz-Tagesaggregate eines Decks (ohne Deck: aller Decks)
+        
+        Args:
+            deck_id: Optional, ID des Decks
+            start_date: Optional, frühester Tag (YYYY-MM-DD)
+            end_date: Optional, spätester Tag (YYYY-MM-DD)
+            
+        Returns:
+            list: Tupel (Datum, Anzahl, Summe Korrektheit, maximale Schwierigkeit,
+                  Liste der letzten bis zu drei Korrektheitswerte), nach Datum sortiert.
+                  Ohne Deck gibt es pro Tag eine Zeile je Deck; die letzten Werte
+                  über alle Decks liefert get_recent_competency_values.
+        """
+        try:
+            params = []
+            query = COMPETENCY_DAILY_SQL
+            if deck_id is not None:
+                query += " AND deck_id = ?"
+                params.append(deck_id)
+            if start_date:
+                query += " AND date >= ?"
+                params.append(start_date)
+            if end_date:
+                query += " AND date <= ?"
+                params.append(end_date)
+            query += " ORDER BY date, deck_id"
+            
+            return [
+                (date, count, correct_sum, max_difficulty,
+                 [int(value) for value in last_values.split(",")] if last_values else [])
+                for date, count, correct_sum, max_difficulty, last_values in self.conn.execute(query, params)
+            ]
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der Kompetenz-Aggregate: {e}")
+            return []
+    
+    def get_recent_competency_values(self, deck_id=None, start_date=None, end_date=None, limit=3):
+        """
+        Korrektheitswerte der jüngsten Validierungscodes in zeitlicher Reihenfolge
+        (wie last_values in competency_daily, aber auch über mehrere Decks)
+        
+        Args:
+            deck_id: Optional, ID des Decks
+            start_date: Optional, frühester Tag (YYYY-MM-DD)
+            end_date: Optional, spätester Tag (YYYY-MM-DD), einschließlich des ganzen Tages
+            limit: Anzahl der Werte
+            
+        Returns:
+            list: Bis zu limit Werte, der jüngste zuletzt
+        """
+        try:
+            params = []
+            query = """
+                SELECT COALESCE(correct_percent, CAST(substr(trim(code), 1, 2) AS INTEGER))
+                FROM validation_codes
+                WHERE date IS NOT NULL
+            """
+            if deck_id is not None:
+                query += " AND deck_id = ?"
+                params.append(deck_id)
+            if start_date:
+                query += " AND day_num >= ?"
+                params.append(day_number(start_date))
+            if end_date:
+                query += " AND day_num <= ?"
+                params.append(day_number(end_date))
+            query += " ORDER BY date DESC, id DESC LIMIT ?"
+            params.append(limit)
+            
+            return [row[0] for row in self.conn.execute(query, params).fetchall()][::-1]
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der letzten Kompetenzwerte: {e}")
+            return []
+    
+    def _build_title_index_trigger(self, table, operation):
+        """
+        Erzeugt das SQL für einen Trigger, der nach Änderungen an einer Titelquelle
+        den Eintrag der betroffenen Karte im Volltextindex card_titles_fts neu aufbaut.
+        Ein Eintrag pro Karte (rowid = card_id) enthält alle unterschiedlichen Titel.
+        
+        Args:
+            table: validation_codes oder chat_links
+            operation: INSERT, UPDATE oder DELETE
+            
+        Returns:
+            tuple: (Triggername, CREATE TRIGGER-Anweisung)
+        """
+        name = f"trg_card_titles_{table}_{operation.lower()}"
+        rows = {'INSERT': ['NEW'], 'UPDATE': ['OLD', 'NEW'], 'DELETE': ['OLD']}[operation]
+        
+        statements = []
+        for row in rows:
+            sources = " UNION ".join(
+                f"SELECT card_title FROM {source} WHERE card_id = {row}.card_id "
+                f"AND card_title IS NOT NULL AND card_title != ''"
+                for source in TITLE_INDEX_TABLES
+            )
+            statements.append(f"DELETE FROM card_titles_fts WHERE rowid = {row}.card_id;")
+            statements.append(
+                f"INSERT INTO card_titles_fts (rowid, title) "
+                f"SELECT {row}.card_id, group_concat(card_title, ' ') FROM ({sources}) "
+                f"WHERE typeof({row}.card_id) = 'integer' HAVING COUNT(*) > 0;"
+            )
+        
+        event = "UPDATE OF card_id, card_title" if operation == 'UPDATE' else operation
+        body = "\n    ".join(statements)
+        sql = f"CREATE TRIGGER {name} AFTER {event} ON {table}\nBEGIN\n    {body}\nEND"
+        return name, sql
+    
+    def ensure_title_index(self, rebuild=False):
+        """
+        Stellt sicher, dass der FTS5-Volltextindex für Kartentitel und seine
+        Trigger existieren, und baut ihn auf, wenn er neu ist (oder rebuild gesetzt ist).
+        Ohne FTS5-Unterstützung bleibt die Titelsuche bei LIKE.
+        """
+        try:
+            created = not self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'card_titles_fts'"
+            ).fetchone()
+            try:
+                self.conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS card_titles_fts
+                    USING fts5(title, tokenize = 'unicode61 remove_diacritics 2')
+                """)
+            except sqlite3.OperationalError as e:
+                print(f"Study Tracker: FTS5 nicht verfügbar, Titelsuche per LIKE: {e}")
+                self.title_index_available = False
+                return False
+            
+            expected = dict(
+                self._build_title_index_trigger(table, operation)
+                for table in TITLE_INDEX_TABLES
+                for operation in ('INSERT', 'UPDATE', 'DELETE')
+            )
+            cursor = self.conn.execute("""
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'trigger' AND name LIKE 'trg_card_titles_%'
+            """)
+            existing = dict(cursor.fetchall())
+            
+            with self.conn:
+                for name, sql in existing.items():
+                    if expected.get(name) != sql:
+                        self.conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                for name, sql in expected.items():
+                    if existing.get(name) != sql:
+                        self.conn.execute(sql)
+                
+                # Ohne Trigger (neu oder geändert) ist der Index nicht mehr aktuell
+                if rebuild or created or existing != expected:
+                    self.rebuild_title_index()
+            
+            self.title_index_available = True
+            return True
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Erstellen des Titelindex: {e}")
+            traceback.print_exc()
+            self.title_index_available = False
+            return False
+    
+    def rebuild_title_index(self):
+        """Baut den Volltextindex für Kartentitel aus allen Titelquellen neu auf"""
+        sources = " UNION ".join(
+            f"SELECT card_id, card_title FROM {source} "
+            f"WHERE typeof(card_id) = 'integer' AND card_title IS NOT NULL AND card_title != ''"
+            for source in TITLE_INDEX_TABLES
+        )
+        self.conn.execute("DELETE FROM card_titles_fts")
+        self.conn.execute(f"""
+            INSERT INTO card_titles_fts (rowid, title)
+            SELECT card_id, group_concat(card_title, ' ')
+            FROM ({sources})
+            GROUP BY card_id
+        """)
+        count = self.conn.execute("SELECT COUNT(*) FROM card_titles_fts").fetchone()[0]
+        print(f"Study Tracker: Titelindex mit {count} Karten aufgebaut")
+    
+    def get_data_version(self, start_date=None, end_date=None):
+        """
+        Liefert den Datenversionszähler. Mit Zeitraum wird die letzte Änderung
+        zurückgegeben, die Tage im Zeitraum oder nicht tagesbezogene Daten betrifft.
+        
+        Args:
+            start_date: Optional, Startdatum im Format YYYY-MM-DD
+            end_date: Optional, Enddatum im Format YYYY-MM-DD
+            
+        Returns:
+            int: Versionsnummer (0, wenn noch keine Änderungen erfasst wurden)
+        """
+        try:
+            if start_date and end_date:
+                cursor = self.conn.execute("""
+                    SELECT MAX(version) FROM data_versions
+                    WHERE scope = 'undated' OR scope BETWEEN ? AND ?
+                """, (start_date, end_date))
+            else:
+                cursor = self.conn.execute(
+                    "SELECT version FROM data_versions WHERE scope = 'global'"
+                )
+            result = cursor.fetchone()
+            return result[0] if result and result[0] is not None else 0
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der Datenversion: {e}")
+            return None
+    
+    def repair_database_if_needed(self):
+        """
+        Prüft vor Berichten, ob die Datenbank verwendbar ist
+        
+        Die vollständige Prüfung läuft im Leerlauf (schedule_integrity_check).
+        Hier wird nur erneut geprüft (PRAGMA quick_check), wenn noch nie
+        geprüft wurde oder die letzte Prüfung fehlgeschlagen ist.
+        
+        Returns:
+            bool: False, wenn die Datenbank beschädigt ist
+        """
+        try:
+            return IntegrityChecker(self).ensure_usable()
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei Datenbank-Integritätsprüfung: {e}")
+            return False
+    
+    def handle_db_error(self, error):
+        """
+        Zentrale Fehlerbehandlung für Datenbankoperationen
+        
+        Backups werden gedrosselt über error_snapshots erstellt,
+        wiederholte Fehler nur gezählt.
+        """
+        try:
+            # Keine Fehler-Backups von Arbeitskopien fremder Datenbanken
+            count = error_snapshots.record(self.db_path, error) if self.conn and not self.source_path else 1
+        except Exception as backup_error:
+            count = 1
+            print(f"Backup konnte nicht erstellt werden: {backup_error}")
+        
+        if count == 1:
+            print(f"Datenbankfehler: {str(error)}")
+            traceback.print_exc()
+        elif count & (count - 1) == 0:
+            # Bei 2, 4, 8, ... Wiederholungen erneut melden
+            print(f"Datenbankfehler ({count}x aufgetreten): {str(error)}")
+    
+    def close(self):
+        """Schließt die Datenbankverbindung sicher"""
+        if hasattr(self, 'conn') and self.conn:
+            try:
+                self.conn.commit()
+                self.conn.close()
+                print("Study Tracker: Datenbankverbindung geschlossen")
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Schließen der Datenbank: {e}")
+    
+    def get_setting(self, key, default=None):
+        """Holt eine Einstellung (aus dem Cache, sonst aus der Datenbank)"""
+        if self.settings_cache:
+            return self.settings_cache.get(key, default)
+        try:
+            cursor = self.conn.execute("""
+                SELECT value FROM settings WHERE key = ?
+            """, (key,))
+            result = cursor.fetchone()
+            return result[0] if result else default
+        except Exception as e:
+            print(f"Fehler beim Abrufen der Einstellung '{key}': {e}")
+            return default
+    
+    def save_setting(self, key, value):
+        """Speichert eine Einstellung in der Datenbank"""
+        try:
             with self.conn:
                 self.conn.execute("""
                     INSERT OR REPLACE INTO settings (key, value)
                     VALUES (?, ?)
                 """, (key, value))
+            if self.settings_cache:
+                self.settings_cache.set(key, value)
             return True
         except Exception as e:
             print(f"Fehler beim Speichern der Einstellung '{key}': {e}")
             self.handle_db_error(e)
             return False
     
+    def get_date_setting(self, key, default=None):
+        """
+        Holt eine Einstellung im Format YYYY-MM-DD als date
+        
+        Returns:
+            date: Das Datum oder default, wenn es fehlt oder ungültig ist
+        """
+        parse = lambda value: datetime.strptime(value[:10], "%Y-%m-%d").date()
+        if self.settings_cache:
+            value = self.settings_cache.get_parsed(key, 'date', parse)
+        else:
+            try:
+                value = parse(self.get_setting(key))
+            except (TypeError, ValueError):
+                value = None
+        return default if value is None else value
+    
+    def get_int_setting(self, key, default=None):
+        """Holt eine Einstellung als int oder default, wenn sie fehlt oder ungültig ist"""
+        if self.settings_cache:
+            value = self.settings_cache.get_parsed(key, 'int', int)
+        else:
+            try:
+                value = int(self.get_setting(key))
+            except (TypeError, ValueError):
+                value = None
+        return default if value is None else value
+    
     def save_selected_deck(self, deck_name):
         """Speichert den ausgewählten Stapel"""
         return self.save_setting('selected_deck', deck_name)
@@ -446,6 +1946,28 @@ class Database:
         """Lädt den gespeicherten Stapel"""
         return self.get_setting('selected_deck')
     
+    def save_deck_names(self, deck_names):
+        """
+        Merkt sich die Decknamen der Sammlung, damit Berichte aus einem Backup
+        die Namen der Decks des Schülers anzeigen. Namen gelöschter Decks bleiben erhalten.
+        
+        Args:
+            deck_names: Dictionary deck_id -> Name
+        """
+        stored = self.get_deck_names()
+        merged = dict(stored)
+        merged.update({int(deck_id): name for deck_id, name in deck_names.items()})
+        if merged == stored:
+            return True
+        return self.save_setting('deck_names', json.dumps({str(deck_id): name for deck_id, name in merged.items()}))
+    
+    def get_deck_names(self):
+        """Gespeicherte Decknamen als Dictionary deck_id -> Name"""
+        try:
+            return {int(deck_id): name for deck_id, name in json.loads(self.get_setting('deck_names') or '{}').items()}
+        except (TypeError, ValueError):
+            return {}
+    
     def update_sync_date(self):
         """Aktualisiert das letzte Synchronisierungsdatum"""
         try:
@@ -483,12 +2005,144 @@ class Database:
                     (date, deck_id, cards_due, cards_studied, study_time)
                     VALUES (?, ?, ?, ?, ?)
                 """, (date, deck_id, cards_due, cards_studied, study_time))
+                self._update_day_bitmaps(date, deck_id)
             return True
         except Exception as e:
             print(f"Fehler beim Speichern der Tagesstatistik: {e}")
             self.handle_db_error(e)
             return False
     
+    def _load_day_bitmaps(self, bitmap_id):
+        """Lädt die gespeicherten Tages-Bitmaps oder None"""
+        cursor = self.conn.execute("""
+            SELECT origin, has_data, success, missed FROM day_bitmaps WHERE deck_id = ?
+        """, (bitmap_id,))
+        row = cursor.fetchone()
+        return DayBitmaps.from_row(row) if row else None
+    
+    def _store_day_bitmaps(self, bitmap_id, bitmaps):
+        """Speichert Tages-Bitmaps; ohne Daten wird die Zeile entfernt"""
+        if bitmaps.origin is None:
+            self.conn.execute("DELETE FROM day_bitmaps WHERE deck_id = ?", (bitmap_id,))
+            return
+        self.conn.execute("""
+            INSERT OR REPLACE INTO day_bitmaps (deck_id, origin, has_data, success, missed)
+            VALUES (?, ?, ?, ?, ?)
+        """, (bitmap_id,) + bitmaps.to_row())
+    
+    def _day_bitmap_source(self, bitmap_id, date=None):
+        """Tageswerte (Datum, fällig, gelernt) eines Decks bzw. summiert über alle Decks"""
+        if bitmap_id == ALL_DECKS_BITMAP_ID:
+            query = "SELECT date, SUM(cards_due), SUM(cards_studied) FROM daily_stats"
+            params = []
+            if date:
+                query += " WHERE date = ?"
+                params.append(date)
+            query += " GROUP BY date ORDER BY date"
+        else:
+            query = "SELECT date, cards_due, cards_studied FROM daily_stats WHERE deck_id = ?"
+            params = [bitmap_id]
+            if date:
+                query += " AND date = ?"
+                params.append(date)
+            query += " ORDER BY date"
+        return self.conn.execute(query, params).fetchall()
+    
+    def rebuild_day_bitmaps(self, deck_id=None):
+        """
+        Baut die Tages-Bitmaps eines Decks vollständig aus daily_stats neu auf
+        
+        Args:
+            deck_id: ID des Decks, ohne Deck die Summe über alle Decks
+            
+        Returns:
+            DayBitmaps: Die neu aufgebauten Bitmaps
+        """
+        bitmap_id = deck_id or ALL_DECKS_BITMAP_ID
+        rows = self._day_bitmap_source(bitmap_id)
+        bitmaps = DayBitmaps(rows[0][0] if rows else None)
+        for date, cards_due, cards_studied in rows:
+            bitmaps.set_day(date, cards_due or 0, cards_studied or 0)
+        self._store_day_bitmaps(bitmap_id, bitmaps)
+        return bitmaps
+    
+    def _update_day_bitmaps(self, date, deck_id):
+        """
+        Aktualisiert nach einer Änderung in daily_stats das Bit des Tages in den
+        Bitmaps des Decks und der Summe über alle Decks. Läuft in der Transaktion
+        von save_daily_stats; bei Fehlern werden die Bitmaps verworfen und beim
+        nächsten Lesen neu aufgebaut.
+        """
+        bitmap_ids = [ALL_DECKS_BITMAP_ID]
+        if deck_id:
+            bitmap_ids.insert(0, deck_id)
+        
+        for bitmap_id in bitmap_ids:
+            try:
+                bitmaps = self._load_day_bitmaps(bitmap_id)
+                if bitmaps is None or bitmaps.origin is None or date < bitmaps.origin:
+                    # Tage vor dem Ursprung erfordern einen Neuaufbau
+                    self.rebuild_day_bitmaps(None if bitmap_id == ALL_DECKS_BITMAP_ID else bitmap_id)
+                    continue
+                
+                rows = self._day_bitmap_source(bitmap_id, date)
+                if rows:
+                    bitmaps.set_day(date, rows[0][1] or 0, rows[0][2] or 0)
+                else:
+                    bitmaps.clear_day(date)
+                self._store_day_bitmaps(bitmap_id, bitmaps)
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Aktualisieren der Tages-Bitmaps für Deck {bitmap_id}: {e}")
+                try:
+                    self.conn.execute("DELETE FROM day_bitmaps WHERE deck_id = ?", (bitmap_id,))
+                except Exception:
+                    pass
+    
+    def _ensure_day_bitmap_rules(self):
+        """
+        Verwirft die gespeicherten Tages-Bitmaps, wenn sie mit anderen Level-Regeln
+        (Tagesziel) aufgebaut wurden; sie werden beim nächsten Lesen neu aufgebaut
+        """
+        signature = get_level_rules().day_signature
+        if self._day_bitmap_rules == signature:
+            return
+        # Ohne gespeicherte Signatur wurden die Bitmaps mit den Standardregeln aufgebaut
+        stored = self.get_setting('day_bitmap_rules', LevelRules().day_signature)
+        if stored != signature:
+            with self.conn:
+                self.conn.execute("DELETE FROM day_bitmaps")
+                self.conn.execute("""
+                    INSERT OR REPLACE INTO settings (key, value)
+                    VALUES ('day_bitmap_rules', ?)
+                """, (signature,))
+            if self.settings_cache:
+                self.settings_cache.set('day_bitmap_rules', signature)
+            print("Study Tracker: Level-Regeln geändert, Tages-Bitmaps werden neu aufgebaut")
+        self._day_bitmap_rules = signature
+    
+    def get_day_bitmaps(self, deck_id=None):
+        """
+        Liefert die Tages-Bitmaps eines Decks und baut sie bei Bedarf auf
+        
+        Args:
+            deck_id: ID des Decks, ohne Deck (oder 0) die Summe über alle Decks
+                     wie bei get_daily_stats
+            
+        Returns:
+            DayBitmaps: Bitmaps für Datenvorhandensein, Lernerfolg und verfehlte Tage
+        """
+        bitmap_id = deck_id or ALL_DECKS_BITMAP_ID
+        try:
+            self._ensure_day_bitmap_rules()
+            bitmaps = self._load_day_bitmaps(bitmap_id)
+            if bitmaps is not None:
+                return bitmaps
+            with self.conn:
+                return self.rebuild_day_bitmaps(deck_id)
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Laden der Tages-Bitmaps: {e}")
+            return DayBitmaps()
+    
     def get_daily_stats(self, date, deck_id=None):
         """Holt die Tagesstatistik für ein Datum und optional ein Deck"""
         try:
@@ -525,18 +2179,132 @@ class Database:
             print(f"Fehler beim Abrufen der Tagesstatistik: {e}")
             return {'cards_due': 0, 'cards_studied': 0, 'study_time': 0}
     
-    def save_level_progress(self, deck_id, level, start_date):
-        """Speichert den Level-Fortschritt für ein Deck"""
-        try:
-            # Wenn deck_id None ist, verwenden wir 0 als globale Deck-ID
-            safe_deck_id = deck_id if deck_id is not None else 0
+    def get_daily_stats_range(self, start_date, end_date, deck_id=None):
+        """
+        Holt die Tagesstatistiken für einen Zeitraum mit einer einzigen Abfrage
+        
+        Args:
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            deck_id: Optional, ohne Deck wird über alle Decks summiert
+            
+        Returns:
+            dict: Datum -> Statistik-Dictionary, nur für Tage mit Einträgen
+        """
+        try:
+            if deck_id:
+                cursor = self.conn.execute(
+                    DAILY_STATS_BY_DECK_RANGE_SQL,
+                    (deck_id, day_number(start_date), day_number(end_date))
+                )
+            else:
+                cursor = self.conn.execute(
+                    DAILY_STATS_RANGE_SQL,
+                    (day_number(start_date), day_number(end_date))
+                )
+            
+            return {
+                row[0]: {
+                    'cards_due': row[1] or 0,
+                    'cards_studied': row[2] or 0,
+                    'study_time': row[3] or 0
+                }
+                for row in cursor.fetchall()
+            }
+        except Exception as e:
+            print(f"Fehler beim Abrufen der Tagesstatistiken: {e}")
+            return {}
+    
+    def _export_filter(self, table, deck_id=None, start_date=None, end_date=None, since_version=None):
+        """
+        Tagesausdruck und Bedingungen des Rohdaten-Exports für eine Tabelle
+        (siehe iter_export_rows)
+        
+        Returns:
+            tuple: (Tagesausdruck, WHERE-Klausel oder "", Parameter)
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Tabelle {table} kann nicht exportiert werden")
+        
+        day_expr = DATA_VERSION_TABLES[table].format(row="t")
+        conditions = []
+        params = []
+        
+        if deck_id:
+            conditions.append("t.deck_id = ?")
+            params.append(deck_id)
+        # Zeitraum über die Tagesnummer, auch bei Zeitstempeln (validation_codes, level_history)
+        if start_date:
+            conditions.append("t.day_num >= ?")
+            params.append(day_number(start_date))
+        if end_date:
+            conditions.append("t.day_num <= ?")
+            params.append(day_number(end_date))
+        if since_version is not None:
+            conditions.append(f"""{day_expr} IN (
+                SELECT scope FROM data_versions
+                WHERE scope NOT IN ('global', 'undated') AND version > ?
+            )""")
+            params.append(since_version)
+        
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return day_expr, where, params
+    
+    def iter_export_rows(self, table, deck_id=None, start_date=None, end_date=None, since_version=None):
+        """
+        Liest die Zeilen einer Tabelle für den Rohdaten-Export stapelweise,
+        sodass auch große Tabellen nicht vollständig in den Speicher geladen werden
+        
+        Args:
+            table: Name der Tabelle aus EXPORT_TABLES
+            deck_id: Optional, nur Zeilen dieses Decks
+            start_date: Optional, erster Tag (YYYY-MM-DD)
+            end_date: Optional, letzter Tag (YYYY-MM-DD)
+            since_version: Optional, nur Zeilen von Tagen, die sich seit dieser
+                           Datenversion geändert haben
+            
+        Returns:
+            tuple: (Spaltennamen, Generator über Zeilentupel)
+        """
+        day_expr, where, params = self._export_filter(table, deck_id, start_date, end_date, since_version)
+        
+        query = f"SELECT t.* FROM {table} AS t{where} ORDER BY {day_expr}"
+        
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        columns = [description[0] for description in cursor.description]
+        
+        def rows():
+            try:
+                while True:
+                    batch = cursor.fetchmany(EXPORT_BATCH_SIZE)
+                    if not batch:
+                        break
+                    yield from batch
+            finally:
+                cursor.close()
+        
+        return columns, rows()
+    
+    def get_export_days(self, table, deck_id=None, start_date=None, end_date=None, since_version=None):
+        """
+        Tage, für die der Rohdaten-Export mit diesen Filtern Zeilen enthält
+        
+        Returns:
+            set: Tage (YYYY-MM-DD)
+        """
+        day_expr, where, params = self._export_filter(table, deck_id, start_date, end_date, since_version)
+        cursor = self.conn.execute(f"SELECT DISTINCT {day_expr} FROM {table} AS t{where}", params)
+        return {row[0] for row in cursor.fetchall()}
+    
+    def save_level_progress(self, deck_id, level, start_date):
+        """Speichert den Level-Fortschritt für ein Deck"""
+        try:
+            # Wenn deck_id None ist, verwenden wir 0 als globale Deck-ID
+            safe_deck_id = deck_id if deck_id is not None else 0
             
             with self.conn:
-                self.conn.execute("""
-                    INSERT OR REPLACE INTO level_progress
-                    (deck_id, current_level, level_start_date, last_updated)
-                    VALUES (?, ?, ?, ?)
-                """, (
+                self.conn.execute(LEVEL_PROGRESS_UPSERT_SQL, (
                     safe_deck_id,
                     level,
                     start_date.strftime("%Y-%m-%d") if isinstance(start_date, datetime) else start_date,
@@ -585,11 +2353,10 @@ class Database:
                 # ... [existing table creation code stays the same] ...
                 
             # NEU: Prüfe, ob heute bereits ein Eintrag mit dem gleichen change_type für dieses Deck existiert
-            today = datetime.now().strftime("%Y-%m-%d")
             cursor = self.conn.execute("""
                 SELECT COUNT(*) FROM level_history
-                WHERE deck_id = ? AND change_type = ? AND change_date LIKE ?
-            """, (deck_id_int, change_type, f"{today}%"))
+                WHERE deck_id = ? AND change_type = ? AND day_num = ?
+            """, (deck_id_int, change_type, day_number(datetime.now())))
             
             count = cursor.fetchone()[0]
             if count > 0:
@@ -655,15 +2422,13 @@ class Database:
             """
             
             if start_date:
-                query += " AND change_date >= ?"
-                params.append(start_date)
+                query += " AND day_num >= ?"
+                params.append(day_number(start_date))
             
             if end_date:
-                # Ändere den end_date-Filter, um den gesamten Tag einzuschließen
-                end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
-                end_date_with_time = (end_date_obj + timedelta(days=1)).strftime("%Y-%m-%d 00:00:00")
-                query += " AND change_date <= ?"
-                params.append(end_date_with_time)
+                # Der gesamte Endtag ist eingeschlossen
+                query += " AND day_num <= ?"
+                params.append(day_number(end_date))
             
             query += " ORDER BY change_date ASC"
             
@@ -753,13 +2518,13 @@ class Database:
             bool: True on success, False on error
         """
         try:
-            # Ensure card_id is always a string
-            card_id_str = str(card_id) if card_id is not None else None
+            # Ensure card_id is always an integer (Anki card id)
+            card_id_int = normalize_card_id(card_id)
             
             # Ensure deck_id is always an integer
             deck_id_int = int(deck_id) if deck_id is not None else None
             
-            if card_id_str is None:
+            if card_id_int is None:
                 print("Study Tracker: Warning: card_id is None, validation code cannot be saved")
                 return False
             
@@ -778,13 +2543,13 @@ class Database:
                 current_date = datetime.now().strftime("%Y-%m-%d")
             
             # Create unique ID for this validation code entry
-            unique_key = f"{card_id_str}_{current_date}_{code}"
+            unique_key = f"{card_id_int}_{current_date}_{code}"
             
             # Check if an identical entry already exists
             cursor = self.conn.execute("""
                 SELECT id FROM validation_codes
                 WHERE card_id = ? AND date = ? AND code = ?
-            """, (card_id_str, current_date, code))
+            """, (card_id_int, current_date, code))
             
             result = cursor.fetchone()
             if result:
@@ -826,7 +2591,7 @@ class Database:
                         result[0]
                     ))
                     self.conn.commit()
-                    print(f"Study Tracker: Updated validation code for card {card_id_str}: {code}")
+                    print(f"Study Tracker: Updated validation code for card {card_id_int}: {code}")
                 
                 return True  # Already exists, potentially updated
                 
@@ -836,7 +2601,7 @@ class Database:
                 (card_id, deck_id, date, code, correct_percent, difficulty, page_number, chat_link, card_title, created_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (
-                card_id_str,
+                card_id_int,
                 deck_id_int,
                 current_date,
                 code,
@@ -849,7 +2614,7 @@ class Database:
             ))
             self.conn.commit()
             
-            print(f"Study Tracker: New validation code saved for card {card_id_str}: {code} with date {current_date}")
+            print(f"Study Tracker: New validation code saved for card {card_id_int}: {code} with date {current_date}")
             return True
         except Exception as e:
             print(f"Study Tracker: Error saving validation code for card {card_id}: {e}")
@@ -857,6 +2622,51 @@ class Database:
             self.handle_db_error(e)
             return False
     
+    def search_card_titles(self, query, limit=20):
+        """
+        Volltextsuche über Kartentitel. Jedes Wort der Suche muss als Wortanfang
+        im Titel vorkommen ("zell mem" findet "Zellmembran und Membranproteine").
+        
+        Args:
+            query: Suchbegriffe, durch Leerzeichen getrennt
+            limit: Maximale Anzahl der Treffer
+            
+        Returns:
+            list: Tupel (card_id, Titel), beste Treffer zuerst
+        """
+        words = re.findall(r"\w+", query or "")
+        if not words:
+            return []
+        
+        try:
+            if self.title_index_available:
+                # Wörter als Phrasen quoten, damit FTS5-Operatoren im Titel nichts auslösen
+                match = " ".join(f'"{word}"*' for word in words)
+                cursor = self.conn.execute("""
+                    SELECT rowid, title FROM card_titles_fts
+                    WHERE card_titles_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                """, (match, limit))
+                return cursor.fetchall()
+            
+            # Fallback ohne FTS5: alle Wörter als Teilstring
+            conditions = " AND ".join("card_title LIKE ?" for _ in words)
+            params = [f"%{word}%" for word in words]
+            cursor = self.conn.execute(f"""
+                SELECT card_id, MIN(card_title) FROM (
+                    SELECT card_id, card_title FROM validation_codes WHERE {conditions}
+                    UNION
+                    SELECT card_id, card_title FROM chat_links WHERE {conditions}
+                )
+                GROUP BY card_id
+                LIMIT ?
+            """, params + params + [limit])
+            return cursor.fetchall()
+        except Exception as e:
+            print(f"Fehler bei der Titelsuche nach '{query}': {e}")
+            return []
+    
     def get_card_id_by_title(self, title_fragment):
         """
         Findet eine Karten-ID anhand eines Titelteils (für Debugging und Fehlersuche)
@@ -865,8 +2675,12 @@ class Database:
             title_fragment: Teil des Titels
         
         Returns:
-            str: Karten-ID oder None, wenn nicht gefunden
+            int: Karten-ID oder None, wenn nicht gefunden
         """
+        if self.title_index_available:
+            results = self.search_card_titles(title_fragment, limit=1)
+            return results[0][0] if results else None
+        
         try:
             cursor = self.conn.execute("""
                 SELECT card_id FROM validation_codes 
@@ -910,15 +2724,15 @@ class Database:
             
             if card_id:
                 query += " AND card_id = ?"
-                params.append(str(card_id))
+                params.append(normalize_card_id(card_id))
             
             if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
+                query += " AND day_num >= ?"
+                params.append(day_number(start_date))
             
             if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
+                query += " AND day_num <= ?"
+                params.append(day_number(end_date))
             
             query += " ORDER BY date ASC"
             
@@ -940,10 +2754,10 @@ class Database:
     def save_chat_link(self, card_id, link, deck_id=None, card_title=None):
         """Speichert einen ChatGPT-Link für eine Karte mit robuster URL-Formatierung"""
         try:
-            # Stelle sicher, dass card_id immer ein String ist
-            card_id_str = str(card_id) if card_id is not None else None
+            # Stelle sicher, dass card_id immer ein Integer (Anki-Karten-ID) ist
+            card_id_int = normalize_card_id(card_id)
             
-            if card_id_str is None:
+            if card_id_int is None:
                 print("Study Tracker: Warnung: card_id ist None, ChatGPT-Link kann nicht gespeichert werden")
                 return False
             
@@ -960,15 +2774,21 @@ class Database:
                 if not link.startswith(('http://', 'https://')):
                     link = 'https://' + link
                     
-            print(f"Study Tracker: Speichere ChatGPT-Link: {link} für Karte {card_id_str}")
+            print(f"Study Tracker: Speichere ChatGPT-Link: {link} für Karte {card_id_int}")
             
             with self.conn:
+                # Upsert statt REPLACE, damit unveränderte Links keine neue Datenversion erzeugen
                 self.conn.execute("""
-                    INSERT OR REPLACE INTO chat_links
+                    INSERT INTO chat_links
                     (card_id, deck_id, link, card_title, updated_at)
                     VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(card_id) DO UPDATE SET
+                        deck_id = excluded.deck_id,
+                        link = excluded.link,
+                        card_title = excluded.card_title,
+                        updated_at = excluded.updated_at
                 """, (
-                    card_id_str,
+                    card_id_int,
                     deck_id,
                     link,
                     card_title,
@@ -976,7 +2796,7 @@ class Database:
                 ))
                 
                 # Verifiziere den gespeicherten Link
-                cursor = self.conn.execute("SELECT link FROM chat_links WHERE card_id = ?", (card_id_str,))
+                cursor = self.conn.execute("SELECT link FROM chat_links WHERE card_id = ?", (card_id_int,))
                 saved_link = cursor.fetchone()
                 if saved_link:
                     print(f"Study Tracker: Link erfolgreich gespeichert: {saved_link[0]}")
@@ -990,16 +2810,16 @@ class Database:
     def get_chat_link(self, card_id):
         """Holt den ChatGPT-Link für eine Karte mit robuster ID-Konvertierung"""
         try:
-            # Stelle sicher, dass card_id immer ein String ist
-            card_id_str = str(card_id) if card_id is not None else None
+            # Stelle sicher, dass card_id immer ein Integer (Anki-Karten-ID) ist
+            card_id_int = normalize_card_id(card_id)
             
-            if card_id_str is None:
+            if card_id_int is None:
                 return None
                 
             cursor = self.conn.execute("""
                 SELECT link FROM chat_links
                 WHERE card_id = ?
-            """, (card_id_str,))
+            """, (card_id_int,))
             result = cursor.fetchone()
             return result[0] if result else None
         except Exception as e:
@@ -1014,7 +2834,7 @@ class Database:
                     INSERT OR REPLACE INTO studied_cards
                     (date, card_id, deck_id, review_time)
                     VALUES (?, ?, ?, ?)
-                """, (date, str(card_id), deck_id, review_time))
+                """, (date, normalize_card_id(card_id), deck_id, review_time))
             return True
         except Exception as e:
             print(f"Fehler beim Speichern der gelernten Karte: {e}")
@@ -1041,17 +2861,109 @@ class Database:
             print(f"Fehler beim Abrufen der gelernten Karten: {e}")
             return []
     
-    def export_backup(self, backup_path, password=None):
-        """Erstellt ein Backup der Datenbank"""
+    def get_studied_card_totals(self, deck_id, start_date, end_date):
+        """
+        Kennzahlen der gelernten Karten eines Zeitraums aus den Einzeleinträgen und,
+        für bereits verdichtete Zeiträume, aus studied_cards_summary
+        
+        Args:
+            deck_id: ID des Decks (None = alle Decks)
+            start_date: Erster Tag (YYYY-MM-DD)
+            end_date: Letzter Tag (YYYY-MM-DD)
+            
+        Returns:
+            dict: distinct_cards, review_count, review_time und approximate (True, wenn
+                  Zusammenfassungen beteiligt sind: Karten zählen dann je Woche/Monat einmal,
+                  angeschnittene Zeiträume vollständig)
+        """
+        totals = {'distinct_cards': 0, 'review_count': 0, 'review_time': 0, 'approximate': False}
+        try:
+            start_day, end_day = day_number(start_date), day_number(end_date)
+            deck_filter = "" if deck_id is None else "deck_id = ? AND "
+            deck_params = [] if deck_id is None else [deck_id]
+            
+            cursor = self.conn.execute(f"""
+                SELECT COUNT(DISTINCT card_id), COUNT(*), COALESCE(SUM(review_time), 0)
+                FROM studied_cards
+                WHERE {deck_filter}day_num BETWEEN ? AND ?
+            """, deck_params + [start_day, end_day])
+            distinct_cards, review_count, review_time = cursor.fetchone()
+            
+            cursor = self.conn.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(distinct_cards), 0), COALESCE(SUM(review_count), 0),
+                       COALESCE(SUM(review_time), 0)
+                FROM studied_cards_summary
+                WHERE {deck_filter}start_day <= ? AND end_day >= ?
+            """, deck_params + [end_day, start_day])
+            periods, summary_cards, summary_count, summary_time = cursor.fetchone()
+            
+            totals.update({
+                'distinct_cards': distinct_cards + summary_cards,
+                'review_count': review_count + summary_count,
+                'review_time': review_time + summary_time,
+                'approximate': periods > 0
+            })
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der Kartenkennzahlen: {e}")
+        return totals
+    
+    def get_studied_card_summaries(self, deck_id=None, start_date=None, end_date=None):
+        """
+        Zusammenfassungen verdichteter gelernter Karten (siehe StudiedCardsCompactor),
+        die den Zeitraum berühren. Für ihre Tage gibt es keine Einzeleinträge mehr.
+        
+        Args:
+            deck_id: Optional, nur Zusammenfassungen dieses Decks
+            start_date: Optional, erster Tag (YYYY-MM-DD)
+            end_date: Optional, letzter Tag (YYYY-MM-DD)
+            
+        Returns:
+            list: Dictionaries mit deck_id, period_start, period_end, distinct_cards,
+                  review_count und review_time, nach Zeitraum sortiert
+        """
+        conditions, params = [], []
+        if deck_id is not None:
+            conditions.append("deck_id = ?")
+            params.append(deck_id)
+        if start_date:
+            conditions.append("end_day >= ?")
+            params.append(day_number(start_date))
+        if end_date:
+            conditions.append("start_day <= ?")
+            params.append(day_number(end_date))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        try:
+            cursor = self.conn.execute(f"""
+                SELECT deck_id, period_start, period_end, distinct_cards, review_count, review_time
+                FROM studied_cards_summary
+                {where}
+                ORDER BY start_day, deck_id
+            """, params)
+            columns = ('deck_id', 'period_start', 'period_end', 'distinct_cards', 'review_count', 'review_time')
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der verdichteten Karten: {e}")
+            return []
+    
+    def export_backup(self, backup_path, password=None, progress_callback=None, cancel_token=None):
+        """
+        Erstellt ein Backup der Datenbank (schrittweise, siehe copy_database)
+        
+        Args:
+            backup_path: Zieldatei
+            password: Optional, Passwort für die Verschlüsselung
+            progress_callback: Optional, wird mit dem Fortschritt in Prozent aufgerufen
+            cancel_token: Optional, CancelToken zum Abbrechen
+        """
         try:
-            os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-            with sqlite3.connect(backup_path) as backup_db:
-                self.conn.backup(backup_db)
+            copy_database(self.conn, backup_path, progress_callback, cancel_token)
                 
             if password:
                 if not self._encrypt_file(backup_path, password):
                     return False
             return True
+        except OperationCancelledError:
+            raise
         except Exception as e:
             print(f"Backup fehlgeschlagen: {e}")
             self.handle_db_error(e)
@@ -1060,56 +2972,103 @@ class Database:
     def import_backup(self, backup_path, password=None):
         """Importiert ein Backup"""
         try:
+            # Datenstand vor dem Import, damit der Versionszähler nicht zurückspringt
+            previous_version = self.get_data_version() or 0
+            previous_scopes = [row[0] for row in self.conn.execute("SELECT scope FROM data_versions")]
+            
             if password:
-                # Erstelle temporäre Kopie für Entschlüsselung
+                # Direkt in eine temporäre Datei entschlüsseln
                 temp_path = backup_path + '.temp'
-                shutil.copy2(backup_path, temp_path)
-                
-                if not self._decrypt_file(temp_path, password):
-                    os.remove(temp_path)
+                if not self._decrypt_file(backup_path, password, temp_path):
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
                     return False
                     
                 # Importiere entschlüsselte Datei
-                with sqlite3.connect(temp_path) as backup_db:
+                backup_db = sqlite3.connect(temp_path)
+                try:
                     backup_db.backup(self.conn)
+                finally:
+                    backup_db.close()
                     
                 os.remove(temp_path)
             else:
                 with sqlite3.connect(backup_path) as backup_db:
                     backup_db.backup(self.conn)
+            
+            # Tages-Bitmaps aus dem Backup werden beim nächsten Zugriff neu aufgebaut
+            self.create_tables()
+            # Ältere Backups auf das aktuelle Schema bringen
+            migrate_database(self)
+            self.ensure_day_number_columns()
+            self.ensure_optimized_indices()
+            self.ensure_data_version_triggers()
+            self._advance_data_versions_after_import(previous_version, previous_scopes)
+            with self.conn:
+                self.conn.execute("DELETE FROM day_bitmaps")
+            # Kompetenz-Aggregate und Titelindex passend zu den importierten Daten neu berechnen
+            self.ensure_competency_aggregates(rebuild=True)
+            self.ensure_title_index(rebuild=True)
+            # Einstellungen stammen jetzt aus dem Backup
+            if self.settings_cache:
+                self.settings_cache.load(self.conn)
             return True
         except Exception as e:
             print(f"Import fehlgeschlagen: {e}")
             self.handle_db_error(e)
             return False
     
+    def _advance_data_versions_after_import(self, previous_version, previous_scopes):
+        """
+        Der Zähler aus dem Backup kann kleiner sein als der bisherige. Damit keine
+        zuvor verwendete Version (Cache-Schlüssel, Export-Watermarks) mit anderen
+        Daten wiederkehrt, erhalten alle Tage von vor und nach dem Import sowie
+        'undated' eine neue, höhere Version als beide Stände.
+        """
+        new_version = max(previous_version, self.get_data_version() or 0) + 1
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO data_versions (scope, version) VALUES (?, 0)",
+                [(scope,) for scope in previous_scopes + ['global', 'undated']]
+            )
+            self.conn.execute("UPDATE data_versions SET version = ?", (new_version,))
+        report_data_cache.invalidate()
+    
     def _encrypt_file(self, file_path, password):
-        """Verschlüsselt eine Datei mit einem Passwort"""
+        """Verschlüsselt eine Datei mit einem Passwort (blockweise, siehe BackupCipher)"""
+        temp_path = file_path + '.enc'
         try:
-            # Erstelle einen Hash des Passworts
-            key = hashlib.sha256(password.encode()).digest()
-            
-            # Lese die Original-Datei
-            with open(file_path, 'rb') as f:
-                data = f.read()
-            
-            # Verschlüssele die Daten (einfache XOR-Verschlüsselung)
-            encrypted_data = bytearray()
-            for i in range(len(data)):
-                encrypted_data.append(data[i] ^ key[i % len(key)])
-            
-            # Speichere die verschlüsselten Daten
-            with open(file_path, 'wb') as f:
-                f.write(encrypted_data)
+            with open(file_path, 'rb') as source, open(temp_path, 'wb') as target:
+                BackupCipher(password).encrypt(source, target)
+            os.replace(temp_path, file_path)
             return True
         except Exception as e:
             print(f"Verschlüsselung fehlgeschlagen: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
             return False
     
-    def _decrypt_file(self, file_path, password):
-        """Entschlüsselt eine Datei mit einem Passwort"""
-        # Bei XOR ist Entschlüsselung gleich Verschlüsselung
-        return self._encrypt_file(file_path, password)
+    def _decrypt_file(self, file_path, password, target_path=None):
+        """
+        Entschlüsselt eine Datei mit einem Passwort (auch Backups im alten XOR-Format)
+        
+        Args:
+            file_path: Verschlüsselte Datei
+            password: Passwort
+            target_path: Optional, Zieldatei; ohne Angabe wird file_path ersetzt
+        """
+        output_path = target_path or file_path + '.dec'
+        try:
+            with open(file_path, 'rb') as source, open(output_path, 'wb') as target:
+                BackupCipher(password).decrypt(source, target)
+            if not target_path:
+                os.replace(output_path, file_path)
+            return True
+        except Exception as e:
+            print(f"Entschlüsselung fehlgeschlagen: {e}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            return False
 
     def get_chat_links_by_deck(self, deck_id, start_date=None, end_date=None):
         """Holt alle ChatGPT-Links für ein bestimmtes Deck"""
@@ -1146,7 +3105,7 @@ class Database:
                 WHERE card_id = ?
                 ORDER BY updated_at DESC
                 LIMIT 1
-            """, (str(card_id),))
+            """, (normalize_card_id(card_id),))
             result = cursor.fetchone()
             
             if result and result[0]:
@@ -1158,7 +3117,7 @@ class Database:
                 WHERE card_id = ? AND chat_link IS NOT NULL AND chat_link != ''
                 ORDER BY created_at DESC
                 LIMIT 1
-            """, (str(card_id),))
+            """, (normalize_card_id(card_id),))
             result = cursor.fetchone()
             
             return result[0] if result and result[0] else None
@@ -1183,12 +3142,12 @@ class Database:
             if not card_id:
                 return []
             
-            # Konvertiere card_id immer zu String für konsistente Vergleiche
-            card_id_str = str(card_id)
+            # Konvertiere card_id immer zu Integer für konsistente Vergleiche
+            card_id_int = normalize_card_id(card_id)
             
-            print(f"Study Tracker: Suche Validierungscodes für Karte {card_id_str}")
+            print(f"Study Tracker: Suche Validierungscodes für Karte {card_id_int}")
             
-            params = [card_id_str]
+            params = [card_id_int]
             query = """
                 SELECT date, code, correct_percent, difficulty, page_number, chat_link, card_id, card_title
                 FROM validation_codes
@@ -1196,12 +3155,12 @@ class Database:
             """
             
             if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
+                query += " AND day_num >= ?"
+                params.append(day_number(start_date))
             
             if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
+                query += " AND day_num <= ?"
+                params.append(day_number(end_date))
             
             query += " ORDER BY date ASC"
             
@@ -1210,7 +3169,7 @@ class Database:
             cursor = self.conn.execute(query, params)
             results = cursor.fetchall()
             
-            print(f"Study Tracker: Gefunden: {len(results)} Validierungscodes für Karte {card_id_str}")
+            print(f"Study Tracker: Gefunden: {len(results)} Validierungscodes für Karte {card_id_int}")
             
             # Für detaillierte Debugging: Zeige die ersten 3 Ergebnisse
             for i, result in enumerate(results[:3]):
@@ -1253,7 +3212,7 @@ class Database:
                     SELECT card_title FROM chat_links WHERE card_id = ? AND card_title IS NOT NULL
                     LIMIT 1
                 """
-                cursor = self.conn.execute(title_query, (str(card_id), str(card_id)))
+                cursor = self.conn.execute(title_query, (card_id, card_id))
                 title_result = cursor.fetchone()
                 
                 card_title = title_result[0] if title_result else "Unbekannte Karte"
@@ -1282,7 +3241,7 @@ class Database:
                 WHERE id NOT IN (
                     SELECT MIN(id)
                     FROM level_history
-                    GROUP BY date(change_date), deck_id, change_type
+                    GROUP BY day_num, deck_id, change_type
                 )
             """)
             
@@ -1308,7 +3267,7 @@ class Database:
             new_deck_id: Neue Deck-ID
         """
         try:
-            card_id_str = str(card_id)
+            card_id_int = normalize_card_id(card_id)
             
             # Hole aktuelle Deck-ID aus der Datenbank
             cursor = self.conn.execute("""
@@ -1318,7 +3277,7 @@ class Database:
                 UNION
                 SELECT deck_id FROM studied_cards WHERE card_id = ?
                 LIMIT 1
-            """, (card_id_str, card_id_str, card_id_str))
+            """, (card_id_int, card_id_int, card_id_int))
             
             current_deck_id = None
             result = cursor.fetchone()
@@ -1336,23 +3295,23 @@ class Database:
                     UPDATE validation_codes
                     SET deck_id = ?
                     WHERE card_id = ?
-                """, (new_deck_id, card_id_str)).rowcount
+                """, (new_deck_id, card_id_int)).rowcount
                 
                 # ChatGPT-Links aktualisieren
                 updated_links = self.conn.execute("""
                     UPDATE chat_links
                     SET deck_id = ?
                     WHERE card_id = ?
-                """, (new_deck_id, card_id_str)).rowcount
+                """, (new_deck_id, card_id_int)).rowcount
                 
                 # Gelernte Karten aktualisieren
                 updated_studied = self.conn.execute("""
                     UPDATE studied_cards
                     SET deck_id = ?
                     WHERE card_id = ?
-                """, (new_deck_id, card_id_str)).rowcount
+                """, (new_deck_id, card_id_int)).rowcount
             
-            print(f"Study Tracker: Karte {card_id_str} wurde verschoben: {current_deck_id} -> {new_deck_id}")
+            print(f"Study Tracker: Karte {card_id_int} wurde verschoben: {current_deck_id} -> {new_deck_id}")
             print(f"Aktualisiert: {updated_validation} Validierungscodes, {updated_links} ChatGPT-Links, {updated_studied} Lerneinträge")
             return True
         except Exception as e:
@@ -1360,85 +3319,76 @@ class Database:
             traceback.print_exc()
             return False
 
-    def efficient_card_tracking(self):
+    def get_tracking_card_ids(self):
+        """
+        Karten, deren Deck und Titel vor einer Berichterstellung mit Anki abgeglichen
+        werden: kürzlich gelernte Karten und Karten mit Validierungscodes
+        """
+        # Priorisiere kürzlich gelernte Karten für das Tracking
+        cursor = self.conn.execute("""
+            SELECT DISTINCT card_id FROM studied_cards 
+            WHERE date >= date('now', '-90 days')
+            LIMIT 100
+        """)
+        
+        recent_card_ids = [row[0] for row in cursor.fetchall()]
+        
+        # Füge wichtige Karten mit Validierungscodes hinzu
+        cursor = self.conn.execute("""
+            SELECT DISTINCT card_id FROM validation_codes
+            LIMIT 100
+        """)
+        
+        validation_card_ids = [row[0] for row in cursor.fetchall()]
+        
+        # Kombiniere die Listen und entferne Duplikate
+        return list(set(recent_card_ids + validation_card_ids))
+
+    def efficient_card_tracking(self, cards=None):
         """
         Effiziente Methode zum Tracking verschobener Karten.
         Optimiert für die regelmäßige Verschiebung weniger Karten.
         Wird vor der Berichterstellung aufgerufen, um sicherzustellen, 
         dass die Deck-Zuordnungen korrekt sind.
+        
+        Args:
+            cards: Optional, card_id -> (deck_id, Titel) aus einem CollectionSnapshot.
+                   Ohne Angabe wird die Sammlung gelesen (nur im Hauptthread).
         """
-        if not mw or not mw.col:
+        if cards is None and not collection_accessible():
             print("Study Tracker: Anki-Sammlung nicht verfügbar")
             return False
             
         try:
             print("Study Tracker: Starte effizientes Karten-Tracking")
             
-            # Priorisiere kürzlich gelernte Karten für das Tracking
-            cursor = self.conn.execute("""
-                SELECT DISTINCT card_id FROM studied_cards 
-                WHERE date >= date('now', '-90 days')
-                LIMIT 100
-            """)
-            
-            recent_card_ids = [row[0] for row in cursor.fetchall()]
-            
-            # Füge wichtige Karten mit Validierungscodes hinzu
-            cursor = self.conn.execute("""
-                SELECT DISTINCT card_id FROM validation_codes
-                LIMIT 100
-            """)
-            
-            validation_card_ids = [row[0] for row in cursor.fetchall()]
+            if cards is None:
+                cards = CollectionSnapshot.read_cards(self.get_tracking_card_ids())
             
-            # Kombiniere die Listen und entferne Duplikate
-            all_card_ids = list(set(recent_card_ids + validation_card_ids))
+            print(f"Study Tracker: Überprüfe {len(cards)} wichtige Karten")
             
-            print(f"Study Tracker: Überprüfe {len(all_card_ids)} wichtige Karten")
-            
-            # Verfolge jede Karte in Anki
+            # Übernimm Deck und Titel jeder Karte aus Anki
             updated_count = 0
-            for card_id in all_card_ids:
+            for card_id, (card_deck_id, title) in cards.items():
                 try:
-                    card = mw.col.get_card(int(card_id))
-                    if card:
-                        # Aktualisiere Deck-ID in der Datenbank
-                        if self.update_card_deck(card_id, card.did):
-                            updated_count += 1
-                            
-                        # Hole den aktuellen Kartentitel und aktualisiere ihn in der Datenbank
-                        note = card.note()
-                        title = None
-                        
-                        # Versuche Vorderseite oder ähnliche Felder
-                        for field in ['Vorderseite', 'Front', 'Question', 'Frage']:
-                            if field in note:
-                                title = note[field]
-                                break
-                        
-                        # Fallback: Erstes Feld
-                        if not title and note.keys():
-                            title = note[note.keys()[0]]
-                        
-                        if title:
-                            # Bereinige und kürze den Titel
-                            title = clean_html(title)
-                            if len(title) > 50:
-                                title = title[:47] + "..."
+                    # Aktualisiere Deck-ID in der Datenbank
+                    if self.update_card_deck(card_id, card_deck_id):
+                        updated_count += 1
+                    
+                    if title:
+                        # Aktualisiere den Titel in der Datenbank
+                        with self.conn:
+                            self.conn.execute("""
+                                UPDATE validation_codes
+                                SET card_title = ?
+                                WHERE card_id = ?
+                            """, (title, card_id))
                             
-                            # Aktualisiere den Titel in der Datenbank
-                            with self.conn:
-                                self.conn.execute("""
-                                    UPDATE validation_codes
-                                    SET card_title = ?
-                                    WHERE card_id = ?
-                                """, (title, card_id))
-                                
-                                self.conn.execute("""
-                                    UPDATE chat_links
-                                    SET card_title = ?
-                                    WHERE card_id = ?
-                                """, (title, card_id))
+                            self.conn.execute("""
+                                UPDATE chat_links
+                                SET card_title = ?
+                                WHERE card_id = ?
+                            """, (title, card_id))
                 except Exception as e:
                     print(f"Study Tracker: Fehler beim Tracking der Karte {card_id}: {e}")
                     continue
@@ -1483,7 +3433,7 @@ class Database:
             traceback.print_exc()
             return False
 
-    def prepare_for_report(self, deck_id, start_date, end_date):
+    def prepare_for_report(self, deck_id, start_date, end_date, shared=True, collection=None):
         """
         Bereitet die Datenbank für die Berichterstellung vor.
         Diese Methode sorgt dafür, dass die Berichtsdaten korrekt sind.
@@ -1492,12 +3442,47 @@ class Database:
             deck_id: ID des Decks für den Bericht
             start_date: Startdatum im Format YYYY-MM-DD
             end_date: Enddatum im Format YYYY-MM-DD
+            shared: Bei False werden die deckübergreifenden Schritte übersprungen,
+                    weil sie bereits über prepare_shared_report_data erfolgt sind
+            collection: Optional, CollectionSnapshot für die Vorbereitung im Hintergrund
         """
         try:
             print(f"Study Tracker: Bereite Daten für Bericht vor (Deck {deck_id}, {start_date} bis {end_date})")
             
+            # 1.-3. Deckübergreifende Vorbereitung
+            if shared and not self.prepare_shared_report_data(collection):
+                return False
+            
+            # 4. Aktualisiere fehlende Deck-IDs für den gewählten Zeitraum
+            self.conn.execute("""
+                UPDATE validation_codes
+                SET deck_id = ?
+                WHERE deck_id IS NULL AND day_num BETWEEN ? AND ?
+            """, (deck_id, day_number(start_date), day_number(end_date)))
+            
+            self.conn.commit()
+            print("Study Tracker: Berichtsvorbereitung abgeschlossen")
+            return True
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Berichtsvorbereitung: {e}")
+            traceback.print_exc()
+            return False  
+    
+    def prepare_shared_report_data(self, collection=None):
+        """
+        Führt die deckübergreifenden Schritte der Berichtsvorbereitung aus.
+        Bei Sammelberichten genügt ein Aufruf für alle Decks.
+        
+        Args:
+            collection: Optional, CollectionSnapshot; im Hintergrundthread
+                        werden Deck und Titel der Karten daraus übernommen
+        
+        Returns:
+            bool: True bei Erfolg
+        """
+        try:
             # 1. Tracking verschobener Karten
-            self.efficient_card_tracking()
+            self.efficient_card_tracking(collection.cards if collection is not None else None)
             
             # 2. Aktualisiere ChatGPT-Links für Validierungscodes
             self.update_all_validation_code_links()
@@ -1517,29 +3502,191 @@ class Database:
                 AND (v.card_title IS NULL OR v.card_title = '' OR v.card_title LIKE 'Karte %')
             """)
             
-            # 4. Aktualisiere fehlende Deck-IDs für den gewählten Zeitraum
-            self.conn.execute("""
-                UPDATE validation_codes
-                SET deck_id = ?
-                WHERE deck_id IS NULL AND date BETWEEN ? AND ?
-            """, (deck_id, start_date, end_date))
-            
             self.conn.commit()
-            print("Study Tracker: Berichtsvorbereitung abgeschlossen")
             return True
         except Exception as e:
-            print(f"Study Tracker: Fehler bei der Berichtsvorbereitung: {e}")
+            print(f"Study Tracker: Fehler bei der gemeinsamen Berichtsvorbereitung: {e}")
             traceback.print_exc()
-            return False  
+            return False
+    
+    def get_tracked_deck_ids(self):
+        """
+        Liefert alle Decks, für die Tagesstatistiken gespeichert sind
+        
+        Returns:
+            list: Deck-IDs in aufsteigender Reihenfolge
+        """
+        try:
+            cursor = self.conn.execute("""
+                SELECT DISTINCT deck_id FROM daily_stats
+                WHERE deck_id IS NOT NULL
+                ORDER BY deck_id
+            """)
+            return [row[0] for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der Decks: {e}")
+            return []
+
+class LevelRules:
+    """
+    Kompilierte Regeln des Levelsystems
+
+    Die Regeln stehen unter "levelRules" in der Add-on-Konfiguration und werden
+    einmal in Schwellwerte und eine Ereignistabelle über die 7-Bit-Fenster
+    (bzw. periodDays-Bit-Fenster) der verfehlten Tage übersetzt. Levelsystem,
+    Neuberechnung, Heatmap und Berichte verwenden dieselbe Instanz.
+    """
+    MAX_PERIOD_DAYS = 14
+
+    def __init__(self, config=None):
+        values = dict(DEFAULT_LEVEL_RULES)
+        values.update(config or {})
+
+        self.calendar_weeks = bool(values['calendarWeeks'])
+        # Kalenderwochen laufen immer von Montag bis Sonntag
+        self.period_days = 7 if self.calendar_weeks else int(values['periodDays'])
+        self.required_days = int(values['requiredDays'])
+        self.due_share = float(values['dueShare'])
+        self.min_cards = int(values['minCardsStudied'])
+        self.cooldown_days = int(values['cooldownDays'])
+
+        if not 1 <= self.period_days <= self.MAX_PERIOD_DAYS:
+            raise ValueError(f"periodDays muss zwischen 1 und {self.MAX_PERIOD_DAYS} liegen")
+        if not 1 <= self.required_days <= self.period_days:
+            raise ValueError("requiredDays muss zwischen 1 und periodDays liegen")
+        if not 0 < self.due_share <= 1:
+            raise ValueError("dueShare muss größer als 0 und höchstens 1 sein")
+        if self.min_cards < 0 or self.cooldown_days < 0:
+            raise ValueError("minCardsStudied und cooldownDays dürfen nicht negativ sein")
+
+        self.allowed_misses = self.period_days - self.required_days
+        self.window_mask = (1 << self.period_days) - 1
+        self.events = self._build_event_table()
+        # Nur diese Werte bestimmen, welche Tage als verfehlt gelten (siehe day_bitmaps)
+        self.day_signature = json.dumps([self.due_share, self.min_cards])
+
+    def _build_event_table(self):
+        """
+        Tabelliert für jedes Fenster der missed-Bits die Position des Tages,
+        an dem das Ziel erreicht bzw. nicht mehr erreichbar ist (jeweils oder None)
+        """
+        table = []
+        for window in range(1 << self.period_days):
+            successes = misses = 0
+            completed_at = failed_at = None
+            for position in range(self.period_days):
+                if (window >> position) & 1:
+                    misses += 1
+                    if misses == self.allowed_misses + 1 and failed_at is None:
+                        failed_at = position
+                else:
+                    successes += 1
+                    if successes == self.required_days and completed_at is None:
+                        completed_at = position
+            table.append((completed_at, failed_at))
+        return table
+
+    def required_cards(self, cards_due):
+        """Anzahl der Karten, die an einem Tag gelernt werden müssen"""
+        if cards_due > 0:
+            return max(self.min_cards, math.ceil(cards_due * self.due_share - 1e-9))
+        return self.min_cards
+
+    def is_missed(self, cards_due, cards_studied):
+        """Prüft, ob das Tagesziel verfehlt wurde (Tage ohne Anforderung zählen als erreicht)"""
+        return cards_studied < self.required_cards(cards_due)
+
+    def is_successful(self, cards_due, cards_studied):
+        """Erfolgreicher Lerntag für Berichte: fällige Karten vorhanden und Ziel erreicht"""
+        return cards_due > 0 and not self.is_missed(cards_due, cards_studied)
+
+    def current_period_start(self, date):
+        """Beginn des Abschnitts, der am Datum beginnt bzw. (Kalenderwochen) läuft"""
+        if self.calendar_weeks:
+            return date - timedelta(days=date.weekday())
+        return date
+
+    def next_period_start(self, date):
+        """Frühester Abschnittsbeginn am oder nach dem Datum"""
+        if self.calendar_weeks:
+            return date + timedelta(days=(7 - date.weekday()) % 7)
+        return date
+
+
+_level_rules = None
+
+
+def load_addon_config():
+    """
+    Liest die Add-on-Konfiguration
+
+    Returns:
+        dict: Die Konfiguration, leer wenn sie nicht gelesen werden kann
+    """
+    config = None
+    try:
+        if mw is not None and getattr(mw, 'addonManager', None):
+            config = mw.addonManager.getConfig(__name__)
+    except Exception as e:
+        print(f"Study Tracker: Konnte Add-on-Konfiguration nicht lesen: {e}")
+
+    if config is None:
+        # Außerhalb von Anki (z.B. in Hintergrund-Threads ohne mw) direkt aus der Datei
+        try:
+            with open(os.path.join(ADDON_PATH, "config.json"), encoding="utf-8") as f:
+                config = json.load(f)
+        except Exception:
+            config = {}
+    return config
+
+
+def load_level_rules():
+    """
+    Liest die Level-Regeln aus der Add-on-Konfiguration und kompiliert sie
+
+    Returns:
+        LevelRules: Die kompilierten Regeln, bei ungültiger Konfiguration die Standardregeln
+    """
+    config = load_addon_config()
+    try:
+        return LevelRules(config.get('levelRules'))
+    except (TypeError, ValueError, KeyError) as e:
+        print(f"Study Tracker: Ungültige Level-Regeln in der Konfiguration ({e}), verwende Standardregeln")
+        return LevelRules()
+
+
+def get_level_rules():
+    """Liefert die kompilierten Level-Regeln (werden nur einmal geladen)"""
+    global _level_rules
+    if _level_rules is None:
+        _level_rules = load_level_rules()
+    return _level_rules
+
+
+def on_config_updated(config):
+    """Kompiliert die Level-Regeln nach einer Konfigurationsänderung neu"""
+    global _level_rules
+    try:
+        _level_rules = LevelRules(config.get('levelRules'))
+    except (TypeError, ValueError, KeyError) as e:
+        print(f"Study Tracker: Ungültige Level-Regeln in der Konfiguration ({e}), verwende Standardregeln")
+        _level_rules = LevelRules()
+    
+    widget = getattr(mw, 'study_tracker_widget', None) if mw else None
+    if widget:
+        widget.update_stats_and_heatmap()
+
 
 class LevelSystem:
-    """Implementierung des Levelsystems basierend auf 7-Tage-Abschnitten"""
+    """Implementierung des Levelsystems basierend auf Abschnitten (standardmäßig 7 Tage, siehe LevelRules)"""
     
     def __init__(self, db, deck_id=None):
         self.db = db
         self.deck_id = deck_id if deck_id is not None else 0
         self.current_level = 1
-        self.period_start_date = datetime.now().date()
+        self.period_start_date = get_level_rules().current_period_start(datetime.now().date())
+        # Zwischengespeicherte Tagesergebnisse des aktuellen Abschnitts
+        self._period_view = None
         self.load_progress()
     
     def load_progress(self):
@@ -1556,177 +3703,120 @@ class LevelSystem:
                 self.period_start_date
             )
     
-    def check_daily_goal(self, date=None):
-        """Überprüft, ob das tägliche Lernziel erreicht wurde"""
-        if not date:
-            date = datetime.now().strftime("%Y-%m-%d")
+    def get_period_view(self):
+        """
+        Liefert die Tagesergebnisse des aktuellen Abschnitts bis heute
         
-        stats = self.db.get_daily_stats(date, self.deck_id)
-        cards_due = stats['cards_due']
-        cards_studied = stats['cards_studied']
+        Das Ergebnis wird zwischengespeichert und nur neu gelesen, wenn der
+        Abschnitt wechselt, ein neuer Tag beginnt oder sich die Daten eines
+        Abschnittstags (z.B. die heutige Statistik) geändert haben.
         
-        # Ziel erreicht, wenn keine Karten fällig waren oder alle fälligen Karten gelernt wurden
-        if cards_due == 0 or (cards_due > 0 and cards_studied >= cards_due):
-            return True
-        return False
-    
-    def count_successful_days(self):
-        """Zählt erfolgreiche Lerntage im aktuellen 7-Tage-Abschnitt"""
+        Returns:
+            dict: start, end, missed (Liste von bool je Tag ab start) und
+                  successful_days, oder None, wenn der Abschnitt noch nicht begonnen hat
+        """
         if not self.period_start_date:
-            return 0
+            return None
+        
+        rules = get_level_rules()
+        today = datetime.now().date()
+        period_end = min(self.period_start_date + timedelta(days=rules.period_days - 1), today)
+        if period_end < self.period_start_date:
+            return None
         
-        period_end = self.period_start_date + timedelta(days=6)
-        current_date = self.period_start_date
-        successful_days = 0
+        version = self.db.get_data_version(
+            self.period_start_date.strftime("%Y-%m-%d"),
+            today.strftime("%Y-%m-%d")
+        )
+        key = (self.period_start_date, today, rules)
+        view = self._period_view
+        if view and view['key'] == key and version is not None and view['version'] == version:
+            return view
+        
+        bitmaps = self.db.get_day_bitmaps(self.deck_id)
+        period_days = (period_end - self.period_start_date).days + 1
+        missed = [
+            bitmaps.is_missed_day(self.period_start_date + timedelta(days=offset), rules)
+            for offset in range(period_days)
+        ]
+        self._period_view = {
+            'key': key,
+            'version': version,
+            'start': self.period_start_date,
+            'end': period_end,
+            'missed': missed,
+            'successful_days': period_days - sum(missed)
+        }
+        return self._period_view
+    
+    def check_daily_goal(self, date=None):
+        """Überprüft, ob das tägliche Lernziel erreicht wurde"""
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
         
-        while current_date <= period_end and current_date <= datetime.now().date():
-            if self.check_daily_goal(current_date.strftime("%Y-%m-%d")):
-                successful_days += 1
-            current_date += timedelta(days=1)
+        # Tage des aktuellen Abschnitts kommen aus dem zwischengespeicherten Abschnitt
+        day = datetime.strptime(date[:10], "%Y-%m-%d").date() if isinstance(date, str) else date
+        view = self.get_period_view()
+        if view and view['start'] <= day <= view['end']:
+            return not view['missed'][(day - view['start']).days]
         
-        return successful_days
+        # Ziel erreicht, wenn der Tag das Tagesziel der Level-Regeln nicht verfehlt hat
+        bitmaps = self.db.get_day_bitmaps(self.deck_id)
+        return not bitmaps.is_missed_day(date)
+    
+    def count_successful_days(self):
+        """Zählt erfolgreiche Lerntage im aktuellen Abschnitt"""
+        view = self.get_period_view()
+        return view['successful_days'] if view else 0
     
     def check_period_completion(self):
         """
-        Überprüft, ob der aktuelle 7-Tage-Abschnitt abgeschlossen ist und
+        Überprüft, ob der aktuelle Abschnitt abgeschlossen ist und
         führt entsprechende Level-Änderungen durch.
+
+        Die Level-Historie wird dabei immer über LevelReplayEngine aus daily_stats
+        berechnet, also nach denselben Regeln wie bei einer Neuberechnung nach
+        einem Import. level_history ist damit stets das Ergebnis der Neuberechnung;
+        ein späteres rebuild löscht keine live geschriebenen Einträge.
+
+        Returns:
+            "level_up" bei vorzeitig erreichtem Ziel, eine Meldung bei einem
+            zurückgesetzten Abschnitt, sonst False
         """
-        today = datetime.now().date()
-        
-        # NEU: Prüfe, ob in den letzten 3 Tagen bereits ein neuer Abschnitt gestartet wurde
-        try:
-            three_days_ago = today - timedelta(days=3)
-            cursor = self.db.conn.execute("""
-                SELECT COUNT(*) FROM level_history
-                WHERE deck_id = ? AND date(change_date) >= ? 
-                AND change_type IN ('new_period', 'reset_period', 'early_completion', 'init')
-            """, (self.deck_id, three_days_ago.strftime("%Y-%m-%d")))
-            
-            recent_period_changes = cursor.fetchone()[0]
-            if recent_period_changes > 0:
-                print(f"Study Tracker: In den letzten 3 Tagen wurde bereits ein neuer Abschnitt für Deck {self.deck_id} gestartet. Überspringe Periodencheck.")
-                return False
-        except Exception as e:
-            print(f"Study Tracker: Fehler bei der Prüfung auf kürzlich gestartete Abschnitte: {e}")
-        
-        # Bestehende Prüfung für heute beibehalten
-        try:
-            # Prüfe speziell nach Periodenänderungen für heute (new_period, reset_period, early_completion)
-            cursor = self.db.conn.execute("""
-                SELECT COUNT(*) FROM level_history
-                WHERE deck_id = ? AND change_date LIKE ? AND change_type IN ('new_period', 'reset_period', 'early_completion')
-            """, (self.deck_id, f"{today.strftime('%Y-%m-%d')}%"))
-            
-            count = cursor.fetchone()[0]
-            if count > 0:
-                print(f"Study Tracker: Heute wurde bereits ein neuer Abschnitt für Deck {self.deck_id} gestartet. Überspringe Periodencheck.")
-                return False
-        except Exception as e:
-            print(f"Study Tracker: Fehler bei der Prüfung auf bestehende Periodeneinträge: {e}")
-        
-        days_passed = (today - self.period_start_date).days
-        
-        # Debug-Ausgabe zum besseren Verständnis der Abschnittsprüfung
-        print(f"Study Tracker: Abschnittsprüfung für Deck {self.deck_id}")
-        print(f"  - Heutiges Datum: {today}")
-        print(f"  - Abschnitt-Startdatum: {self.period_start_date}")
-        print(f"  - Tage seit Abschnittsbeginn: {days_passed}")
-        
-        # Wenn 7 Tage vorbei sind, bewerte den Abschnitt
-        if days_passed >= 7:
-            print(f"Study Tracker: 7-Tage-Abschnitt abgeschlossen, bewerte Fortschritt...")
-            successful_days = self.count_successful_days()
-            old_level = self.current_level
-            
-            if successful_days >= 5:
-                self.level_up()
-                print(f"Study Tracker: Level Up! {old_level} -> {self.current_level}")
-            else:
-                self.level_down()
-                print(f"Study Tracker: Level Down! {old_level} -> {self.current_level}")
-                    
-            # Starte neuen Abschnitt
-            self.period_start_date = today
-            self.db.save_level_progress(self.deck_id, self.current_level, self.period_start_date)
-            
-            # Speichere einen Eintrag für neuen Abschnitt, auch wenn Level gleich bleibt
-            if old_level == self.current_level:
-                result = self.db.save_level_change(self.deck_id, "new_period", old_level, self.current_level)
-                print(f"Study Tracker: Neuer Lernabschnitt auf Level {self.current_level} begonnen (Erfolg: {result})")
-            
-            return True
-        
-        # Prüfe, ob es noch möglich ist, 5 Lerntage zu erreichen
-        remaining_days = 7 - days_passed
-        successful_days = self.count_successful_days()
-        needed_days = 5 - successful_days
-        
-        print(f"  - Erfolgreiche Lerntage bisher: {successful_days}/5")
-        print(f"  - Verbleibende Tage im Abschnitt: {remaining_days}")
-        print(f"  - Benötigte erfolgreiche Tage: {needed_days}")
-        
-        if needed_days > remaining_days:
-            # Lernziel kann nicht mehr erreicht werden, setze Abschnitt zurück
-            message = "Das Lernziel kann in diesem Abschnitt nicht mehr erreicht werden. Ein neuer Abschnitt beginnt."
-            old_level = self.current_level
-            
-            if self.current_level > 1:
-                self.level_down()
-                message = f"Das Lernziel wurde nicht erreicht. Du bist auf Level {self.current_level} zurückgefallen."
-            
-            # Starte neuen Abschnitt
-            self.period_start_date = today
-            self.db.save_level_progress(self.deck_id, self.current_level, self.period_start_date)
-            
-            # Speichere einen Eintrag für den abgebrochenen/zurückgesetzten Abschnitt
-            self.db.save_level_change(self.deck_id, "reset_period", old_level, self.current_level)
-            print(f"Study Tracker: Abschnitt vorzeitig zurückgesetzt, neues Level: {self.current_level}")
-            
-            return message
-        
-        # Prüfe, ob heute der 5. erfolgreiche Tag ist
-        if successful_days == 5 and self.check_daily_goal():
-            old_level = self.current_level
-            self.level_up()
-            # Starte neuen Abschnitt
-            self.period_start_date = today + timedelta(days=1)  # Neuer Abschnitt beginnt morgen
-            self.db.save_level_progress(self.deck_id, self.current_level, self.period_start_date)
-            
-            # Speichere einen Eintrag für vorzeitiges Erreichen des Ziels
-            self.db.save_level_change(self.deck_id, "early_completion", old_level, self.current_level)
-            print(f"Study Tracker: Frühzeitiges Level-Up auf Level {self.current_level}")
-            
+        previous_start = self.period_start_date
+        result = LevelReplayEngine(self.db).rebuild(self.deck_id)
+        if not result or result['level'] is None:
+            return False
+
+        self.load_progress()
+        self._period_view = None
+
+        # Nur Abschnittsenden seit dem bisherigen Abschnittsbeginn melden, ältere
+        # Einträge sind Korrekturen der Historie (z.B. nach nachgetragenen Daten)
+        outcome = LevelReplayEngine.outcome(result['changes'], previous_start)
+        if not outcome:
+            return False
+
+        change_type, old_level, new_level = outcome
+        if change_type == 'level_up':
+            print(f"Study Tracker: Frühzeitiges Level-Up auf Level {new_level}")
             return "level_up"
-                
-        return False
-    
-    def level_up(self):
-        """Führt ein Level-Up durch"""
-        old_level = self.current_level
-        self.current_level += 1
-        self.db.save_level_change(self.deck_id, "up", old_level, self.current_level)
-        print(f"Level Up! {old_level} -> {self.current_level}")
-        return True
-    
-    def level_down(self):
-        """Führt ein Level-Down durch, wenn möglich"""
-        if self.current_level > 1:
-            old_level = self.current_level
-            self.current_level -= 1
-            self.db.save_level_change(self.deck_id, "down", old_level, self.current_level)
-            print(f"Level Down! {old_level} -> {self.current_level}")
-            return True
-        return False
+
+        print(f"Study Tracker: Abschnitt vorzeitig zurückgesetzt, neues Level: {new_level}")
+        if new_level < old_level:
+            return f"Das Lernziel wurde nicht erreicht. Du bist auf Level {new_level} zurückgefallen."
+        return "Das Lernziel kann in diesem Abschnitt nicht mehr erreicht werden. Ein neuer Abschnitt beginnt."
     
     def get_progress_message(self):
         """Generiert eine Nachricht zum aktuellen Fortschritt"""
         if not self.period_start_date:
             return f"Level {self.current_level}: Kein aktiver Lernabschnitt."
         
+        rules = get_level_rules()
         days_passed = (datetime.now().date() - self.period_start_date).days
-        remaining_days = max(0, 7 - days_passed)
+        remaining_days = max(0, rules.period_days - days_passed)
         successful_days = self.count_successful_days()
-        needed_days = max(0, 5 - successful_days)
+        needed_days = max(0, rules.required_days - successful_days)
         
         if needed_days <= remaining_days:
             return f"Level {self.current_level}: Noch {needed_days} Lerntage in den nächsten {remaining_days} Tagen bis zum nächsten Level!"
@@ -1736,7 +3826,506 @@ class LevelSystem:
     def calculate_progress_percent(self):
         """Berechnet den prozentualen Fortschritt zum nächsten Level"""
         successful_days = self.count_successful_days()
-        return min(100, (successful_days / 5) * 100)
+        return min(100, (successful_days / get_level_rules().required_days) * 100)
+    
+    def replay_history(self):
+        """
+        Berechnet die Level-Historie dieses Decks aus den Tagesstatistiken neu
+        (z.B. nach einem Backup-Import) und lädt den Fortschritt danach neu
+        """
+        result = LevelReplayEngine(self.db).rebuild(self.deck_id)
+        self.load_progress()
+        return result
+
+
+class LevelReplayEngine:
+    """
+    Berechnet die Level-Historie eines Decks deterministisch aus daily_stats neu
+
+    Grundlage ist die missed-Bitmap der Tagesstatistik (siehe DayBitmaps). Sobald
+    in einem Abschnitt genug Tage erfolgreich waren, steigt das Level
+    (up + early_completion) und der nächste Abschnitt beginnt am Folgetag. Sobald
+    das Ziel nicht mehr erreichbar ist, wird der Abschnitt zurückgesetzt (down,
+    falls Level > 1, + reset_period). Das entscheidende Ereignis jedes Fensters
+    kommt aus der Ereignistabelle der Level-Regeln (siehe LevelRules), sodass pro
+    Abschnitt nur ein Nachschlagen nötig ist.
+    """
+    # Von der Neuberechnung verwaltete Änderungstypen; init und Testeinträge bleiben unberührt
+    MANAGED_TYPES = ('up', 'down', 'early_completion', 'reset_period', 'new_period')
+
+    def __init__(self, db, rules=None):
+        self.db = db
+        self.rules = rules or get_level_rules()
+
+    def replay(self, deck_id, today=None):
+        """
+        Spielt die Abschnitte eines Decks ab dem ersten Tag mit Daten durch
+
+        Heute zählt nur für ein vorzeitiges Erreichen des Ziels; ein heute noch
+        verfehlter Tag führt erst nach Tagesende zum Zurücksetzen.
+
+        Args:
+            deck_id: ID des Decks
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            dict: changes (Liste von (Datum, Typ, altes Level, neues Level)),
+                  level, period_start und origin
+        """
+        today = today or datetime.now().date()
+        bitmaps = self.db.get_day_bitmaps(deck_id)
+        return self.replay_bits(bitmaps.missed_until(today, self.rules), bitmaps.origin_date, today)
+
+    def replay_bits(self, missed, origin, today=None):
+        """
+        Spielt die Abschnitte über eine missed-Bitmap durch (siehe replay)
+
+        Args:
+            missed: Bitmap der verfehlten Tage (Bit i = origin + i Tage), Tage
+                    ohne Statistik bereits ergänzt (siehe DayBitmaps.missed_until)
+            origin: Datum des ersten Bits oder None
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            dict: wie replay
+        """
+        today = today or datetime.now().date()
+        result = {
+            'changes': [],
+            'level': 1,
+            'period_start': today,
+            'origin': origin.strftime("%Y-%m-%d") if origin else None
+        }
+        if origin is None or origin > today:
+            return result
+
+        rules = self.rules
+        today_index = (today - origin).days
+        level = 1
+        # Bei Kalenderwochen beginnt der erste Abschnitt am Montag vor dem Ursprung
+        start = (rules.current_period_start(origin) - origin).days
+
+        while start <= today_index:
+            window = (missed >> start) if start >= 0 else (missed << -start)
+            if start < 0 and rules.is_missed(0, 0):
+                # Tage vor dem Ursprung haben keine Statistik
+                window |= (1 << -start) - 1
+            completed_at, failed_at = rules.events[window & rules.window_mask]
+            known_days = today_index - start  # Position von heute im Fenster
+
+            if completed_at is not None and completed_at <= known_days:
+                event = start + completed_at
+                change_date = (origin + timedelta(days=event)).isoformat()
+                result['changes'].append((change_date, 'up', level, level + 1))
+                result['changes'].append((change_date, 'early_completion', level, level + 1))
+                level += 1
+            elif failed_at is not None and failed_at < known_days:
+                event = start + failed_at
+                change_date = (origin + timedelta(days=event)).isoformat()
+                old_level = level
+                if level > 1:
+                    level -= 1
+                    result['changes'].append((change_date, 'down', old_level, level))
+                result['changes'].append((change_date, 'reset_period', old_level, level))
+            else:
+                # Laufender Abschnitt
+                break
+            if rules.calendar_weeks:
+                start = (rules.next_period_start(origin + timedelta(days=event + 1)) - origin).days
+            else:
+                start = event + 1
+
+        result['level'] = level
+        result['period_start'] = origin + timedelta(days=start)
+        return result
+
+    def _load_managed_rows(self, deck_id=None):
+        """
+        Verwaltete Level-Änderungen als {deck_id: [(id, Datum, Typ, altes Level, neues Level)]}
+
+        Args:
+            deck_id: Optional, nur dieses Deck laden (Standard: alle Decks)
+        """
+        params = list(self.MANAGED_TYPES)
+        if deck_id is not None:
+            params.append(deck_id)
+        query = LEVEL_HISTORY_MANAGED_SQL.format(
+            types=", ".join("?" for _ in self.MANAGED_TYPES),
+            deck_filter=" AND deck_id = ?" if deck_id is not None else ""
+        )
+
+        rows = {}
+        for row in self.db.conn.execute(query, params).fetchall():
+            rows.setdefault(row[0], []).append(row[1:])
+        return rows
+
+    def diff(self, deck_id, replay_result, rows=None):
+        """
+        Vergleicht die neu berechneten Änderungen mit level_history
+
+        Args:
+            deck_id: ID des Decks
+            replay_result: Ergebnis von replay
+            rows: Optional, bereits geladene Zeilen des Decks (siehe _load_managed_rows)
+
+        Returns:
+            tuple: (IDs der zu löschenden Zeilen, einzufügende Änderungen)
+        """
+        if not replay_result['origin']:
+            return [], []
+        if rows is None:
+            rows = self._load_managed_rows(deck_id).get(deck_id, [])
+
+        expected = {}
+        for change in replay_result['changes']:
+            expected[change] = expected.get(change, 0) + 1
+
+        stale_ids = []
+        for row_id, change_date, change_type, old_level, new_level in rows:
+            if change_date < replay_result['origin']:
+                # Einträge vor dem ersten Tag mit Daten bleiben unberührt
+                continue
+            key = (change_date, change_type, old_level, new_level)
+            if expected.get(key, 0) > 0:
+                expected[key] -= 1
+            else:
+                stale_ids.append(row_id)
+
+        # Reihenfolge der Neuberechnung beibehalten (up vor early_completion usw.)
+        missing = []
+        for change in replay_result['changes']:
+            if expected.get(change, 0) > 0:
+                expected[change] -= 1
+                missing.append(change)
+
+        return stale_ids, missing
+
+    @staticmethod
+    def outcome(changes, since):
+        """
+        Fasst neu eingetragene Änderungen ab einem Datum für die Anzeige zusammen
+
+        Args:
+            changes: Neu eingetragene Änderungen (siehe rebuild_many)
+            since: Datum, ab dem Änderungen berücksichtigt werden (z.B. der
+                   bisherige Abschnittsbeginn); ältere gelten als Korrektur
+
+        Returns:
+            tuple: ('level_up' oder 'reset_period', altes Level, neues Level) für
+                   das letzte Abschnittsende oder None
+        """
+        since = since.strftime("%Y-%m-%d") if since else ""
+        for change_date, change_type, old_level, new_level in reversed(changes):
+            if change_date < since:
+                break
+            if change_type == 'early_completion':
+                return 'level_up', old_level, new_level
+            if change_type == 'reset_period':
+                return 'reset_period', old_level, new_level
+        return None
+
+    def rebuild(self, deck_id, today=None):
+        """
+        Berechnet die Level-Historie eines Decks neu und schreibt Unterschiede
+        sowie den aktuellen Level-Fortschritt in einer Transaktion
+
+        Args:
+            deck_id: ID des Decks
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            dict: wie ein Eintrag von rebuild_many, oder None bei Fehlern
+        """
+        return self.rebuild_many([deck_id], today).get(int(deck_id))
+
+    def rebuild_many(self, deck_ids, today=None, progress_callback=None, cancel_token=None):
+        """
+        Berechnet die Level-Historie mehrerer Decks neu und schreibt alle
+        Unterschiede sowie den Level-Fortschritt in einer Transaktion
+
+        Die bestehende Historie wird mit einer Abfrage geladen, die Tagesdaten
+        kommen aus den gespeicherten Tages-Bitmaps der Decks.
+
+        Args:
+            deck_ids: IDs der Decks
+            today: Optional, Stichtag (Standard: heute)
+            progress_callback: Optional, Funktion für Fortschrittsanzeige (0-100)
+            cancel_token: Optional, CancelToken zum Abbrechen vor dem Schreiben
+
+        Returns:
+            dict: {deck_id: {deleted, inserted, changes, level, period_start}};
+                  bei Fehlern None je Deck. changes enthält die neu eingetragenen
+                  Änderungen, level ist None für Decks ohne Tagesstatistik.
+        """
+        deck_ids = [int(deck_id) for deck_id in deck_ids]
+        try:
+            rows_by_deck = self._load_managed_rows(deck_ids[0] if len(deck_ids) == 1 else None)
+            results = {}
+            plans = []
+            for index, deck_id in enumerate(deck_ids):
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
+                replay_result = self.replay(deck_id, today)
+                if not replay_result['origin']:
+                    results[deck_id] = {'deleted': 0, 'inserted': 0, 'changes': [], 'level': None, 'period_start': None}
+                    continue
+                stale_ids, missing = self.diff(deck_id, replay_result, rows_by_deck.get(deck_id, []))
+                plans.append((deck_id, replay_result, stale_ids, missing))
+                if progress_callback:
+                    progress_callback(int((index + 1) * 90 / len(deck_ids)))
+
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+            with self.db.conn:
+                for deck_id, replay_result, stale_ids, missing in plans:
+                    period_start = replay_result['period_start'].strftime("%Y-%m-%d")
+                    self.db.conn.executemany(
+                        "DELETE FROM level_history WHERE id = ?",
+                        [(row_id,) for row_id in stale_ids]
+                    )
+                    self.db.conn.executemany("""
+                        INSERT INTO level_history (deck_id, change_type, old_level, new_level, change_date)
+                        VALUES (?, ?, ?, ?, ?)
+                    """, [
+                        (deck_id, change_type, old_level, new_level, f"{change_date} 23:59:59")
+                        for change_date, change_type, old_level, new_level in missing
+                    ])
+
+                    self.db.conn.execute(
+                        LEVEL_PROGRESS_UPSERT_SQL,
+                        (deck_id, replay_result['level'], period_start, now)
+                    )
+
+                    if stale_ids or missing:
+                        print(f"Study Tracker: Level-Historie für Deck {deck_id} neu berechnet "
+                              f"({len(stale_ids)} entfernt, {len(missing)} ergänzt, Level {replay_result['level']})")
+                    results[deck_id] = {
+                        'deleted': len(stale_ids),
+                        'inserted': len(missing),
+                        'changes': missing,
+                        'level': replay_result['level'],
+                        'period_start': period_start
+                    }
+
+            if progress_callback:
+                progress_callback(100)
+            return results
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Neuberechnung der Level-Historie für Decks {deck_ids}: {e}")
+            traceback.print_exc()
+            return {deck_id: None for deck_id in deck_ids}
+
+    def rebuild_all(self, today=None, progress_callback=None, cancel_token=None):
+        """Berechnet die Level-Historie aller Decks mit Tagesstatistiken neu (siehe rebuild_many)"""
+        return self.rebuild_many(self.db.get_tracked_deck_ids(), today, progress_callback, cancel_token)
+
+
+class LevelBatchEvaluator:
+    """
+    Wertet die Abschnitte aller Decks gemeinsam aus
+
+    Lädt level_progress mit einer Abfrage, legt fehlende Einträge an und
+    berechnet die Level-Historie aller Decks mit LevelReplayEngine.rebuild_many
+    in einer Transaktion neu, also nach denselben Regeln wie
+    LevelSystem.check_period_completion und die Neuberechnung nach einem Import.
+    """
+
+    def __init__(self, db, rules=None):
+        self.db = db
+        self.rules = rules or get_level_rules()
+
+    def _load_progress(self):
+        """level_progress aller Decks (ein Eintrag pro Deck, wie get_level_progress)"""
+        cursor = self.db.conn.execute("""
+            SELECT deck_id, current_level, level_start_date
+            FROM level_progress
+        """)
+        progress = {}
+        today = datetime.now().date()
+        for deck_id, level, start_date in cursor.fetchall():
+            progress[deck_id] = {
+                'level': level,
+                'start_date': datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else today
+            }
+        return progress
+
+    def evaluate(self, deck_ids, today=None):
+        """
+        Bewertet die Abschnitte der angegebenen Decks und speichert die Ergebnisse
+
+        Args:
+            deck_ids: IDs der auszuwertenden Decks
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            dict: {deck_id: Ergebnis} mit 'init', 'reset_period', 'level_up'
+                  oder None, wenn sich nichts geändert hat
+        """
+        today = today or datetime.now().date()
+        deck_ids = [int(deck_id) for deck_id in deck_ids]
+        progress = self._load_progress()
+
+        # Decks ohne Fortschritt wie in initialize_level_system anlegen
+        new_decks = [deck_id for deck_id in deck_ids if deck_id not in progress]
+        if new_decks:
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            start_date = self.rules.current_period_start(today).strftime("%Y-%m-%d")
+            with self.db.conn:
+                self.db.conn.executemany(
+                    LEVEL_PROGRESS_UPSERT_SQL,
+                    [(deck_id, 1, start_date, now) for deck_id in new_decks]
+                )
+                self.db.conn.executemany("""
+                    INSERT INTO level_history (deck_id, change_type, old_level, new_level, change_date)
+                    VALUES (?, 'init', 0, 1, ?)
+                """, [(deck_id, now) for deck_id in new_decks])
+
+        rebuilt = LevelReplayEngine(self.db, self.rules).rebuild_many(deck_ids, today)
+
+        results = {}
+        changed = 0
+        for deck_id in deck_ids:
+            if deck_id in progress:
+                outcome = LevelReplayEngine.outcome(
+                    (rebuilt.get(deck_id) or {}).get('changes', []),
+                    progress[deck_id]['start_date']
+                )
+                results[deck_id] = outcome[0] if outcome else None
+            else:
+                results[deck_id] = "init"
+            if rebuilt.get(deck_id) and (rebuilt[deck_id]['inserted'] or rebuilt[deck_id]['deleted']):
+                changed += 1
+
+        print(f"Study Tracker: Level-System für {len(deck_ids)} Decks ausgewertet "
+              f"({len(new_decks)} neu, {changed} mit geänderter Historie)")
+        return results
+
+
+class LevelRuleSimulator:
+    """
+    Simuliert alternative Level-Regeln über die gespeicherte Tagesstatistik
+
+    Die Tageswerte aller Decks werden einmal geladen; jede Simulation baut daraus
+    nur die missed-Bitmaps für die jeweiligen Regeln (zwischengespeichert je
+    Tagesziel) und spielt sie mit LevelReplayEngine durch. level_history und
+    level_progress bleiben unverändert.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.series = {}
+        self._bits_cache = {}
+
+    def load(self, deck_ids=None):
+        """
+        Lädt die Tageswerte aller (oder der angegebenen) Decks in einer Abfrage
+
+        Returns:
+            int: Anzahl der geladenen Decks
+        """
+        cursor = self.db.conn.execute("""
+            SELECT deck_id, date, cards_due, cards_studied
+            FROM daily_stats
+            WHERE deck_id IS NOT NULL
+            ORDER BY deck_id, date
+        """)
+        wanted = set(int(deck_id) for deck_id in deck_ids) if deck_ids else None
+        series = {}
+        for deck_id, date, cards_due, cards_studied in cursor.fetchall():
+            if wanted is not None and deck_id not in wanted:
+                continue
+            day = datetime.strptime(date[:10], "%Y-%m-%d").date()
+            entry = series.get(deck_id)
+            if entry is None:
+                entry = series[deck_id] = {'origin': day, 'days': []}
+            entry['days'].append(((day - entry['origin']).days, cards_due or 0, cards_studied or 0))
+        self.series = series
+        self._bits_cache = {}
+        return len(series)
+
+    def _bits(self, deck_id, rules):
+        """Bitmaps (Daten vorhanden, Ziel verfehlt) eines Decks für die Regeln"""
+        key = (deck_id, rules.day_signature)
+        bits = self._bits_cache.get(key)
+        if bits is None:
+            has_data = missed = 0
+            for offset, cards_due, cards_studied in self.series[deck_id]['days']:
+                bit = 1 << offset
+                has_data |= bit
+                if rules.is_missed(cards_due, cards_studied):
+                    missed |= bit
+            bits = self._bits_cache[key] = (has_data, missed)
+        return bits
+
+    def simulate(self, rules, today=None):
+        """
+        Spielt die Regeln über alle geladenen Decks durch
+
+        Args:
+            rules: LevelRules oder ein dict mit Werten wie unter "levelRules"
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            dict: rules, decks ({deck_id: timeline, level, level_ups, level_downs,
+                  resets, current_streak, longest_streak}) und totals
+        """
+        if not isinstance(rules, LevelRules):
+            rules = LevelRules(rules)
+        today = today or datetime.now().date()
+        engine = LevelReplayEngine(self.db, rules)
+        decks = {}
+        totals = {'decks': 0, 'level_ups': 0, 'level_downs': 0, 'resets': 0, 'level_sum': 0}
+
+        for deck_id, entry in self.series.items():
+            has_data, missed = self._bits(deck_id, rules)
+            bitmaps = DayBitmaps(entry['origin'], has_data, has_data & ~missed, missed)
+            result = engine.replay_bits(bitmaps.missed_until(today, rules), entry['origin'], today)
+            change_types = [change[1] for change in result['changes']]
+
+            # Serien erreichter Tagesziele (Tage mit Statistik, Ziel nicht verfehlt)
+            deck_result = {
+                'timeline': result['changes'],
+                'level': result['level'],
+                'period_start': result['period_start'],
+                'level_ups': change_types.count('up'),
+                'level_downs': change_types.count('down'),
+                'resets': change_types.count('reset_period'),
+                'current_streak': bitmaps.run_ending_at(bitmaps.success, today, entry['origin']),
+                'longest_streak': bitmaps.longest_run(bitmaps.success, entry['origin'], today)
+            }
+            decks[deck_id] = deck_result
+
+            totals['decks'] += 1
+            totals['level_ups'] += deck_result['level_ups']
+            totals['level_downs'] += deck_result['level_downs']
+            totals['resets'] += deck_result['resets']
+            totals['level_sum'] += deck_result['level']
+
+        totals['average_level'] = totals['level_sum'] / totals['decks'] if totals['decks'] else 0
+        return {'rules': rules, 'decks': decks, 'totals': totals}
+
+    def sweep(self, variants, today=None):
+        """
+        Simuliert mehrere Regelvarianten über dieselben geladenen Tageswerte
+
+        Args:
+            variants: Liste von dicts mit Werten wie unter "levelRules"
+            today: Optional, Stichtag (Standard: heute)
+
+        Returns:
+            list: (Variante, totals) je gültiger Variante
+        """
+        results = []
+        for variant in variants:
+            try:
+                results.append((variant, self.simulate(variant, today)['totals']))
+            except (TypeError, ValueError) as e:
+                print(f"Study Tracker: Überspringe ungültige Regelvariante {variant}: {e}")
+        return results
 
 
 class ValidationCodeHandler:
@@ -1768,7 +4357,7 @@ class ValidationCodeHandler:
                 SELECT card_title FROM validation_codes 
                 WHERE card_id = ? AND card_title IS NOT NULL AND card_title != ''
                 ORDER BY created_at DESC LIMIT 1
-            """, (str(card_id),))
+            """, (normalize_card_id(card_id),))
             result = cursor.fetchone()
             if result and result[0] and len(result[0]) > 3:
                 # Prüfe, ob der Titel wie eine ID aussieht (nur Zahlen)
@@ -1780,15 +4369,15 @@ class ValidationCodeHandler:
                 SELECT card_title FROM chat_links 
                 WHERE card_id = ? AND card_title IS NOT NULL AND card_title != ''
                 LIMIT 1
-            """, (str(card_id),))
+            """, (normalize_card_id(card_id),))
             result = cursor.fetchone()
             if result and result[0] and len(result[0]) > 3:
                 # Prüfe, ob der Titel wie eine ID aussieht (nur Zahlen)
                 if not result[0].startswith("Karte ") and not result[0].isdigit():
                     return result[0]
             
-            # 3. Versuche die Karte direkt aus Anki zu holen
-            if hasattr(mw, 'col') and mw.col:
+            # 3. Versuche die Karte direkt aus Anki zu holen (nur im Hauptthread)
+            if collection_accessible():
                 try:
                     card = mw.col.get_card(int(card_id))
                     if card:
@@ -1827,7 +4416,7 @@ class ValidationCodeHandler:
                     SELECT card_title FROM validation_codes 
                     WHERE card_id = ? AND card_title IS NOT NULL AND card_title != '' AND card_title NOT LIKE 'Karte %'
                     LIMIT 1
-                """, (str(card_id),))
+                """, (normalize_card_id(card_id),))
                 result = cursor.fetchone()
                 if result and result[0]:
                     return result[0]
@@ -1836,7 +4425,7 @@ class ValidationCodeHandler:
                     SELECT card_title FROM chat_links 
                     WHERE card_id = ? AND card_title IS NOT NULL AND card_title != '' AND card_title NOT LIKE 'Karte %'
                     LIMIT 1
-                """, (str(card_id),))
+                """, (normalize_card_id(card_id),))
                 result = cursor.fetchone()
                 if result and result[0]:
                     return result[0]
@@ -1953,13 +4542,13 @@ class ValidationCodeHandler:
             if not card_id:
                 return []
             
-            # Convert card_id to string for consistent handling
-            card_id_str = str(card_id)
+            # Convert card_id to integer for consistent handling
+            card_id_int = normalize_card_id(card_id)
             
-            print(f"Study Tracker: Getting validation codes for card {card_id_str}")
+            print(f"Study Tracker: Getting validation codes for card {card_id_int}")
             
             # Direct SQL query for codes for this specific card only
-            params = [card_id_str]
+            params = [card_id_int]
             query = """
                 SELECT date, code, correct_percent, difficulty, page_number, chat_link, card_id, card_title
                 FROM validation_codes
@@ -1967,12 +4556,12 @@ class ValidationCodeHandler:
             """
             
             if start_date:
-                query += " AND date >= ?"
-                params.append(start_date)
+                query += " AND day_num >= ?"
+                params.append(day_number(start_date))
             
             if end_date:
-                query += " AND date <= ?"
-                params.append(end_date)
+                query += " AND day_num <= ?"
+                params.append(day_number(end_date))
             
             query += " ORDER BY date ASC"
             
@@ -1981,7 +4570,7 @@ class ValidationCodeHandler:
             cursor = self.db.conn.execute(query, params)
             results = cursor.fetchall()
             
-            print(f"Study Tracker: Found {len(results)} validation codes for card {card_id_str}")
+            print(f"Study Tracker: Found {len(results)} validation codes for card {card_id_int}")
             
             # Convert to more usable format
             validation_codes = []
@@ -2009,14 +4598,23 @@ class ValidationCodeHandler:
         """
         Berechnet das aktuelle Kompetenzniveau basierend auf den letzten Validierungscodes
         
+        Berücksichtigt werden die Codes ab dem Tag vor days Tagen bis einschließlich
+        des ganzen heutigen Tages, auch Codes von heute mit Uhrzeit.
+        
+        Args:
+            deck_id: ID des Decks (None = alle Decks)
+            days: Länge des Zeitraums in Tagen
+        
         Returns:
             dict: {level, trend, avg_correct, max_difficulty}
         """
         end_date = datetime.now().strftime("%Y-%m-%d")
         start_date = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
         
-        data = self.get_competency_data(deck_id, start_date, end_date)
-        if not data:
+        # Tagesaggregate statt aller einzelnen Codes des Zeitraums
+        aggregates = self.db.get_competency_aggregates(deck_id, start_date, end_date)
+        code_count = sum(row[1] for row in aggregates)
+        if not code_count:
             return {
                 'level': 1,
                 'trend': 'neutral',
@@ -2024,19 +4622,24 @@ class ValidationCodeHandler:
                 'max_difficulty': 0
             }
         
-        # Sortiere nach Datum
-        data.sort(key=lambda x: x[0])
-        
         # Berechne Durchschnittswerte
-        correct_values = [x[1] for x in data]
-        difficulty_values = [x[2] for x in data]
-        
-        avg_correct = sum(correct_values) / len(correct_values) if correct_values else 0
-        max_difficulty = max(difficulty_values) if difficulty_values else 0
+        avg_correct = sum(row[2] for row in aggregates) / code_count
+        max_difficulty = max((row[3] for row in aggregates if row[3] is not None), default=0)
+        
+        # Letzte drei Werte aus den jüngsten Tagen (nach Datum sortiert). Über alle
+        # Decks stehen mehrere Zeilen pro Tag, deren Werte zeitlich gemischt sind
+        recent_correct = []
+        if deck_id is None:
+            recent_correct = self.db.get_recent_competency_values(None, start_date, end_date)
+        else:
+            for row in reversed(aggregates):
+                recent_correct = row[4] + recent_correct
+                if len(recent_correct) >= 3:
+                    break
         
         # Berechne Trend (letzte 3 Einträge)
-        if len(data) >= 3:
-            recent_correct = [x[1] for x in data[-3:]]
+        if code_count >= 3:
+            recent_correct = recent_correct[-3:]
             if recent_correct[0] < recent_correct[1] < recent_correct[2]:
                 trend = 'rising'
             elif recent_correct[0] > recent_correct[1] > recent_correct[2]:
@@ -2065,18 +4668,147 @@ class ValidationCodeHandler:
         }
 
 
-class StreakCalculator:
-    """Klasse zur Berechnung und Verwaltung von Lernstreaks"""
+class DayBitmaps:
+    """
+    Tageweise Bitmaps eines Decks mit einem Bit pro Tag ab dem Ursprungsdatum
     
-    def __init__(self, db, deck_id=None):
-        self.db = db
-        self.deck_id = deck_id
+    - has_data: Für den Tag gibt es eine Tagesstatistik
+    - success: Alle fälligen Karten gelernt, mindestens eine fällig (Regel der Lernserien)
+    - missed: Tagesziel des Levelsystems verfehlt (siehe LevelRules.is_missed)
     
-    def calculate_current_streak(self, start_date=None):
+    Die Bits werden als Python-Integer gehalten (Bit i = Ursprung + i Tage), Zählungen
+    und Serien sind damit Bitoperationen über wenige hundert Bytes.
+    """
+    def __init__(self, origin=None, has_data=0, success=0, missed=0):
+        if isinstance(origin, str):
+            origin = datetime.strptime(origin, "%Y-%m-%d").date()
+        self.origin_date = origin
+        self.has_data = has_data
+        self.success = success
+        self.missed = missed
+    
+    @property
+    def origin(self):
+        """Ursprungsdatum als String (YYYY-MM-DD) oder None"""
+        return self.origin_date.strftime("%Y-%m-%d") if self.origin_date else None
+    
+    @classmethod
+    def from_row(cls, row):
+        """Erzeugt die Bitmaps aus einer Zeile (origin, has_data, success, missed)"""
+        origin, has_data, success, missed = row
+        return cls(
+            origin,
+            int.from_bytes(has_data or b"", 'little'),
+            int.from_bytes(success or b"", 'little'),
+            int.from_bytes(missed or b"", 'little')
+        )
+    
+    def to_row(self):
+        """Liefert (origin, has_data, success, missed) zum Speichern"""
+        def to_bytes(bits):
+            return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+        return (self.origin, to_bytes(self.has_data), to_bytes(self.success), to_bytes(self.missed))
+    
+    def index(self, date):
+        """Bitposition eines Datums (negativ vor dem Ursprung)"""
+        if isinstance(date, str):
+            date = datetime.strptime(date[:10], "%Y-%m-%d").date()
+        if self.origin_date is None:
+            return -1
+        return (date - self.origin_date).days
+    
+    def set_day(self, date, cards_due, cards_studied):
+        """Setzt die Bits eines Tages anhand von fälligen und gelernten Karten"""
+        if self.origin_date is None:
+            self.origin_date = datetime.strptime(date[:10], "%Y-%m-%d").date() if isinstance(date, str) else date
+        position = self.index(date)
+        if position < 0:
+            raise ValueError(f"Datum {date} liegt vor dem Ursprung {self.origin}")
+        
+        bit = 1 << position
+        self.clear_day(date)
+        self.has_data |= bit
+        if cards_due > 0 and cards_studied >= cards_due:
+            self.success |= bit
+        # Verfehlte Tage nach dem Tagesziel der Level-Regeln
+        if get_level_rules().is_missed(cards_due, cards_studied):
+            self.missed |= bit
+    
+    def clear_day(self, date):
+        """Entfernt alle Bits eines Tages"""
+        position = self.index(date)
+        if position < 0:
+            return
+        mask = ~(1 << position)
+        self.has_data &= mask
+        self.success &= mask
+        self.missed &= mask
+    
+    def is_missed_day(self, date, rules=None):
         """
-        Berechnet die aktuelle Lernserie (Anzahl aufeinanderfolgender Tage mit Lernerfolg)
-        
-        Args:
+        Prüft, ob ein Tag das Tagesziel verfehlt hat. Tage ohne Statistik (auch
+        vor dem Ursprung) zählen wie ein Tag ohne fällige und gelernte Karten,
+        sind also bei einer Mindestanzahl gelernter Karten verfehlt.
+        """
+        if self.is_set(self.has_data, date):
+            return self.is_set(self.missed, date)
+        return (rules or get_level_rules()).is_missed(0, 0)
+    
+    def missed_until(self, end_date, rules=None):
+        """missed-Bitmap bis end_date, ergänzt um die Tage ohne Statistik (siehe is_missed_day)"""
+        length = self.index(end_date) + 1
+        if self.origin_date is None or length <= 0 or not (rules or get_level_rules()).is_missed(0, 0):
+            return self.missed
+        return self.missed | (~self.has_data & ((1 << length) - 1))
+    
+    def _range(self, bits, start_date, end_date):
+        """Schneidet die Bits für [start_date, end_date] aus; liefert (Bits, Länge)"""
+        start = max(self.index(start_date), 0)
+        end = self.index(end_date)
+        if self.origin_date is None or end < start:
+            return 0, 0
+        length = end - start + 1
+        return (bits >> start) & ((1 << length) - 1), length
+    
+    def is_set(self, bits, date):
+        """Prüft das Bit eines Tages in einer der Bitmaps"""
+        position = self.index(date)
+        return position >= 0 and bool((bits >> position) & 1)
+    
+    def count(self, bits, start_date, end_date):
+        """Anzahl gesetzter Tage im Zeitraum (Popcount)"""
+        masked, _ = self._range(bits, start_date, end_date)
+        return bin(masked).count("1")
+    
+    def run_ending_at(self, bits, end_date, start_date):
+        """Anzahl aufeinanderfolgender gesetzter Tage, die am end_date enden"""
+        masked, length = self._range(bits, start_date, end_date)
+        if length == 0:
+            return 0
+        gaps = ~masked & ((1 << length) - 1)
+        return length - gaps.bit_length()
+    
+    def longest_run(self, bits, start_date, end_date):
+        """Längste Folge gesetzter Tage im Zeitraum"""
+        masked, _ = self._range(bits, start_date, end_date)
+        longest = 0
+        while masked:
+            masked &= masked >> 1
+            longest += 1
+        return longest
+
+class StreakCalculator:
+    """Klasse zur Berechnung und Verwaltung von Lernstreaks"""
+    
+    def __init__(self, db, deck_id=None):
+        self.db = db
+        self.deck_id = deck_id
+    
+    def calculate_current_streak(self, start_date=None):
+        """
+        Berechnet die aktuelle Lernserie (Anzahl aufeinanderfolgender Tage mit Lernerfolg)
+        
+        Args:
             start_date: Optional, frühestes zu berücksichtigendes Datum
             
         Returns:
@@ -2084,40 +4816,22 @@ class StreakCalculator:
         """
         today = datetime.now().date()
         current_date = today
-        streak = 0
         
         # Setze Startdatum, wenn nicht angegeben
         if not start_date:
             # Verwende Installationsdatum aus den Einstellungen
-            installation_date_str = self.db.get_setting('installation_date')
-            if installation_date_str:
-                try:
-                    start_date = datetime.strptime(installation_date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
-            else:
-                start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
+            start_date = self.db.get_date_setting(
+                'installation_date', today - timedelta(days=365)  # Fallback: 1 Jahr
+            )
         elif isinstance(start_date, str):
             try:
                 start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
             except ValueError:
                 start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
         
-        # Gehe rückwärts von heute, bis ein Tag ohne Lernerfolg gefunden wird
-        while current_date >= start_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            stats = self.db.get_daily_stats(date_str, self.deck_id)
-            
-            cards_due = stats['cards_due']
-            cards_studied = stats['cards_studied']
-            
-            if cards_due > 0 and cards_studied >= cards_due:
-                streak += 1
-                current_date -= timedelta(days=1)
-            else:
-                break
-        
-        return streak
+        # Folge erfolgreicher Tage, die heute endet
+        bitmaps = self.db.get_day_bitmaps(self.deck_id)
+        return bitmaps.run_ending_at(bitmaps.success, current_date, start_date)
     
     def calculate_longest_streak(self, start_date=None):
         """
@@ -2140,39 +4854,18 @@ class StreakCalculator:
         # Setze Startdatum, wenn nicht angegeben
         if not start_date:
             # Verwende Installationsdatum aus den Einstellungen
-            installation_date_str = self.db.get_setting('installation_date')
-            if installation_date_str:
-                try:
-                    start_date = datetime.strptime(installation_date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
-            else:
-                start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
+            start_date = self.db.get_date_setting(
+                'installation_date', today - timedelta(days=365)  # Fallback: 1 Jahr
+            )
         elif isinstance(start_date, str):
             try:
                 start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
             except ValueError:
                 start_date = today - timedelta(days=365)  # Fallback: 1 Jahr
         
-        current_date = start_date
-        current_streak = 0
-        longest_streak = 0
-        
-        # Gehe vorwärts von start_date bis heute
-        while current_date <= today:
-            date_str = current_date.strftime("%Y-%m-%d")
-            stats = self.db.get_daily_stats(date_str, self.deck_id)
-            
-            cards_due = stats['cards_due']
-            cards_studied = stats['cards_studied']
-            
-            if cards_due > 0 and cards_studied >= cards_due:
-                current_streak += 1
-                longest_streak = max(longest_streak, current_streak)
-            else:
-                current_streak = 0
-            
-            current_date += timedelta(days=1)
+        # Längste Folge erfolgreicher Tage von start_date bis heute
+        bitmaps = self.db.get_day_bitmaps(self.deck_id)
+        longest_streak = bitmaps.longest_run(bitmaps.success, start_date, today)
         
         # Speichere den berechneten Rekord
         if longest_streak > 0:
@@ -2195,14 +4888,9 @@ class StreakCalculator:
         # Setze Startdatum, wenn nicht angegeben
         if not start_date:
             # Verwende Installationsdatum aus den Einstellungen
-            installation_date_str = self.db.get_setting('installation_date')
-            if installation_date_str:
-                try:
-                    start_date = datetime.strptime(installation_date_str, "%Y-%m-%d").date()
-                except ValueError:
-                    start_date = today - timedelta(days=30)  # Fallback: 30 Tage
-            else:
-                start_date = today - timedelta(days=30)  # Fallback: 30 Tage
+            start_date = self.db.get_date_setting(
+                'installation_date', today - timedelta(days=30)  # Fallback: 30 Tage
+            )
         elif isinstance(start_date, str):
             try:
                 start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
@@ -2213,21 +4901,9 @@ class StreakCalculator:
         if total_days <= 0:
             return 0
         
-        success_days = 0
-        current_date = start_date
-        
         # Zähle die Tage mit Lernerfolg
-        while current_date <= today:
-            date_str = current_date.strftime("%Y-%m-%d")
-            stats = self.db.get_daily_stats(date_str, self.deck_id)
-            
-            cards_due = stats['cards_due']
-            cards_studied = stats['cards_studied']
-            
-            if cards_due > 0 and cards_studied >= cards_due:
-                success_days += 1
-            
-            current_date += timedelta(days=1)
+        bitmaps = self.db.get_day_bitmaps(self.deck_id)
+        success_days = bitmaps.count(bitmaps.success, start_date, today)
         
         return (success_days / total_days) * 100
 
@@ -2402,6 +5078,9 @@ class StudyStatisticsCollector:
                 all_dates.append(current_date.strftime("%Y-%m-%d"))
                 current_date += timedelta(days=1)
             
+            # Bereits verdichtete Tage bekommen keine neuen Einzeleinträge
+            compacted_until = self.db.get_setting(StudiedCardsCompactor.COMPACTED_UNTIL_KEY) or ""
+            
             for date_str in all_dates:
                 date_obj = datetime.strptime(date_str, "%Y-%m-%d")
                 day_start_ms = int(datetime.combine(date_obj, datetime.min.time()).timestamp() * 1000)
@@ -2433,8 +5112,9 @@ class StudyStatisticsCollector:
                     AND r.id BETWEEN {day_start_ms} AND {day_end_ms}
                 """)
                 
-                for cid, review_time in card_data:
-                    self.db.save_studied_card(date_str, cid, deck_id, review_time)
+                if date_str >= compacted_until:
+                    for cid, review_time in card_data:
+                        self.db.save_studied_card(date_str, cid, deck_id, review_time)
                 
                 # Skip if no cards were studied
                 if cards_studied == 0:
@@ -2493,7 +5173,68 @@ class StudyStatisticsCollector:
             print(f"Study Tracker: Transaktionsfehler: {e}")
             raise  # Rethrow für übergeordnete Fehlerbehandlung
 
-    def process_validation_codes(self, note_id=None, specific_note=None):
+    def read_validation_note(self, note):
+        """
+        Reads the fields needed by process_validation_codes from a note.
+        Accesses the collection and must therefore run on the main thread.
+        
+        Args:
+            note: Anki note object
+            
+        Returns:
+            dict: content, chat_link, card_id, deck_id and card_title, or None
+                  if the note has no validation codes or no cards
+        """
+        # Skip if no validation codes
+        if 'ValidierungscodesListe' not in note or not note['ValidierungscodesListe'].strip():
+            return None
+        
+        # Get all cards for this note
+        card_ids = note.card_ids()
+        if not card_ids:
+            return None
+        
+        # Debug info
+        print(f"Study Tracker: Processing note with {len(card_ids)} cards")
+        
+        # Process first card (validation codes apply to all cards in the note)
+        card_id = card_ids[0]
+        card = mw.col.get_card(card_id)
+        card_id_int = normalize_card_id(card_id)
+        
+        return {
+            'content': note['ValidierungscodesListe'].strip(),
+            'chat_link': note['ChatGPT-Link'].strip() if 'ChatGPT-Link' in note else '',
+            'card_id': card_id_int,
+            'deck_id': card.did,
+            # Get card title for better logs and database entries
+            'card_title': ValidationCodeHandler(self.db).get_card_title(card_id_int)
+        }
+    
+    def read_validation_notes(self, cancel_token=None):
+        """
+        Reads all notes with a ValidierungscodesListe field (main thread only).
+        
+        Returns:
+            list: Entries as returned by read_validation_note
+        """
+        note_ids = mw.col.find_notes("ValidierungscodesListe:*")
+        print(f"Study Tracker: Found: {len(note_ids)} notes with validation codes")
+        
+        entries = []
+        for note_id in note_ids:
+            if cancel_token:
+                cancel_token.raise_if_cancelled()
+            try:
+                entry = self.read_validation_note(mw.col.get_note(note_id))
+            except Exception as e:
+                print(f"Study Tracker: Error retrieving note {note_id}: {e}")
+                continue
+            if entry:
+                entries.append(entry)
+        return entries
+    
+    def process_validation_codes(self, note_id=None, specific_note=None, cancel_token=None, notes=None):
         """
         Unified function to process validation codes from Anki cards.
         
@@ -2503,11 +5244,14 @@ class StudyStatisticsCollector:
         Args:
             note_id: Optional, specific note ID to process
             specific_note: Optional, note object to process
+            cancel_token: Optional CancelToken, checked before each note
+            notes: Optional, note entries from read_validation_notes. The collection
+                   is only read without them, which is limited to the main thread.
             
         Returns:
             dict: Results summary with counts of processed notes and codes
         """
-        if not mw or not mw.col:
+        if notes is None and not collection_accessible():
             print("Study Tracker: Anki collection not available")
             return {"processed_notes": 0, "processed_codes": 0, "error": "Anki collection not available"}
         
@@ -2521,76 +5265,68 @@ class StudyStatisticsCollector:
             processed_codes_count = 0
             
             # Determine which notes to process
-            notes_to_process = []
-            if specific_note:
-                notes_to_process = [specific_note]
+            if notes is not None:
+                notes_to_process = notes
+            elif specific_note:
+                notes_to_process = [self.read_validation_note(specific_note)]
             elif note_id:
                 try:
-                    note = mw.col.get_note(note_id)
-                    notes_to_process = [note]
+                    notes_to_process = [self.read_validation_note(mw.col.get_note(note_id))]
                 except Exception as e:
                     print(f"Study Tracker: Error retrieving note {note_id}: {e}")
                     return {"processed_notes": 0, "processed_codes": 0, "error": f"Error retrieving note: {e}"}
             else:
                 # If no specific note, get all notes with ValidierungscodesListe field
-                note_ids = mw.col.find_notes("ValidierungscodesListe:*")
-                print(f"Study Tracker: Found: {len(note_ids)} notes with validation codes")
-                
-                for note_id in note_ids:
-                    try:
-                        note = mw.col.get_note(note_id)
-                        notes_to_process.append(note)
-                    except Exception as e:
-                        print(f"Study Tracker: Error retrieving note {note_id}: {e}")
-                        continue
+                notes_to_process = self.read_validation_notes(cancel_token)
             
             # Process each note
-            for note in notes_to_process:
+            for entry in notes_to_process:
+                if cancel_token:
+                    cancel_token.raise_if_cancelled()
                 try:
-                    # Skip if no validation codes
-                    if 'ValidierungscodesListe' not in note or not note['ValidierungscodesListe'].strip():
-                        continue
-                    
-                    validation_content = note['ValidierungscodesListe'].strip()
-                    chat_link = note['ChatGPT-Link'].strip() if 'ChatGPT-Link' in note else ''
-                    
-                    # Get all cards for this note
-                    card_ids = note.card_ids()
-                    if not card_ids:
+                    if not entry:
                         continue
                     
-                    # Debug info
-                    print(f"Study Tracker: Processing note with {len(card_ids)} cards")
-                    
-                    # Process first card (validation codes apply to all cards in the note)
-                    card_id = card_ids[0]
-                    card = mw.col.get_card(card_id)
-                    deck_id = card.did
-                    card_id_str = str(card_id)
-                    
-                    # Get card title for better logs and database entries
-                    card_title = ValidationCodeHandler(self.db).get_card_title(card_id_str)
+                    validation_content = entry['content']
+                    chat_link = entry['chat_link']
+                    deck_id = entry['deck_id']
+                    card_id_int = entry['card_id']
+                    card_title = entry['card_title']
                     
                     # Save ChatGPT link if available
                     if chat_link:
-                        self.db.save_chat_link(card_id_str, chat_link, deck_id, card_title)
-                        print(f"Study Tracker: ChatGPT-Link saved: {chat_link} for card {card_id_str}")
+                        self.db.save_chat_link(card_id_int, chat_link, deck_id, card_title)
+                        print(f"Study Tracker: ChatGPT-Link saved: {chat_link} for card {card_id_int}")
                     
-                    # First, delete all existing validation codes for this card
+                    # Load existing validation codes for this card, keyed by (date, code).
+                    # Rows are only rewritten when they actually change, so unchanged
+                    # notes do not bump the data version used by the report cache.
+                    existing_rows = {}
+                    stale_row_ids = []
                     try:
-                        self.db.conn.execute("""
-                            DELETE FROM validation_codes WHERE card_id = ?
-                        """, (card_id_str,))
-                        self.db.conn.commit()
-                        print(f"Study Tracker: Removed existing validation codes for card {card_id_str}")
+                        cursor = self.db.conn.execute("""
+                            SELECT id, date, code FROM validation_codes WHERE card_id = ?
+                        """, (card_id_int,))
+                        for row_id, row_date, row_code in cursor.fetchall():
+                            if (row_date, row_code) in existing_rows:
+                                stale_row_ids.append(row_id)
+                            else:
+                                existing_rows[(row_date, row_code)] = row_id
                     except Exception as e:
-                        print(f"Study Tracker: Error removing existing validation codes: {e}")
+                        print(f"Study Tracker: Error loading existing validation codes: {e}")
                     
                     # Extract validation codes using regex
                     all_codes = re.findall(validation_pattern, validation_content)
                     
                     if not all_codes:
                         print(f"Study Tracker: No validation codes found in note")
+                        stale_row_ids.extend(existing_rows.values())
+                        if stale_row_ids:
+                            self.db.conn.executemany(
+                                "DELETE FROM validation_codes WHERE id = ?",
+                                [(row_id,) for row_id in stale_row_ids]
+                            )
+                            self.db.conn.commit()
                         continue
                     
                     print(f"Study Tracker: Found {len(all_codes)} validation codes")
@@ -2602,10 +5338,10 @@ class StudyStatisticsCollector:
                         date_str = date_str.replace('.', '-')
                         
                         # Create unique key to prevent duplicates
-                        unique_key = f"{card_id_str}_{date_str}_{code}"
+                        unique_key = f"{card_id_int}_{date_str}_{code}"
                         
                         if unique_key in processed_codes:
-                            print(f"Study Tracker: Skipping duplicate: {date_str}: {code} for card {card_id_str}")
+                            print(f"Study Tracker: Skipping duplicate: {date_str}: {code} for card {card_id_int}")
                             continue
                         
                         processed_codes.add(unique_key)
@@ -2614,6 +5350,22 @@ class StudyStatisticsCollector:
                         correct_percent = int(code[:2]) if len(code) >= 2 else 0
                         difficulty = int(code[2:4]) if len(code) >= 4 else 0
                         
+                        # Update existing code in place (no-op updates are ignored by the version triggers)
+                        existing_id = existing_rows.pop((date_str, code), None)
+                        if existing_id is not None:
+                            try:
+                                self.db.conn.execute("""
+                                    UPDATE validation_codes
+                                    SET deck_id = ?, correct_percent = ?, difficulty = ?,
+                                        chat_link = COALESCE(NULLIF(?, ''), chat_link), card_title = ?
+                                    WHERE id = ?
+                                """, (deck_id, correct_percent, difficulty, chat_link, card_title, existing_id))
+                                codes_found += 1
+                                processed_codes_count += 1
+                            except Exception as e:
+                                print(f"Study Tracker: Error updating validation code {date_str}: {code}: {e}")
+                            continue
+                        
                         # Insert validation code
                         try:
                             self.db.conn.execute("""
@@ -2621,7 +5373,7 @@ class StudyStatisticsCollector:
                                 (card_id, deck_id, date, code, correct_percent, difficulty, page_number, chat_link, card_title, created_at)
                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                             """, (
-                                card_id_str, 
+                                card_id_int, 
                                 deck_id, 
                                 date_str, 
                                 code, 
@@ -2641,8 +5393,21 @@ class StudyStatisticsCollector:
                             print(f"Study Tracker: Error saving validation code {date_str}: {code}: {e}")
                             continue
                     
+                    # Remove codes that are no longer in the note, and duplicates
+                    stale_row_ids.extend(existing_rows.values())
+                    if stale_row_ids:
+                        try:
+                            self.db.conn.executemany(
+                                "DELETE FROM validation_codes WHERE id = ?",
+                                [(row_id,) for row_id in stale_row_ids]
+                            )
+                            print(f"Study Tracker: Removed {len(stale_row_ids)} outdated validation codes for card {card_id_int}")
+                        except Exception as e:
+                            print(f"Study Tracker: Error removing outdated validation codes: {e}")
+                    self.db.conn.commit()
+                    
                     if codes_found > 0:
-                        print(f"Study Tracker: {codes_found} validation codes for card {card_id_str} found and saved")
+                        print(f"Study Tracker: {codes_found} validation codes for card {card_id_int} found and saved")
                     
                     processed_notes_count += 1
                     
@@ -2660,6 +5425,9 @@ class StudyStatisticsCollector:
                 "processed_notes": processed_notes_count,
                 "processed_codes": processed_codes_count
             }
+        except OperationCancelledError:
+            print("Study Tracker: Validation code processing cancelled")
+            raise
         except Exception as e:
             print(f"Study Tracker: Error processing validation codes: {e}")
             traceback.print_exc()
@@ -2669,17 +5437,22 @@ class StudyStatisticsCollector:
                 "error": str(e)
             }
     
-    def parse_validation_codes_from_cards(self):
+    def parse_validation_codes_from_cards(self, cancel_token=None, notes=None):
         """
         Scans all cards for ValidierungscodesListe field and imports the codes 
         into the database using the unified function.
         
+        Args:
+            cancel_token: Optional CancelToken to abort the scan between notes
+            notes: Optional, note entries from read_validation_notes (e.g. of a
+                   CollectionSnapshot) instead of reading the collection
+        
         Returns:
             bool: True on success, False on error
         """
         try:
             print("Study Tracker: Importing validation codes from cards...")
-            result = self.process_validation_codes()
+            result = self.process_validation_codes(cancel_token=cancel_token, notes=notes)
             
             # Process results
             processed_notes = result.get("processed_notes", 0)
@@ -2692,6 +5465,8 @@ class StudyStatisticsCollector:
                 
             print(f"Study Tracker: Validation code import completed: {processed_codes} codes from {processed_notes} notes")
             return True
+        except OperationCancelledError:
+            raise
         except Exception as e:
             print(f"Study Tracker: Error parsing validation codes: {e}")
             traceback.print_exc()
@@ -2766,13 +5541,9 @@ class StudyStatisticsCollector:
                     print("Study Tracker: Anki-Sammlung nicht verfügbar")
                     return False
                     
-                decks = mw.col.decks.all()
-                for deck in decks:
-                    # Überspringe Standard-Deck
-                    if deck['id'] == 1:
-                        continue
-                        
-                    self.initialize_level_system(deck['id'])
+                # Alle Decks außer dem Standard-Deck gemeinsam auswerten
+                deck_ids = [deck['id'] for deck in mw.col.decks.all() if deck['id'] != 1]
+                LevelBatchEvaluator(self.db).evaluate(deck_ids)
                 
                 return True
             
@@ -2784,7 +5555,7 @@ class StudyStatisticsCollector:
             
             if not level_data:
                 # Erstelle einen neuen Level-Eintrag
-                start_date = datetime.now().date()
+                start_date = get_level_rules().current_period_start(datetime.now().date())
                 level = 1 # Starte mit Level 1
                 
                 success = self.db.save_level_progress(deck_id_int, level, start_date)
@@ -2797,33 +5568,13 @@ class StudyStatisticsCollector:
                 else:
                     print(f"Study Tracker: Fehler beim Initialisieren des Level-Systems für Deck {deck_id_int}")
             else:
-                # NEU: Prüfe wie alt der bestehende Abschnitt ist
-                today = datetime.now().date()
-                period_start = level_data['start_date']
-                days_since_start = (today - period_start).days
+                # Abschnitte über die Neuberechnung prüfen; sie ist idempotent und
+                # schreibt nur Unterschiede, eine Sperrfrist ist daher nicht nötig
+                level_system = LevelSystem(self.db, deck_id_int)
+                result = level_system.check_period_completion()
                 
-                # Prüfe, ob kürzlich ein neuer Abschnitt gestartet wurde
-                three_days_ago = today - timedelta(days=3)
-                cursor = self.db.conn.execute("""
-                    SELECT COUNT(*) FROM level_history
-                    WHERE deck_id = ? AND date(change_date) >= ? 
-                    AND change_type IN ('new_period', 'reset_period', 'early_completion', 'init')
-                """, (deck_id_int, three_days_ago.strftime("%Y-%m-%d")))
-                
-                recent_changes = cursor.fetchone()[0]
-                
-                # Führe Periodencheck nur durch, wenn das Startdatum älter als 3 Tage ist
-                # und es keine kürzlichen Änderungen gab
-                if days_since_start > 3 and recent_changes == 0:
-                    level_system = LevelSystem(self.db, deck_id_int)
-                    
-                    # Prüfe die Abschnittsergebnisse
-                    result = level_system.check_period_completion()
-                    
-                    if result:
-                        print(f"Study Tracker: Level-System für Deck {deck_id_int} aktualisiert: {result}")
-                else:
-                    print(f"Study Tracker: Abschnitt für Deck {deck_id_int} ist erst {days_since_start} Tage alt oder wurde kürzlich aktualisiert. Überspringe Prüfung.")
+                if result:
+                    print(f"Study Tracker: Level-System für Deck {deck_id_int} aktualisiert: {result}")
             
             return True
         except Exception as e:
@@ -2891,16 +5642,16 @@ class StudyStatisticsCollector:
                     deck_id = card.did
                     
                     # Convert card_id to string for consistent handling
-                    card_id_str = str(card_id)
+                    card_id_int = normalize_card_id(card_id)
                     
                     # Get card title
                     handler = ValidationCodeHandler(self.db)
-                    card_title = handler.get_card_title(card_id_str)
+                    card_title = handler.get_card_title(card_id_int)
                 
                     # Save ChatGPT link if present
                     if chat_link:
-                        self.db.save_chat_link(card_id_str, chat_link, deck_id, card_title)
-                        print(f"Study Tracker: ChatGPT link saved: {chat_link} for card {card_id_str}")
+                        self.db.save_chat_link(card_id_int, chat_link, deck_id, card_title)
+                        print(f"Study Tracker: ChatGPT link saved: {chat_link} for card {card_id_int}")
                     
                     # Process each validation code
                     codes_found = 0
@@ -2909,11 +5660,11 @@ class StudyStatisticsCollector:
                         date_str = date_str.replace('.', '-')
                         
                         # Create a unique key for this code
-                        unique_key = f"{card_id_str}_{date_str}_{code}"
+                        unique_key = f"{card_id_int}_{date_str}_{code}"
                         
                         # Skip if already processed
                         if unique_key in processed_codes:
-                            print(f"Study Tracker: Skipping duplicate code: {date_str}: {code} for card {card_id_str}")
+                            print(f"Study Tracker: Skipping duplicate code: {date_str}: {code} for card {card_id_int}")
                             continue
                         
                         print(f"Study Tracker: Validation code found: {date_str}: {code}")
@@ -2922,7 +5673,7 @@ class StudyStatisticsCollector:
                         cursor = self.db.conn.execute("""
                             SELECT COUNT(*) FROM validation_codes
                             WHERE card_id = ? AND date = ? AND code = ?
-                        """, (card_id_str, date_str, code))
+                        """, (card_id_int, date_str, code))
                         
                         if cursor.fetchone()[0] > 0:
                             print(f"Study Tracker: Code already exists in database: {date_str}: {code}")
@@ -2940,7 +5691,7 @@ class StudyStatisticsCollector:
                                 (card_id, deck_id, date, code, correct_percent, difficulty, page_number, chat_link, card_title, created_at)
                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                             """, (
-                                card_id_str, 
+                                card_id_int, 
                                 deck_id, 
                                 date_str,
                                 code, 
@@ -2962,7 +5713,7 @@ class StudyStatisticsCollector:
                             continue
                     
                     if codes_found > 0:
-                        print(f"Study Tracker: {codes_found} validation codes found and saved for card {card_id_str}")
+                        print(f"Study Tracker: {codes_found} validation codes found and saved for card {card_id_int}")
                     
                     processed_notes += 1
                     
@@ -2982,92 +5733,1234 @@ class StudyStatisticsCollector:
             traceback.print_exc()
             return False
 
-class CachedReportData:
-    """Caching-Klasse für Berichtsdaten"""
+class OperationCancelledError(Exception):
+    """Wird ausgelöst, wenn der Benutzer eine Hintergrundaufgabe abbricht"""
+    pass
+
+class DatabaseIntegrityError(Exception):
+    """Wird ausgelöst, wenn die Integritätsprüfung der Datenbank fehlgeschlagen ist"""
+    pass
+
+class CancelToken:
+    """Threadsicheres Abbruch-Signal für Hintergrundaufgaben"""
     def __init__(self):
-        self.cache = {}
-        self.max_age = 300  # 5 Minuten Cache-Lebensdauer
-    
-    def get(self, key):
-        """Holt gecachte Daten, falls vorhanden und nicht zu alt"""
-        if key in self.cache:
-            timestamp, data = self.cache[key]
-            if time.time() - timestamp < self.max_age:
-                return data
-        return None
-    
-    def set(self, key, data):
-        """Speichert Daten im Cache"""
-        self.cache[key] = (time.time(), data)
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Fordert den Abbruch der Aufgabe an"""
+        self._event.set()
+
+    def is_cancelled(self):
+        """Gibt zurück, ob der Abbruch angefordert wurde"""
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        """Löst OperationCancelledError aus, wenn der Abbruch angefordert wurde"""
+        if self._event.is_set():
+            raise OperationCancelledError("Vorgang wurde abgebrochen")
+
+class BackgroundJob:
+    """
+    Führt eine längere Aufgabe im Hintergrund aus und zeigt währenddessen
+    einen abbrechbaren Fortschrittsdialog an.
+
+    Die Aufgabe wird als task(report_progress, cancel_token) aufgerufen und darf
+    nur eigene Datenbankverbindungen verwenden, da SQLite-Verbindungen an ihren
+    Thread gebunden sind. Ergebnis, Fehler und Abbruch werden im Hauptthread
+    an die Callbacks übergeben.
+    """
+    def __init__(self, parent, label, task, on_success, on_failure=None, on_cancel=None):
+        self.parent = parent
+        self.label = label
+        self.task = task
+        self.on_success = on_success
+        self.on_failure = on_failure
+        self.on_cancel = on_cancel
+        self.cancel_token = CancelToken()
+        self.progress = None
+
+    def start(self):
+        """Öffnet den Fortschrittsdialog und startet die Aufgabe im Hintergrund"""
+        self.progress = QProgressDialog(self.label, "Abbrechen", 0, 100, self.parent)
+        self.progress.setWindowTitle("Study Tracker")
+        self.progress.setWindowModality(get_qt_enum(Qt.WindowModality, "WindowModal"))
+        self.progress.setAutoClose(False)
+        self.progress.setAutoReset(False)
+        self.progress.setMinimumDuration(0)
+        self.progress.canceled.connect(self.cancel_token.cancel)
+        self.progress.setValue(0)
+        self.progress.show()
+
+        mw.taskman.run_in_background(self._run, self._on_done)
+
+    def _run(self):
+        """Läuft im Hintergrundthread"""
+        self.cancel_token.raise_if_cancelled()
+        return self.task(self.report_progress, self.cancel_token)
+
+    def report_progress(self, value, label=None):
+        """Leitet eine Fortschrittsmeldung aus dem Hintergrundthread an den Dialog weiter"""
+        if self.cancel_token.is_cancelled():
+            return
+
+        def update():
+            if self.progress and not self.cancel_token.is_cancelled():
+                self.progress.setValue(value)
+                if label:
+                    self.progress.setLabelText(label)
+
+        mw.taskman.run_on_main(update)
+
+    def _on_done(self, future):
+        """Wird im Hauptthread aufgerufen, sobald die Aufgabe beendet ist"""
+        if self.progress:
+            self.progress.close()
+            self.progress = None
+
+        try:
+            result = future.result()
+        except OperationCancelledError:
+            print("Study Tracker: Hintergrundaufgabe wurde abgebrochen")
+            if self.on_cancel:
+                self.on_cancel()
+            return
+        except Exception as e:
+            print(f"Study Tracker: Fehler in Hintergrundaufgabe: {e}")
+            traceback.print_exc()
+            if self.on_failure:
+                self.on_failure(e)
+            else:
+                QMessageBox.critical(self.parent, "Fehler", f"Vorgang fehlgeschlagen:\n{str(e)}")
+            return
+
+        self.on_success(result)
+
+class StudiedCardsCompactor:
+    """
+    Verdichtet gelernte Karten, die älter als die Aufbewahrungsfrist sind, zu
+    Zusammenfassungen pro Deck und Woche bzw. Monat (studied_cards_summary:
+    verschiedene Karten, Anzahl Einträge, gesamte Lernzeit).
+
+    Jeder Zeitraum wird in einer eigenen Transaktion zusammengefasst und gelöscht,
+    die Verdichtung kann daher schrittweise im Hintergrund laufen und jederzeit
+    abgebrochen werden. Bis zu welchem Tag verdichtet wurde, steht in den
+    Einstellungen; der Revlog-Import legt davor keine Einzeleinträge mehr an.
+    """
+    COMPACTED_UNTIL_KEY = "studied_cards_compacted_until"
+
+    def __init__(self, db, retention=None, cancel_token=None):
+        self.db = db
+        self.cancel_token = cancel_token
+        if retention is None:
+            retention = load_addon_config().get('studiedCardsRetention')
+        settings = dict(DEFAULT_STUDIED_CARDS_RETENTION)
+        settings.update(retention or {})
+        try:
+            self.detail_months = max(0, int(settings['detailMonths']))
+        except (TypeError, ValueError):
+            self.detail_months = DEFAULT_STUDIED_CARDS_RETENTION['detailMonths']
+        self.summary_period = settings['summaryPeriod'] if settings['summaryPeriod'] in ('week', 'month') else 'month'
+
+    def period_bounds(self, day):
+        """Erster und letzter Tag der Woche (Montag bis Sonntag) bzw. des Monats eines Datums"""
+        if self.summary_period == 'week':
+            start = day - timedelta(days=day.weekday())
+            return start, start + timedelta(days=6)
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+
+    def cutoff(self, today=None):
+        """Erster Tag, dessen Einzeleinträge erhalten bleiben (None = keine Verdichtung)"""
+        if not self.detail_months:
+            return None
+        today = today or datetime.now().date()
+        month_index = today.year * 12 + today.month - 1 - self.detail_months
+        return self.period_bounds(today.replace(year=month_index // 12, month=month_index % 12 + 1, day=1))[0]
+
+    def next_period(self, cutoff):
+        """Ältester noch nicht verdichteter Zeitraum vor cutoff als (Start, Ende) oder None"""
+        cursor = self.db.conn.execute(
+            "SELECT MIN(date) FROM studied_cards WHERE date < ?", (cutoff.strftime("%Y-%m-%d"),)
+        )
+        oldest = cursor.fetchone()[0]
+        if not oldest:
+            return None
+        return self.period_bounds(datetime.strptime(oldest[:10], "%Y-%m-%d").date())
+
+    def compact_period(self, start, end):
+        """
+        Fasst die Einzeleinträge eines Zeitraums pro Deck zusammen und löscht sie
+
+        Returns:
+            int: Anzahl der gelöschten Einzeleinträge
+        """
+        start_str, end_str = start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+        with self.db.conn:
+            # Kommen für einen Zeitraum später doch noch Einträge hinzu, werden sie
+            # addiert; die Zahl der verschiedenen Karten ist dann eine untere Schranke
+            self.db.conn.execute("""
+                INSERT INTO studied_cards_summary
+                (deck_id, period_start, period_end, start_day, end_day, distinct_cards, review_count, review_time)
+                SELECT COALESCE(deck_id, -1), ?, ?, ?, ?, COUNT(DISTINCT card_id), COUNT(*),
+                       COALESCE(SUM(review_time), 0)
+                FROM studied_cards
+                WHERE date BETWEEN ? AND ?
+                GROUP BY COALESCE(deck_id, -1)
+                ON CONFLICT (deck_id, start_day) DO UPDATE SET
+                    distinct_cards = MAX(distinct_cards, excluded.distinct_cards),
+                    review_count = review_count + excluded.review_count,
+                    review_time = review_time + excluded.review_time
+            """, (start_str, end_str, day_number(start), day_number(end), start_str, end_str))
+            cursor = self.db.conn.execute(
+                "DELETE FROM studied_cards WHERE date BETWEEN ? AND ?", (start_str, end_str)
+            )
+            deleted = cursor.rowcount
+            
+            compacted_until = (end + timedelta(days=1)).strftime("%Y-%m-%d")
+            advance = compacted_until > (self.db.get_setting(self.COMPACTED_UNTIL_KEY) or "")
+            if advance:
+                self.db.conn.execute(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    (self.COMPACTED_UNTIL_KEY, compacted_until)
+                )
+        # Erst nach dem Commit in den Cache übernehmen
+        if advance and self.db.settings_cache:
+            self.db.settings_cache.set(self.COMPACTED_UNTIL_KEY, compacted_until)
+        return deleted
+
+    def run(self, max_periods=COMPACTION_PERIODS_PER_RUN, today=None):
+        """
+        Verdichtet die ältesten Zeiträume vor der Aufbewahrungsfrist und gibt
+        anschließend den freigewordenen Speicher frei
+
+        Returns:
+            tuple: (verdichtete Zeiträume, gelöschte Einzeleinträge)
+        """
+        cutoff = self.cutoff(today)
+        if cutoff is None:
+            return 0, 0
+        
+        periods = deleted = 0
+        while max_periods is None or periods < max_periods:
+            if self.cancel_token:
+                self.cancel_token.raise_if_cancelled()
+            period = self.next_period(cutoff)
+            if period is None:
+                break
+            deleted += self.compact_period(*period)
+            periods += 1
+            print(f"Study Tracker: Gelernte Karten {period[0]} bis {period[1]} zusammengefasst")
         
-    def invalidate(self, key=None):
-        """Entfernt spezifische oder alle Cache-Einträge"""
-        if key:
-            if key in self.cache:
-                del self.cache[key]
-        else:
-            self.cache.clear()
+        if deleted:
+            self.reclaim_space()
+        return periods, deleted
 
-class ReportGenerator:
-    """Verbesserte Klasse zur Generierung von HTML-Berichten mit robuster Datenanbindung"""
+    def reclaim_space(self):
+        """
+        Gibt freie Seiten an das Dateisystem zurück. Datenbanken ohne
+        inkrementelles auto_vacuum werden dafür einmalig per VACUUM umgestellt.
+        """
+        try:
+            if self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                self.db.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                self.db.conn.execute("VACUUM")
+                print("Study Tracker: Datenbank auf inkrementelles auto_vacuum umgestellt")
+            else:
+                self.db.conn.execute("PRAGMA incremental_vacuum")
+        except Exception as e:
+            print(f"Study Tracker: Speicher konnte nicht freigegeben werden: {e}")
+
+
+def schedule_studied_cards_compaction():
+    """
+    Verdichtet alte gelernte Karten einmal täglich im Hintergrund
+    (höchstens COMPACTION_PERIODS_PER_RUN Zeiträume pro Lauf)
+    """
+    try:
+        db = Database()
+        today = datetime.now().strftime("%Y-%m-%d")
+        last_run = db.get_setting('last_studied_cards_compaction')
+        db.close()
+        if last_run == today:
+            return
+        
+        def task():
+            # Eigene Verbindung, da SQLite-Verbindungen an ihren Thread gebunden sind
+            task_db = Database()
+            try:
+                result = StudiedCardsCompactor(task_db).run()
+                task_db.save_setting('last_studied_cards_compaction', today)
+                return result
+            finally:
+                task_db.close()
+        
+        def on_done(future):
+            try:
+                periods, deleted = future.result()
+                if periods:
+                    print(f"Study Tracker: {periods} Zeiträume verdichtet, {deleted} Einträge zusammengefasst")
+            except Exception as e:
+                print(f"Study Tracker: Fehler bei der Verdichtung gelernter Karten: {e}")
+                traceback.print_exc()
+        
+        mw.taskman.run_in_background(task, on_done)
+    except Exception as e:
+        print(f"Study Tracker: Fehler beim Planen der Verdichtung: {e}")
+        traceback.print_exc()
+
+
+def schedule_auto_backup(on_finished=None):
+    """
+    Erstellt im Hintergrund ein automatisches Backup in BACKUP_DIR, wenn das
+    letzte älter als autoBackup.intervalDays ist, und behält nur die neuesten
+    autoBackup.keep automatischen Backups
     
+    Args:
+        on_finished: Optional, wird danach (oder sofort, wenn kein Backup fällig ist)
+            im Hauptthread aufgerufen
+    """
+    scheduled = False
+    try:
+        settings = dict(DEFAULT_AUTO_BACKUP)
+        settings.update(load_addon_config().get('autoBackup') or {})
+        interval_days = int(settings['intervalDays'])
+        keep = max(1, int(settings['keep']))
+        if interval_days <= 0:
+            return
+        
+        latest = latest_auto_backup_time()
+        if latest and datetime.now() - latest < timedelta(days=interval_days):
+            return
+        
+        backup_path = os.path.join(
+            BACKUP_DIR, f"{AUTO_BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+        )
+        
+        def task():
+            # Eigene Verbindung, da SQLite-Verbindungen an ihren Thread gebunden sind
+            source_conn = sqlite3.connect(DB_PATH)
+            try:
+                copy_database(source_conn, backup_path)
+            finally:
+                source_conn.close()
+            return rotate_backups(keep=keep)
+        
+        def on_done(future):
+            try:
+                removed = future.result()
+                print(f"Study Tracker: Automatisches Backup erstellt: {backup_path}")
+                if removed:
+                    print(f"Study Tracker: {len(removed)} alte automatische Backups gelöscht")
+            except Exception as e:
+                print(f"Study Tracker: Automatisches Backup fehlgeschlagen: {e}")
+                traceback.print_exc()
+            if on_finished:
+                on_finished()
+        
+        mw.taskman.run_in_background(task, on_done)
+        scheduled = True
+    except Exception as e:
+        print(f"Study Tracker: Fehler beim Planen des automatischen Backups: {e}")
+        traceback.print_exc()
+    finally:
+        if not scheduled and on_finished:
+            on_finished()
+
+
+class IntegrityChecker:
+    """
+    Integritätsprüfung der Datenbank mit gespeichertem Ergebnis.
+
+    PRAGMA quick_check dient für Routineprüfungen, das vollständige
+    PRAGMA integrity_check (prüft zusätzlich alle Indizes) läuft nur im
+    Hintergrund. Ergebnis, Zeitpunkt und bei vollständigen Prüfungen die
+    Seitenanzahl stehen in den Einstellungen. Nach einer fehlgeschlagenen
+    Prüfung wird einmalig ein Backup der beschädigten Datenbank angelegt.
+    Ein Fehlschlag der vollständigen Prüfung bleibt bestehen, bis eine
+    vollständige Prüfung (z.B. nach repair) wieder ohne Befund ist, da
+    quick_check Indexfehler nicht erkennt.
+    """
+    STATUS_KEY = "integrity_status"              # 'ok' oder 'failed'
+    FULL_STATUS_KEY = "integrity_full_status"    # Ergebnis der letzten vollständigen Prüfung
+    MESSAGE_KEY = "integrity_message"            # Erste Meldung der letzten Prüfung
+    CHECKED_AT_KEY = "integrity_checked_at"      # Zeitpunkt der letzten Prüfung
+    FULL_CHECK_AT_KEY = "integrity_full_check_at"
+    FULL_CHECK_PAGES_KEY = "integrity_full_check_pages"
+
     def __init__(self, db):
         self.db = db
 
-    def extract_validation_data_for_report(self, deck_id, start_date, end_date):
+    def _run(self, pragma):
+        """Führt eine Prüfung aus und gibt die erste Meldung zurück ('ok' = keine Probleme)"""
+        return self.db.conn.execute(f"PRAGMA {pragma}(1)").fetchone()[0]
+
+    def _record(self, result, full=False):
+        """Speichert das Ergebnis; legt beim ersten Fehlschlag ein Backup an"""
+        ok = result == "ok"
+        was_failed = "failed" in (self.db.get_setting(self.STATUS_KEY), self.db.get_setting(self.FULL_STATUS_KEY))
+        if not ok:
+            print(f"Study Tracker: Datenbank-Integritätsprobleme: {result}")
+            if not was_failed:
+                self.backup_corrupt_database()
+        
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        values = {
+            self.STATUS_KEY: "ok" if ok else "failed",
+            self.MESSAGE_KEY: result,
+            self.CHECKED_AT_KEY: now
+        }
+        if full:
+            values[self.FULL_STATUS_KEY] = values[self.STATUS_KEY]
+        if full and ok:
+            values[self.FULL_CHECK_AT_KEY] = now
+            values[self.FULL_CHECK_PAGES_KEY] = str(self.db.conn.execute("PRAGMA page_count").fetchone()[0])
+        for key, value in values.items():
+            self.db.save_setting(key, value)
+        return ok
+
+    def backup_corrupt_database(self):
+        """Sichert die beschädigte Datenbank schrittweise nach BACKUP_DIR"""
+        try:
+            os.makedirs(BACKUP_DIR, exist_ok=True)
+            backup_path = os.path.join(BACKUP_DIR, f"corrupt_db_backup_{int(time.time())}.db")
+            copy_database(self.db.conn, backup_path)
+            print(f"Study Tracker: Backup der beschädigten Datenbank erstellt: {backup_path}")
+        except Exception as e:
+            print(f"Study Tracker: Backup der beschädigten Datenbank fehlgeschlagen: {e}")
+
+    def quick_check(self):
+        """Schnelle Prüfung ohne Abgleich der Indizes mit den Tabellen"""
+        return self._record(self._run("quick_check"))
+
+    def full_check(self):
+        """Vollständige Prüfung einschließlich aller Indizes (nur lesend)"""
+        return self._record(self._run("integrity_check"), full=True)
+
+    def repair(self):
         """
-        Extrahiert und bereitet Validierungscodes für den Bericht mit 
-        optimierten SQL-Abfragen für bessere Zuverlässigkeit
-        
-        Args:
-            deck_id: ID des Decks
-            start_date: Startdatum im Format YYYY-MM-DD
-            end_date: Enddatum im Format YYYY-MM-DD
-                
+        Baut die Indizes neu auf, schreibt die Datenbank neu und prüft danach
+        vollständig. Nur auf ausdrücklichen Wunsch des Benutzers, da VACUUM
+        die Datenbank exklusiv sperrt.
+
         Returns:
-            list: Liste von aufbereiteten Validierungscode-Dictionaries
+            bool: True, wenn die Datenbank danach in Ordnung ist
         """
+        # Auf andere Verbindungen (z.B. die der Oberfläche) warten statt abzubrechen
+        self.db.conn.execute("PRAGMA busy_timeout = 30000")
         try:
-            print(f"Study Tracker: Extrahiere Validierungscodes für Deck {deck_id}, Zeitraum {start_date} bis {end_date}")
-            
-            # Verwende eine UNION-Abfrage, um alle Information in einer Abfrage zu holen
-            query = """
-            SELECT 
-                v.date, 
-                v.code, 
-                v.correct_percent, 
-                v.difficulty, 
-                v.page_number, 
-                COALESCE(v.chat_link, c.link) as chat_link, 
-                v.card_id, 
-                COALESCE(v.card_title, c.card_title, 'Unbekannte Karte') as card_title
-            FROM validation_codes v
-            LEFT JOIN chat_links c ON v.card_id = c.card_id
-            WHERE v.deck_id = ? AND v.date BETWEEN ? AND ?
-            
-            UNION
-            
-            -- Hole alle ChatGPT-Links, selbst wenn kein Validierungscode existiert
-            SELECT 
-                NULL as date, 
-                NULL as code, 
-                NULL as correct_percent,
-                NULL as difficulty,
-                NULL as page_number,
-                c.link as chat_link,
-                c.card_id,
-                c.card_title
-            FROM chat_links c
-            WHERE c.deck_id = ? 
-            AND c.card_id NOT IN (
-                SELECT card_id FROM validation_codes 
-                WHERE deck_id = ? AND date BETWEEN ? AND ?
-            )
-            ORDER BY date
-            """
+            self.db.conn.execute("REINDEX")
+            self.db.conn.execute("VACUUM")
+        except Exception as e:
+            print(f"Study Tracker: Reparatur der Datenbank fehlgeschlagen: {e}")
+            return False
+        return self.full_check()
+
+    def ensure_usable(self):
+        """
+        Gesperrt, solange die letzte vollständige Prüfung fehlgeschlagen ist;
+        sonst wird nur geprüft, wenn noch nie geprüft wurde oder die letzte
+        schnelle Prüfung fehlschlug
+        """
+        if self.db.get_setting(self.FULL_STATUS_KEY) == "failed":
+            return False
+        if self.db.get_setting(self.STATUS_KEY) == "ok":
+            return True
+        return self.quick_check()
+
+    def full_check_due(self, interval_days, now=None):
+        """Ob die letzte vollständige Prüfung älter als interval_days ist"""
+        if interval_days <= 0:
+            return False
+        last = self.db.get_setting(self.FULL_CHECK_AT_KEY)
+        if not last:
+            return True
+        try:
+            last_time = datetime.strptime(last, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return True
+        return (now or datetime.now()) - last_time >= timedelta(days=interval_days)
+
+
+def schedule_integrity_check():
+    """
+    Startet die vollständige Integritätsprüfung im Hintergrund, wenn sie
+    fällig ist (integrityCheck.fullCheckDays) und Anki im Leerlauf ist:
+    frühestens nach integrityCheck.idleSeconds, nicht während der
+    Wiederholung und nicht während andere Vorgänge laufen
+    """
+    try:
+        settings = dict(DEFAULT_INTEGRITY_CHECK)
+        settings.update(load_addon_config().get('integrityCheck') or {})
+        interval_days = int(settings['fullCheckDays'])
+        idle_ms = max(1, int(settings['idleSeconds'])) * 1000
+        if interval_days <= 0:
+            return
+        
+        db = Database()
+        try:
+            due = IntegrityChecker(db).full_check_due(interval_days)
+        finally:
+            db.close()
+        if not due:
+            return
+        
+        def task():
+            # Eigene Verbindung, da SQLite-Verbindungen an ihren Thread gebunden sind
+            task_db = Database()
+            try:
+                return IntegrityChecker(task_db).full_check()
+            finally:
+                task_db.close()
+        
+        def on_done(future):
+            try:
+                if future.result():
+                    print("Study Tracker: Vollständige Integritätsprüfung ohne Befund")
+                else:
+                    print("Study Tracker: Integritätsprüfung fehlgeschlagen, Berichte sind bis zur Reparatur gesperrt")
+            except Exception as e:
+                print(f"Study Tracker: Fehler bei der Integritätsprüfung: {e}")
+                traceback.print_exc()
+        
+        def start_when_idle():
+            try:
+                progress = getattr(mw, 'progress', None)
+                if mw.state == 'review' or (progress and progress.busy()):
+                    QTimer.singleShot(idle_ms, start_when_idle)
+                    return
+                mw.taskman.run_in_background(task, on_done)
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Starten der Integritätsprüfung: {e}")
+        
+        QTimer.singleShot(idle_ms, start_when_idle)
+    except Exception as e:
+        print(f"Study Tracker: Fehler beim Planen der Integritätsprüfung: {e}")
+        traceback.print_exc()
+
+
+class RawDataExporter:
+    """
+    Exportiert die Rohdaten (Tagesstatistiken, gelernte Karten, Validierungscodes,
+    Level-Historie) als CSV oder JSON Lines, optional gzip-komprimiert.
+
+    Die Zeilen werden direkt aus dem Cursor in die Dateien geschrieben, der
+    Speicherbedarf hängt daher nicht von der Tabellengröße ab. Im inkrementellen
+    Modus werden nur Zeilen von Tagen exportiert, die sich seit dem letzten
+    Export geändert haben; maßgeblich ist die Datenversion (data_versions).
+    Geänderte Tage im Zeitraum des Exports stehen unter changed_days und werden
+    vollständig exportiert: Der Empfänger ersetzt für jeden dieser Tage alle
+    Zeilen (des Decks) einer Tabelle durch die exportierten. Tage ohne Zeilen
+    stehen je Tabelle unter deleted_days, deren Zeilen sind zu löschen. Die
+    Datenversion wird pro Tag geführt, changed_days kann daher auch Tage
+    enthalten, die sich nur in anderen Decks geändert haben; das Ersetzen
+    ändert für sie nichts. Verdichtete Zeiträume ohne einzelne gelernte Karten
+    stehen mit ihren Kennzahlen unter summarized_periods.
+    """
+    WATERMARK_KEY = "export_watermark_{name}"
+
+    def __init__(self, db, progress_callback=None, cancel_token=None):
+        self.db = db
+        self.progress_callback = progress_callback
+        self.cancel_token = cancel_token
+
+    def _report_progress(self, value, label=None):
+        if self.progress_callback:
+            self.progress_callback(value, label)
+
+    def _check_cancelled(self):
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+    def get_watermark(self, name):
+        """Liefert die Datenversion des letzten Exports oder None"""
+        return self.db.get_int_setting(self.WATERMARK_KEY.format(name=name))
+
+    def _open_output(self, path, compress):
+        """Öffnet eine Ausgabedatei als Textstrom, bei Bedarf gzip-komprimiert"""
+        if compress:
+            return gzip.open(path, 'wt', encoding='utf-8', newline='')
+        return open(path, 'w', encoding='utf-8', newline='')
+
+    def _changed_days(self, since_version, start_date=None, end_date=None):
+        """Tage im Zeitraum, deren Daten sich seit der angegebenen Version geändert haben"""
+        query = """
+            SELECT scope FROM data_versions
+            WHERE scope NOT IN ('global', 'undated') AND version > ?
+        """
+        params = [since_version]
+        if start_date:
+            query += " AND scope >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND scope <= ?"
+            params.append(end_date)
+        cursor = self.db.conn.execute(query + " ORDER BY scope", params)
+        return [row[0] for row in cursor.fetchall()]
+
+    def export(self, directory, fmt="csv", compress=False, deck_id=None, start_date=None,
+               end_date=None, incremental=False, name=None, tables=EXPORT_TABLES):
+        """
+        Exportiert die gewählten Tabellen in einen Ordner
+
+        Args:
+            directory: Zielordner
+            fmt: "csv" oder "jsonl"
+            compress: Dateien gzip-komprimiert schreiben (.gz)
+            deck_id: Optional, nur Zeilen dieses Decks
+            start_date: Optional, erster Tag (YYYY-MM-DD)
+            end_date: Optional, letzter Tag (YYYY-MM-DD)
+            incremental: Nur seit dem letzten Export geänderte Tage exportieren
+            name: Name des Exports, unter dem das Wasserzeichen gespeichert wird;
+                  ohne Angabe aus Deck und Zeitraum gebildet, damit gefilterte
+                  Exporte sich nicht gegenseitig fortschreiben
+            tables: Zu exportierende Tabellen
+
+        Returns:
+            dict: Manifest mit Dateien, Zeilenzahlen und neuem Wasserzeichen
+
+        Raises:
+            OperationCancelledError: Wenn der Benutzer den Vorgang abgebrochen hat
+        """
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unbekanntes Exportformat: {fmt}")
+
+        if name is None:
+            name = f"{deck_id or 'all'}_{start_date or ''}_{end_date or ''}"
+        
+        # Die Version vor dem Lesen festhalten: Änderungen während des Exports
+        # werden beim nächsten inkrementellen Export erneut erfasst
+        watermark = self.db.get_data_version()
+        since_version = None
+        if incremental:
+            since_version = self.get_watermark(name)
+            # Nach einem Backup-Import kann der Zähler kleiner sein; dann vollständig exportieren
+            if since_version is not None and watermark is not None and since_version > watermark:
+                since_version = None
+
+        os.makedirs(directory, exist_ok=True)
+        stamp = base_stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        suffix = 2
+        while os.path.exists(os.path.join(directory, f"manifest_{stamp}.json")):
+            stamp = f"{base_stamp}-{suffix}"
+            suffix += 1
+        extension = fmt + (".gz" if compress else "")
+
+        manifest = {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'format': fmt,
+            'compressed': compress,
+            'deck_id': deck_id,
+            'start_date': start_date,
+            'end_date': end_date,
+            'incremental': since_version is not None,
+            'since_version': since_version,
+            'watermark': watermark,
+            'changed_days': self._changed_days(since_version, start_date, end_date) if since_version is not None else None,
+            'files': {}
+        }
+        if 'studied_cards' in tables:
+            # Verdichtete Zeiträume haben keine Zeilen in studied_cards mehr
+            manifest['summarized_periods'] = self.db.get_studied_card_summaries(deck_id, start_date, end_date)
+
+        for table_index, table in enumerate(tables):
+            self._check_cancelled()
+            self._report_progress(int(100 * table_index / len(tables)), f"Exportiere {table}...")
+
+            file_name = f"{table}_{stamp}.{extension}"
+            path = os.path.join(directory, file_name)
+            temp_path = path + ".tmp"
+            columns, rows = self.db.iter_export_rows(table, deck_id, start_date, end_date, since_version)
+
+            row_count = 0
+            try:
+                with self._open_output(temp_path, compress) as f:
+                    if fmt == "csv":
+                        writer = csv.writer(f)
+                        writer.writerow(columns)
+                        for row in rows:
+                            writer.writerow(row)
+                            row_count += 1
+                            if row_count % EXPORT_BATCH_SIZE == 0:
+                                self._check_cancelled()
+                    else:
+                        for row in rows:
+                            f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=str))
+                            f.write("\n")
+                            row_count += 1
+                            if row_count % EXPORT_BATCH_SIZE == 0:
+                                self._check_cancelled()
+                os.replace(temp_path, path)
+            except BaseException:
+                rows.close()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+            manifest['files'][table] = {'file': file_name, 'rows': row_count}
+            if since_version is not None:
+                # Geänderte Tage ohne exportierte Zeilen: beim Empfänger löschen
+                exported_days = self.db.get_export_days(table, deck_id, start_date, end_date, since_version)
+                manifest['files'][table]['deleted_days'] = [
+                    day for day in manifest['changed_days'] if day not in exported_days
+                ]
+            print(f"Study Tracker: {row_count} Zeilen aus {table} exportiert")
+
+        with open(os.path.join(directory, f"manifest_{stamp}.json"), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # Wasserzeichen erst nach erfolgreichem Export fortschreiben
+        if watermark is not None:
+            self.db.save_setting(self.WATERMARK_KEY.format(name=name), str(watermark))
+
+        self._report_progress(100, "Export abgeschlossen")
+        return manifest
+
+class CachedReportData:
+    """
+    Caching-Klasse für Berichtsdaten
+    
+    Einträge werden zusammen mit einer Datenversion gespeichert und nur
+    zurückgegeben, wenn die Version noch übereinstimmt. Im Speicher werden
+    die zuletzt verwendeten Einträge gehalten (LRU); optional werden sie
+    zusätzlich als JSON-Dateien auf der Festplatte abgelegt.
+    """
+    def __init__(self, max_entries=64, disk_dir=None, max_disk_entries=256, max_age=None):
+        self.cache = OrderedDict()
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self.max_age = max_age  # Optionale Lebensdauer in Sekunden
+        self.lock = threading.Lock()
+    
+    def _disk_path(self, key):
+        """Liefert den Dateipfad für einen Cache-Schlüssel"""
+        key_hash = hashlib.sha1(json.dumps(key, default=str).encode('utf-8')).hexdigest()
+        return os.path.join(self.disk_dir, f"{key_hash}.json")
+    
+    def _is_valid(self, timestamp, entry_version, version):
+        """Prüft Version und Alter eines Eintrags"""
+        if version is not None and entry_version != version:
+            return False
+        if self.max_age is not None and time.time() - timestamp >= self.max_age:
+            return False
+        return True
+    
+    def get(self, key, version=None):
+        """Holt gecachte Daten, falls vorhanden, aktuell und nicht zu alt"""
+        with self.lock:
+            if key in self.cache:
+                timestamp, entry_version, data = self.cache[key]
+                if self._is_valid(timestamp, entry_version, version):
+                    self.cache.move_to_end(key)
+                    return data
+                del self.cache[key]
+        
+        if not self.disk_dir:
+            return None
+        
+        try:
+            path = self._disk_path(key)
+            if not os.path.exists(path):
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if entry.get('key') != json.loads(json.dumps(key, default=str)):
+                return None
+            if not self._is_valid(entry.get('timestamp', 0), entry.get('version'), version):
+                os.remove(path)
+                return None
+            
+            # In den Speicher übernehmen
+            self._store_in_memory(key, entry.get('timestamp', time.time()), entry.get('version'), entry['data'])
+            return entry['data']
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Lesen des Berichts-Caches: {e}")
+            return None
+    
+    def _store_in_memory(self, key, timestamp, version, data):
+        """Legt einen Eintrag im Speicher ab und verdrängt den ältesten bei Bedarf"""
+        with self.lock:
+            self.cache[key] = (timestamp, version, data)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+    
+    def set(self, key, data, version=None):
+        """Speichert Daten im Cache"""
+        timestamp = time.time()
+        self._store_in_memory(key, timestamp, version, data)
+        
+        if not self.disk_dir:
+            return
+        
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            path = self._disk_path(key)
+            temp_path = path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'key': key,
+                    'version': version,
+                    'timestamp': timestamp,
+                    'data': data
+                }, f, default=str)
+            os.replace(temp_path, path)
+            self._evict_disk_entries()
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Schreiben des Berichts-Caches: {e}")
+    
+    def _evict_disk_entries(self):
+        """Entfernt die am längsten nicht geschriebenen Dateien, wenn das Limit überschritten ist"""
+        files = [
+            os.path.join(self.disk_dir, name)
+            for name in os.listdir(self.disk_dir)
+            if name.endswith(".json")
+        ]
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        
+    def invalidate(self, key=None):
+        """Entfernt spezifische oder alle Cache-Einträge"""
+        with self.lock:
+            if key:
+                if key in self.cache:
+                    del self.cache[key]
+            else:
+                self.cache.clear()
+        
+        if not self.disk_dir or not os.path.isdir(self.disk_dir):
+            return
+        
+        try:
+            if key:
+                path = self._disk_path(key)
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".json"):
+                        os.remove(os.path.join(self.disk_dir, name))
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Leeren des Berichts-Caches: {e}")
+
+# Gemeinsamer Cache für gesammelte Berichtsdaten
+report_data_cache = CachedReportData(disk_dir=REPORT_CACHE_DIR)
+
+# Farbpalette und Abstände der im Bericht verwendeten Tailwind-Utilities (Tailwind 2.2)
+TAILWIND_COLORS = {
+    'white': '#ffffff',
+    'gray-50': '#f9fafb', 'gray-100': '#f3f4f6', 'gray-200': '#e5e7eb', 'gray-300': '#d1d5db',
+    'gray-400': '#9ca3af', 'gray-500': '#6b7280', 'gray-600': '#4b5563', 'gray-700': '#374151',
+    'gray-800': '#1f2937', 'gray-900': '#111827',
+    'blue-50': '#eff6ff', 'blue-100': '#dbeafe', 'blue-200': '#bfdbfe', 'blue-300': '#93c5fd',
+    'blue-500': '#3b82f6', 'blue-600': '#2563eb', 'blue-700': '#1d4ed8', 'blue-800': '#1e40af',
+    'green-50': '#ecfdf5', 'green-100': '#d1fae5', 'green-500': '#10b981', 'green-600': '#059669',
+    'green-700': '#047857', 'green-800': '#065f46',
+    'red-50': '#fef2f2', 'red-100': '#fee2e2', 'red-500': '#ef4444', 'red-600': '#dc2626',
+    'red-700': '#b91c1c', 'red-800': '#991b1b',
+    'yellow-50': '#fffbeb', 'yellow-100': '#fef3c7', 'yellow-500': '#f59e0b', 'yellow-600': '#d97706',
+    'yellow-700': '#b45309', 'yellow-800': '#92400e',
+}
+
+TAILWIND_SPACING = {
+    '0': '0px', '1': '.25rem', '2': '.5rem', '3': '.75rem', '4': '1rem', '5': '1.25rem',
+    '6': '1.5rem', '8': '2rem', '10': '2.5rem', '12': '3rem',
+}
+
+TAILWIND_FONT_SIZES = {
+    'xs': ('.75rem', '1rem'), 'sm': ('.875rem', '1.25rem'), 'base': ('1rem', '1.5rem'),
+    'lg': ('1.125rem', '1.75rem'), 'xl': ('1.25rem', '1.75rem'), '2xl': ('1.5rem', '2rem'),
+    '3xl': ('1.875rem', '2.25rem'),
+}
+
+TAILWIND_BREAKPOINTS = {'sm': '640px', 'md': '768px', 'lg': '1024px', 'xl': '1280px'}
+
+# Minimaler Basisstil (Auszug aus dem Tailwind-Preflight)
+TAILWIND_PREFLIGHT = """
+*,::before,::after{box-sizing:border-box;border-width:0;border-style:solid;border-color:#e5e7eb}
+html{line-height:1.5;-webkit-text-size-adjust:100%;font-family:ui-sans-serif,system-ui,-apple-system,"Segoe UI",Roboto,"Helvetica Neue",Arial,sans-serif}
+body{margin:0;font-family:inherit;line-height:inherit}
+h1,h2,h3,h4,h5,h6{font-size:inherit;font-weight:inherit;margin:0}
+p{margin:0}
+table{text-indent:0;border-color:inherit;border-collapse:collapse}
+button{font-family:inherit;font-size:100%;line-height:inherit;color:inherit;margin:0;padding:0;background-color:transparent;background-image:none;cursor:pointer}
+a{color:inherit;text-decoration:inherit}
+svg{display:block;vertical-align:middle}
+"""
+
+def _build_tailwind_utilities():
+    """
+    Baut die Zuordnung Tailwind-Klasse -> CSS-Deklarationen für die vom Bericht
+    verwendeten Utilities auf. Klassen, die auf Kindelemente wirken (divide-*,
+    space-*), werden mit dem Präfix '>' markiert.
+    """
+    utilities = {
+        'container': 'width:100%',
+        'block': 'display:block', 'inline-block': 'display:inline-block',
+        'flex': 'display:flex', 'inline-flex': 'display:inline-flex',
+        'grid': 'display:grid', 'hidden': 'display:none',
+        'items-center': 'align-items:center', 'justify-between': 'justify-content:space-between',
+        'justify-center': 'justify-content:center',
+        'mx-auto': 'margin-left:auto;margin-right:auto',
+        'w-full': 'width:100%', 'min-w-full': 'min-width:100%',
+        'overflow-hidden': 'overflow:hidden', 'overflow-x-auto': 'overflow-x:auto',
+        'cursor-pointer': 'cursor:pointer', 'whitespace-nowrap': 'white-space:nowrap',
+        'truncate': 'overflow:hidden;text-overflow:ellipsis;white-space:nowrap',
+        'border': 'border-width:1px', 'border-t': 'border-top-width:1px', 'border-b': 'border-bottom-width:1px',
+        'rounded': 'border-radius:.25rem', 'rounded-md': 'border-radius:.375rem',
+        'rounded-lg': 'border-radius:.5rem', 'rounded-full': 'border-radius:9999px',
+        'shadow-sm': 'box-shadow:0 1px 2px 0 rgba(0,0,0,.05)',
+        'shadow': 'box-shadow:0 1px 3px 0 rgba(0,0,0,.1),0 1px 2px 0 rgba(0,0,0,.06)',
+        'shadow-md': 'box-shadow:0 4px 6px -1px rgba(0,0,0,.1),0 2px 4px -1px rgba(0,0,0,.06)',
+        'font-normal': 'font-weight:400', 'font-medium': 'font-weight:500',
+        'font-semibold': 'font-weight:600', 'font-bold': 'font-weight:700',
+        'font-mono': 'font-family:ui-monospace,SFMono-Regular,Menlo,Monaco,Consolas,monospace',
+        'italic': 'font-style:italic', 'uppercase': 'text-transform:uppercase',
+        'tracking-wider': 'letter-spacing:.05em', 'underline': 'text-decoration:underline',
+        'text-left': 'text-align:left', 'text-center': 'text-align:center', 'text-right': 'text-align:right',
+        'divide-y': '>border-top-width:1px;border-bottom-width:0',
+    }
+    
+    for size, (font_size, line_height) in TAILWIND_FONT_SIZES.items():
+        utilities[f'text-{size}'] = f'font-size:{font_size};line-height:{line_height}'
+    
+    for name, color in TAILWIND_COLORS.items():
+        utilities[f'bg-{name}'] = f'background-color:{color}'
+        utilities[f'text-{name}'] = f'color:{color}'
+        utilities[f'border-{name}'] = f'border-color:{color}'
+        utilities[f'divide-{name}'] = f'>border-color:{color}'
+    
+    sides = {
+        '': ('',), 'x': ('-left', '-right'), 'y': ('-top', '-bottom'),
+        't': ('-top',), 'b': ('-bottom',), 'l': ('-left',), 'r': ('-right',),
+    }
+    for key, value in TAILWIND_SPACING.items():
+        for prefix, css_property in (('p', 'padding'), ('m', 'margin')):
+            for side, suffixes in sides.items():
+                utilities[f'{prefix}{side}-{key}'] = ';'.join(f'{css_property}{suffix}:{value}' for suffix in suffixes)
+        utilities[f'gap-{key}'] = f'gap:{value}'
+        utilities[f'w-{key}'] = f'width:{value}'
+        utilities[f'h-{key}'] = f'height:{value}'
+        utilities[f'space-x-{key}'] = f'>margin-left:{value}'
+        utilities[f'space-y-{key}'] = f'>margin-top:{value}'
+    
+    for columns in range(1, 5):
+        utilities[f'grid-cols-{columns}'] = f'grid-template-columns:repeat({columns},minmax(0,1fr))'
+    
+    return utilities
+
+TAILWIND_UTILITIES = _build_tailwind_utilities()
+
+class ReportAssets:
+    """
+    Erzeugt die eingebetteten Stylesheets und Skripte der Berichte
+    
+    Statt des Tailwind-CDN wird nur das CSS der tatsächlich verwendeten
+    Klassen erzeugt und zusammen mit dem Berichtsstil minifiziert. Erzeugte
+    Assets werden im Speicher und im Add-on-Ordner abgelegt und über einen
+    Hash ihres Inhalts wiederverwendet.
+    """
+    CLASS_PATTERN = re.compile(r'class="([^"]*)"')
+    
+    def __init__(self, asset_dir=None, max_files=64):
+        self.asset_dir = asset_dir
+        self.max_files = max_files
+        self.assets = {}
+        self.lock = threading.Lock()
+    
+    def collect_classes(self, html):
+        """Sammelt alle im HTML (einschließlich Skript-Vorlagen) verwendeten Klassen"""
+        classes = set()
+        for class_list in self.CLASS_PATTERN.findall(html):
+            classes.update(class_list.split())
+        return classes
+    
+    @staticmethod
+    def _escape_class(class_name):
+        """Maskiert Sonderzeichen eines Klassennamens für CSS-Selektoren"""
+        return re.sub(r'([:.\/])', r'\\\1', class_name)
+    
+    def _utility_rule(self, class_name, utility, pseudo=""):
+        """Erzeugt die CSS-Regel für eine einzelne Utility-Klasse"""
+        selector = "." + self._escape_class(class_name) + pseudo
+        if utility.startswith('>'):
+            return f"{selector}>:not([hidden])~:not([hidden]){{{utility[1:]}}}"
+        return f"{selector}{{{utility}}}"
+    
+    def build_utility_css(self, classes):
+        """
+        Erzeugt das CSS für die verwendeten Tailwind-Klassen
+        
+        Args:
+            classes: Menge der im Bericht verwendeten Klassennamen
+            
+        Returns:
+            str: CSS in der Reihenfolge Basis-Utilities, hover-Varianten, Breakpoints
+        """
+        base_rules = []
+        hover_rules = []
+        media_rules = {breakpoint: [] for breakpoint in TAILWIND_BREAKPOINTS}
+        
+        # Reihenfolge der Utility-Tabelle beibehalten, damit die Kaskade stabil bleibt
+        for name, utility in TAILWIND_UTILITIES.items():
+            if name in classes:
+                base_rules.append(self._utility_rule(name, utility))
+            if f"hover:{name}" in classes:
+                hover_rules.append(self._utility_rule(f"hover:{name}", utility, ":hover"))
+            for breakpoint in TAILWIND_BREAKPOINTS:
+                if f"{breakpoint}:{name}" in classes:
+                    media_rules[breakpoint].append(self._utility_rule(f"{breakpoint}:{name}", utility))
+        
+        css = "".join(base_rules) + "".join(hover_rules)
+        for breakpoint, width in TAILWIND_BREAKPOINTS.items():
+            rules = media_rules[breakpoint]
+            if "container" in classes:
+                rules.insert(0, f".container{{max-width:{width}}}")
+            if rules:
+                css += f"@media (min-width:{width}){{{''.join(rules)}}}"
+        return css
+    
+    @staticmethod
+    def minify_css(css):
+        """Entfernt Kommentare und überflüssige Leerzeichen aus CSS"""
+        css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+        css = re.sub(r'\s+', ' ', css)
+        css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+        css = re.sub(r'\s*:\s*(?=[^{}]*;|[^{}]*})', ':', css)
+        return css.replace(';}', '}').strip()
+    
+    @staticmethod
+    def minify_js(js):
+        """
+        Minifiziert JavaScript konservativ: Blockkommentare, ganze Kommentarzeilen,
+        Einrückung und Leerzeilen werden entfernt, Zeilenumbrüche bleiben erhalten
+        """
+        js = re.sub(r'/\*.*?\*/', '', js, flags=re.S)
+        lines = []
+        for line in js.splitlines():
+            line = line.strip()
+            if not line or line.startswith('//'):
+                continue
+            lines.append(line)
+        return "\n".join(lines)
+    
+    def _cached(self, kind, source, build):
+        """Liefert ein Asset aus dem Speicher, aus dem Asset-Ordner oder erzeugt es neu"""
+        asset_hash = hashlib.sha1((VERSION + "\0" + source).encode('utf-8')).hexdigest()[:16]
+        cache_key = f"{kind}-{asset_hash}"
+        
+        with self.lock:
+            if cache_key in self.assets:
+                return self.assets[cache_key]
+        
+        path = os.path.join(self.asset_dir, f"{cache_key}.{kind}") if self.asset_dir else None
+        content = None
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Lesen des Bericht-Assets {path}: {e}")
+        
+        if content is None:
+            content = build()
+            if path:
+                try:
+                    os.makedirs(self.asset_dir, exist_ok=True)
+                    temp_path = path + ".tmp"
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.write(content)
+                    os.replace(temp_path, path)
+                    self._evict_files()
+                except Exception as e:
+                    print(f"Study Tracker: Fehler beim Schreiben des Bericht-Assets {path}: {e}")
+        
+        with self.lock:
+            self.assets[cache_key] = content
+        return content
+    
+    def _evict_files(self):
+        """Entfernt die ältesten Asset-Dateien, wenn das Limit überschritten ist"""
+        files = [
+            os.path.join(self.asset_dir, name)
+            for name in os.listdir(self.asset_dir)
+            if name.endswith((".css", ".js"))
+        ]
+        if len(files) <= self.max_files:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    def stylesheet(self, html, report_css=""):
+        """
+        Liefert das minifizierte Stylesheet für einen Bericht
+        
+        Args:
+            html: Fertiges Berichts-HTML, aus dem die verwendeten Klassen gelesen werden
+            report_css: Berichtsspezifische CSS-Regeln
+            
+        Returns:
+            str: Minifiziertes CSS aus Basisstil, Utilities und Berichtsstil
+        """
+        classes = sorted(self.collect_classes(html))
+        source = " ".join(classes) + "\0" + report_css
+        return self._cached("css", source, lambda: self.minify_css(
+            TAILWIND_PREFLIGHT + self.build_utility_css(set(classes)) + report_css
+        ))
+    
+    def script(self, js):
+        """Liefert die minifizierte Fassung eines statischen Berichtsskripts"""
+        return self._cached("js", js, lambda: self.minify_js(js))
+
+# Gemeinsame Asset-Erzeugung für alle Berichte
+report_assets = ReportAssets(asset_dir=REPORT_ASSET_DIR)
+
+class CollectionSnapshot:
+    """
+    Stand der Anki-Sammlung für Berichte, die im Hintergrund erstellt werden.
+    Die Sammlung darf nur im Hauptthread gelesen werden; capture erfasst daher
+    vorab Decknamen, Deck und Titel der verfolgten Karten sowie die Notizen
+    mit Validierungscodes.
+    """
+    
+    def __init__(self, deck_names=None, cards=None, validation_notes=None):
+        self.deck_names = deck_names or {}
+        # card_id -> (deck_id, Titel)
+        self.cards = cards or {}
+        # Einträge aus StudyStatisticsCollector.read_validation_notes, None = nicht erfasst
+        self.validation_notes = validation_notes
+    
+    @classmethod
+    def capture(cls, db):
+        """
+        Liest den Stand der Sammlung; nur im Hauptthread aufrufen
+        
+        Args:
+            db: Datenbankverbindung des Hauptthreads
+            
+        Returns:
+            CollectionSnapshot: Leer, wenn die Sammlung nicht verfügbar ist
+        """
+        if not collection_accessible():
+            return cls()
+        
+        deck_names = cls.read_deck_names()
+        # Decknamen auch speichern, damit Backups sie für Sammelberichte mitbringen
+        db.save_deck_names(deck_names)
+        
+        try:
+            cards = cls.read_cards(db.get_tracking_card_ids())
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Lesen der Karten: {e}")
+            cards = {}
+        
+        try:
+            validation_notes = StudyStatisticsCollector(db).read_validation_notes()
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Lesen der Validierungscodes: {e}")
+            validation_notes = None
+        
+        return cls(deck_names, cards, validation_notes)
+    
+    @staticmethod
+    def read_deck_names():
+        """Decknamen der Sammlung als Dictionary deck_id -> Name (Hauptthread)"""
+        try:
+            return {deck['id']: deck['name'] for deck in mw.col.decks.all()}
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Abrufen der Decknamen: {e}")
+            return {}
+    
+    @staticmethod
+    def read_cards(card_ids):
+        """Deck und Titel der angegebenen Karten als card_id -> (deck_id, Titel) (Hauptthread)"""
+        cards = {}
+        for card_id in card_ids:
+            try:
+                card = mw.col.get_card(int(card_id))
+                if card:
+                    cards[card_id] = (card.did, note_title(card.note()))
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Tracking der Karte {card_id}: {e}")
+        return cards
+
+
+class ReportGenerator:
+    """Verbesserte Klasse zur Generierung von HTML-Berichten mit robuster Datenanbindung"""
+    
+    def __init__(self, db, progress_callback=None, cancel_token=None, cache=None, collection=None):
+        self.db = db
+        self.progress_callback = progress_callback
+        self.cancel_token = cancel_token
+        self.cache = cache if cache is not None else report_data_cache
+        # CollectionSnapshot aus dem Hauptthread, wenn der Bericht im Hintergrund entsteht
+        self.collection = collection
+        # Temporärer Ordner mit Arbeitskopien der Schüler-Backups eines Sammelberichts
+        self.student_copy_dir = None
+
+    def _report_progress(self, value, label):
+        """Meldet den Fortschritt an den Aufrufer, falls ein Callback gesetzt ist"""
+        if self.progress_callback:
+            self.progress_callback(value, label)
+
+    def _check_cancelled(self):
+        """Bricht die Berichtserstellung ab, wenn der Benutzer dies angefordert hat"""
+        if self.cancel_token:
+            self.cancel_token.raise_if_cancelled()
+
+    def get_deck_name(self, deck_id):
+        """
+        Deckname für den Bericht. Schüler-Backups bringen ihre eigenen Decknamen mit;
+        fehlen sie (ältere Backups), wird die Deck-ID angezeigt.
+        """
+        if getattr(self.db, 'source_path', None):
+            return self.db.get_deck_names().get(deck_id) or f"Deck {deck_id}"
+        
+        deck_name = None
+        if self.collection is not None:
+            deck_name = self.collection.deck_names.get(deck_id)
+        elif collection_accessible():
+            try:
+                deck = mw.col.decks.get(deck_id)
+                if deck:
+                    deck_name = deck['name']
+            except Exception as e:
+                print(f"Study Tracker: Fehler beim Abrufen des Decknamens: {e}")
+        return deck_name or self.db.get_deck_names().get(deck_id) or "Unbekannter Stapel"
+
+    def extract_validation_data_for_report(self, deck_id, start_date, end_date):
+        """
+        Extrahiert und bereitet Validierungscodes für den Bericht mit 
+        optimierten SQL-Abfragen für bessere Zuverlässigkeit
+        
+        Args:
+            deck_id: ID des Decks
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+                
+        Returns:
+            list: Liste von aufbereiteten Validierungscode-Dictionaries
+        """
+        try:
+            print(f"Study Tracker: Extrahiere Validierungscodes für Deck {deck_id}, Zeitraum {start_date} bis {end_date}")
+            
+            # Verwende eine UNION-Abfrage, um alle Information in einer Abfrage zu holen
+            query = VALIDATION_CODES_BY_DECK_RANGE_SQL
             
             # Führe die Abfrage mit allen notwendigen Parametern aus
-            params = (deck_id, start_date, end_date, deck_id, deck_id, start_date, end_date)
+            start_day, end_day = day_number(start_date), day_number(end_date)
+            params = (deck_id, start_day, end_day, deck_id, deck_id, start_day, end_day)
             
             # Verwende Timeout für lange Abfragen
             cursor = self.execute_with_timeout(self.db.conn, query, params)
@@ -3136,8 +7029,8 @@ class ReportGenerator:
             cursor = self.db.conn.execute("""
                 SELECT date, code, card_id, card_title, chat_link
                 FROM validation_codes
-                WHERE date BETWEEN ? AND ?
-            """, (start_date, end_date))
+                WHERE day_num BETWEEN ? AND ?
+            """, (day_number(start_date), day_number(end_date)))
             
             results = cursor.fetchall()
             print(f"Study Tracker: Alternative Abfrage fand {len(results)} Validierungscodes")
@@ -3150,7 +7043,7 @@ class ReportGenerator:
                         chat_link = result[4] if len(result) > 4 and result[4] else None
                         
                         # Prüfe, ob die Karte zum ausgewählten Deck gehört
-                        if mw and mw.col:
+                        if collection_accessible():
                             try:
                                 card = mw.col.get_card(int(card_id))
                                 if card and card.did != deck_id:
@@ -3212,14 +7105,7 @@ class ReportGenerator:
         
         try:
             # Hole Deckname
-            deck_name = "Unbekannter Stapel"
-            if mw and mw.col:
-                try:
-                    deck = mw.col.decks.get(deck_id)
-                    if deck:
-                        deck_name = deck['name']
-                except Exception as e:
-                    print(f"Study Tracker: Fehler beim Abrufen des Decknamens: {e}")
+            deck_name = self.get_deck_name(deck_id)
             
             # NEU: Aktualisiere Validierungscodes und ChatGPT-Links vor der Berichterstellung
             try:
@@ -3271,6 +7157,12 @@ class ReportGenerator:
             
             # Konvertiere in JSON-Format für JavaScript
             validation_data_json = json.dumps(validation_data)
+            
+            # Validierungscodes einmalig nach Karte indexieren
+            codes_by_card = self.index_validation_codes(validation_data)
+            
+            level_history = self.get_level_history_direct(deck_id, start_date, end_date)
+            level_history_json = json.dumps(level_history)
 
             # Debug-Ausgabe, um die Daten zu überprüfen
             print(f"Level history raw data: {level_history[:2] if level_history else 'None'}")
@@ -3288,17 +7180,7 @@ class ReportGenerator:
                     date_str = current_date.strftime("%Y-%m-%d")
                     
                     # NEU: Direkte SQL-Abfrage für alle gelernten Karten dieses Tages mit Details
-                    cursor = self.db.conn.execute("""
-                        SELECT 
-                            s.card_id, 
-                            s.deck_id, 
-                            s.review_time, 
-                            c.link as chat_link,
-                            (SELECT card_title FROM validation_codes WHERE card_id = s.card_id LIMIT 1) as card_title
-                        FROM studied_cards s
-                        LEFT JOIN chat_links c ON s.card_id = c.card_id
-                        WHERE s.date = ? AND s.deck_id = ?
-                    """, (date_str, deck_id))
+                    cursor = self.db.conn.execute(STUDIED_CARDS_BY_DAY_SQL, (date_str, deck_id))
                     
                     day_cards = cursor.fetchall()
                     
@@ -3316,7 +7198,7 @@ class ReportGenerator:
                                 card_title = ValidationCodeHandler(self.db).get_card_title(card_id)
                                 
                                 # Fallback: Versuche Titel aus der Anki-Datenbank zu holen
-                                if not card_title and mw and mw.col:
+                                if not card_title and collection_accessible():
                                     try:
                                         card = mw.col.get_card(int(card_id))
                                         if card:
@@ -3338,7 +7220,7 @@ class ReportGenerator:
                                 chat_link = chat_links.get(card_id)
                             
                             # Finde zugehörige Validierungscodes für die Karte
-                            card_validation_codes = [v for v in validation_data if str(v['cardId']) == card_id]
+                            card_validation_codes = list(codes_by_card.get(card_id, []))
                             
                             # Mehr Debug-Informationen
                             if card_validation_codes:
@@ -3430,17 +7312,93 @@ class ReportGenerator:
                 card_codes.append(code_data)
         
         return card_codes
-
-    def get_level_history_direct(self, deck_id, start_date, end_date):
-        """
-        Fragt die Level-Historie direkt aus der Datenbank ab, ohne Umwandlung in JSON
-        Verbesserte Version mit detaillierter Fehlerbehandlung und Debug-Ausgaben
+    
+    def build_day_index(self, cards_dict):
         """
-        try:
-            print(f"Study Tracker: Direct DB Query - Hole Level-Historie für Deck {deck_id}")
-            print(f"  - Zeitraum: {start_date} bis {end_date}")
+        Baut einen inversen Index Datum -> Karten-IDs auf, damit die Tagesdetails
+        nicht für jeden Tag alle Karten durchsuchen müssen
+        
+        Args:
+            cards_dict: Dictionary aus load_all_cards_with_data
             
-            # Sicherstellen, dass deck_id ein Integer ist
+        Returns:
+            dict: Datum (YYYY-MM-DD) -> Liste der an diesem Tag gelernten Karten-IDs
+        """
+        cards_by_date = {}
+        for card_id, card_data in cards_dict.items():
+            for studied_date in card_data['studied_dates']:
+                cards_by_date.setdefault(studied_date, []).append(card_id)
+        return cards_by_date
+    
+    def index_validation_codes(self, validation_data):
+        """
+        Baut einen inversen Index Karten-ID -> Validierungscodes auf
+        
+        Args:
+            validation_data: Liste von Validierungscode-Dictionaries mit 'cardId'
+            
+        Returns:
+            dict: Karten-ID als String -> Liste der Validierungscodes
+        """
+        codes_by_card = {}
+        for code_data in validation_data:
+            codes_by_card.setdefault(str(code_data.get('cardId', '')), []).append(code_data)
+        return codes_by_card
+
+    def build_detail_payload(self, dates, day_details, codes_by_card, summarized=None):
+        """
+        Baut die kompakte Nutzlast für die Tagesdetails auf, die im Browser erst
+        beim Aufklappen eines Tages gerendert werden. Karten und Codes werden
+        dabei nur einmal abgelegt, die Tage verweisen nur noch auf Karten-IDs.
+
+        Args:
+            dates: Daten (YYYY-MM-DD), für die Details benötigt werden
+            day_details: Datum -> Liste der Karten-Dictionaries
+            codes_by_card: Index aus index_validation_codes
+            summarized: Optional, Datum -> [Beginn, Ende, Karten, Einträge] für
+                        verdichtete Tage ohne einzelne Karten
+
+        Returns:
+            dict: {'cards': {id: [titel, link]}, 'days': {datum: [ids]},
+                   'codes': {id: [[datum, code, schwierigkeit, korrektheit], ...]},
+                   'summarized': {datum: [beginn, ende, karten, einträge]}}
+        """
+        cards = {}
+        days = {}
+        codes = {}
+        summarized = summarized or {}
+
+        for date_str in dates:
+            card_ids = []
+            for card in day_details.get(date_str, []):
+                card_id = str(card.get('card_id', ''))
+                card_ids.append(card_id)
+                if card_id in cards:
+                    continue
+                cards[card_id] = [card.get('card_title', 'Unbekannte Karte'), card.get('chat_link', '') or '']
+                card_codes = sorted(codes_by_card.get(card_id, []), key=lambda x: x.get('date', ''))
+                if card_codes:
+                    codes[card_id] = [
+                        [c.get('date', ''), c.get('validationCode', ''), c.get('difficulty', 0), c.get('correctPercent', 0)]
+                        for c in card_codes
+                    ]
+            days[date_str] = card_ids
+
+        return {
+            'cards': cards, 'days': days, 'codes': codes,
+            'summarized': {date_str: summarized[date_str] for date_str in dates if date_str in summarized}
+        }
+
+    def get_level_history_direct(self, deck_id, start_date, end_date):
+        """
+        Fragt die Level-Historie direkt aus der Datenbank ab, ohne Umwandlung in JSON
+        Verbesserte Version mit detaillierter Fehlerbehandlung und Debug-Ausgaben
+        """
+        try:
+            print(f"Study Tracker: Direct DB Query - Hole Level-Historie für Deck {deck_id}")
+            print(f"  - Zeitraum: {start_date} bis {end_date}")
+            
+            # Sicherstellen, dass deck_id ein Integer ist
             if deck_id is not None:
                 try:
                     deck_id_int = int(deck_id)
@@ -3451,18 +7409,13 @@ class ReportGenerator:
                 deck_id_int = None
             
             # SQL-Abfrage mit Parametern für das angegebene Deck und den Zeitraum
-            query = """
-                SELECT change_date, change_type, old_level, new_level
-                FROM level_history
-                WHERE deck_id = ? AND date(change_date) BETWEEN date(?) AND date(?)
-                ORDER BY change_date ASC
-            """
+            query = LEVEL_HISTORY_BY_DECK_RANGE_SQL
             
             # Ausgabe der Parameter zur Diagnose
             print(f"  - SQL-Parameter: deck_id={deck_id_int}, start_date={start_date}, end_date={end_date}")
             
             # Führe die Abfrage aus
-            cursor = self.db.conn.execute(query, (deck_id_int, start_date, end_date))
+            cursor = self.db.conn.execute(query, (deck_id_int, day_number(start_date), day_number(end_date)))
             results = cursor.fetchall()
             
             print(f"Study Tracker: Direkte Abfrage ergab {len(results)} Level-Änderungen")
@@ -3503,8 +7456,12 @@ class ReportGenerator:
             traceback.print_exc()
             return []
     
-    def _generate_html_report(self, deck_name, validation_data_json, level_history_json, day_details, start_date, end_date, deck_id):
-        """Generiert den eigentlichen HTML-Bericht mit tabellarischer Darstellung statt Diagrammen"""
+    def _generate_html_report(self, deck_name, validation_data_json, level_history_json, day_details, start_date, end_date, deck_id, daily_stats=None, navigation_html=""):
+        """
+        Generiert den eigentlichen HTML-Bericht mit tabellarischer Darstellung statt Diagrammen.
+        Bereits gesammelte Tagesstatistiken können über daily_stats übergeben werden,
+        navigation_html wird bei mehrteiligen Berichten über dem Inhalt eingefügt.
+        """
         # Debugging: Überprüfe das Level-History-JSON
         print("\n===== LEVEL HISTORY DEBUG IN _generate_html_report =====")
         print(f"Level history JSON Typ: {type(level_history_json)}")
@@ -3533,25 +7490,33 @@ class ReportGenerator:
             validation_data = json.loads(validation_data_json)
         except (json.JSONDecodeError, TypeError):
             validation_data = []
-
-        # Berechne tägliche Statistiken für den Zeitraum
-        daily_stats = {}
-        current_date = datetime.strptime(start_date, "%Y-%m-%d").date()
-        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
         
-        while current_date <= end_date_obj:
-            date_str = current_date.strftime("%Y-%m-%d")
-            stats = self.db.get_daily_stats(date_str, deck_id)
-            cards_due = stats['cards_due']
-            cards_studied = stats['cards_studied']
-            
-            daily_stats[date_str] = {
-                'cards_due': cards_due,
-                'cards_studied': cards_studied,
-                'success': cards_due > 0 and cards_studied >= cards_due
-            }
+        # Validierungscodes einmalig nach Karte indexieren
+        codes_by_card = self.index_validation_codes(validation_data)
+
+        # Berechne tägliche Statistiken für den Zeitraum, falls nicht übergeben
+        if daily_stats is None:
+            daily_stats = {}
+            stats_by_date = self.db.get_daily_stats_range(start_date, end_date, deck_id)
+            empty_stats = {'cards_due': 0, 'cards_studied': 0}
+            rules = get_level_rules()
+            current_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
             
-            current_date += timedelta(days=1)
+            while current_date <= end_date_obj:
+                self._check_cancelled()
+                date_str = current_date.strftime("%Y-%m-%d")
+                stats = stats_by_date.get(date_str, empty_stats)
+                cards_due = stats['cards_due']
+                cards_studied = stats['cards_studied']
+                
+                daily_stats[date_str] = {
+                    'cards_due': cards_due,
+                    'cards_studied': cards_studied,
+                    'success': rules.is_successful(cards_due, cards_studied)
+                }
+                
+                current_date += timedelta(days=1)
         
         # Berechne zusammenfassende Statistiken
         total_days = len(daily_stats)
@@ -3700,14 +7665,11 @@ class ReportGenerator:
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>Lernbericht: {escape_html(deck_name)}</title>
         
-        <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
-        
-        <style>
-        {css}
-        </style>
+        <style>{REPORT_STYLE_PLACEHOLDER}</style>
     </head>
     <body class="bg-gray-50 text-gray-900">
         <div class="container mx-auto px-4 py-8">
+            {navigation_html}
             <header class="mb-8">
                 <h1 class="text-3xl font-bold mb-2">Lernbericht: {escape_html(deck_name)}</h1>
                 <p class="text-gray-600">
@@ -3829,8 +7791,10 @@ class ReportGenerator:
         # Tägliche Statistiken in HTML einfügen
         sorted_dates = sorted(daily_stats.keys(), reverse=True)
         row_index = 0
+        detail_dates = []
         
         for date_str in sorted_dates:
+            self._check_cancelled()
             stats = daily_stats[date_str]
             formatted_date = format_date(date_str)
             
@@ -3850,192 +7814,13 @@ class ReportGenerator:
                             </tr>
                 """
                 
-                # Ausklappbare Inhaltszeile
+                # Ausklappbare Inhaltszeile - der Inhalt wird erst beim Aufklappen im Browser erzeugt
                 html += f"""
-                            <tr id="{expand_id}" class="expandable-row">
-                                <td colspan="4" class="p-0 border-b">
-                                    <div class="expandable-content">
-                                        <h4 class="font-medium mb-3">Lerndetails für {formatted_date}</h4>
-                                        
-                                        <!-- Kartendetails als Tabelle -->
-                                        <div class="card-list-container bg-white p-4 rounded border mb-4">
-                """
-                
-                # Kartendetails, falls vorhanden
-                cards = day_details.get(date_str, [])
-                if cards and len(cards) > 0:
-                    html += """
-                                            <table class="min-w-full divide-y divide-gray-200">
-                                                <thead class="bg-gray-50">
-                                                    <tr>
-                                                        <th scope="col" class="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Karte</th>
-                                                        <th scope="col" class="px-4 py-3 text-center text-xs font-medium text-gray-500 uppercase tracking-wider">Aktionen</th>
-                                                    </tr>
-                                                </thead>
-                                                <tbody class="bg-white divide-y divide-gray-200">
-                    """
-                    
-                    # Für jede Karte eine Zeile mit Klick-Funktionalität
-                    for card_index, card in enumerate(cards):
-                        card_id = card.get('card_id', '')
-                        card_title = card.get('card_title', 'Unbekannte Karte')
-                        chat_link = card.get('chat_link', '')
-                        
-                        # Jede Karte bekommt ihr eigenes Kompetenz-Div
-                        comp_id = f"comp-{row_index}-{card_index}"
-                        
-                        # Prüfe, ob Validierungscodes für diese Karte vorhanden sind
-                        validation_codes = card.get('validation_codes', [])
-                        has_validation_codes = len(validation_codes) > 0
-                        
-                        html += f"""
-                                                    <tr class="card-row hover:bg-blue-50 cursor-pointer" data-target="{comp_id}" data-card-id="{card_id}">
-                                                        <td class="px-4 py-3 text-sm text-gray-900">
-                                                            <div class="flex items-center">
-                                                                <span>{escape_html(card_title)}</span>
-                                                                <!-- Falls der Titel nur eine ID ist, zeige einen Hinweis -->
-                                                                {f'<span class="ml-2 text-xs text-gray-500">(verschoben/archiviert)</span>' if card_title.startswith('Karte') else ''}
-                        """
-                        
-                        # ChatGPT-Link direkt nach dem Kartentitel
-                        if chat_link:
-                            html += f"""
-                                                                <a href="{escape_html(chat_link)}" target="_blank" class="inline-flex items-center ml-2" onclick="event.stopPropagation();">
-                                                                    <span class="chatgpt-badge">
-                                                                        <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 11.5a8.38 8.38 0 0 1-.9 3.8 8.5 8.5 0 0 1-7.6 4.7 8.38 8.38 0 0 1-3.8-.9L3 21l1.9-5.7a8.38 8.38 0 0 1-.9-3.8 8.5 8.5 0 0 1 4.7-7.6 8.38 8.38 0 0 1 3.8-.9h.5a8.48 8.48 0 0 1 8 8v.5z"></path></svg>
-                                                                        ChatGPT
-                                                                    </span>
-                                                                </a>
-                                                            </div>
-                                                            <div class="chatgpt-url" title="{escape_html(chat_link)}">
-                                                                {escape_html(chat_link)}
-                                                            </div>
-                            """
-                        else:
-                            html += """
-                                                            </div>
-                            """
-                        
-                        html += """
-                                                        </td>
-                                                        <td class="px-4 py-3 whitespace-nowrap text-center">
-                                                            <button class="bg-blue-100 hover:bg-blue-200 text-blue-700 font-bold py-1 px-2 rounded text-xs">
-                                                                Details
-                                                            </button>
-                                                        </td>
-                                                    </tr>
-                        """
-                    
-                    html += """
-                                                </tbody>
-                                            </table>
-                    """
-                else:
-                    html += """
-                                            <p class="text-gray-500 py-4 text-center">Keine Kartendetails für diesen Tag verfügbar.</p>
-                    """
-                
-                html += """
-                                        </div>
-                                        
-                                        <!-- Container für Kompetenzvisualisierung -->
-                                        <div class="competency-container">
-                """
-                
-                # Für jede Karte ein verstecktes Kompetenz-Div erstellen
-                if cards and len(cards) > 0:
-                    for card_index, card in enumerate(cards):
-                        card_id = card.get('card_id', '')
-                        card_title = card.get('card_title', 'Unbekannte Karte')
-                        comp_id = f"comp-{row_index}-{card_index}"
-                        
-                        # Sammle Validierungscodes für diese Karte
-                        card_validation_codes = []
-                        for v_code in validation_data:
-                            if str(v_code.get('cardId', '')) == str(card_id):
-                                card_validation_codes.append(v_code)
-                        
-                        has_validation_codes = len(card_validation_codes) > 0
-                        
-                        html += f"""
-                                            <!-- Kompetenzvisualisierung für Karte {card_index + 1} -->
-                                            <div id="{comp_id}" class="competency-view bg-blue-50 p-4 rounded border border-blue-200 mb-3 hidden">
-                                                <div class="flex justify-between items-center mb-3">
-                                                    <h5 class="font-medium text-blue-800">Kompetenzentwicklung: {escape_html(card_title)}</h5>
-                                                    <button class="close-competency-view text-gray-500 hover:bg-gray-200 p-1 rounded-full" data-comp-id="{comp_id}">
-                                                        <svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5" viewBox="0 0 20 20" fill="currentColor">
-                                                            <path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd" />
-                                                        </svg>
-                                                    </button>
-                                                </div>
-                        """
-                        
-                        if has_validation_codes:
-                            # Tabelle für Validierungscodes
-                            html += """
-                                                <div class="mb-4">
-                                                    <h6 class="font-medium text-sm mb-2">Vorhandene Validierungscodes:</h6>
-                                                    <table class="validation-code-table">
-                                                        <thead>
-                                                            <tr>
-                                                                <th>Datum</th>
-                                                                <th>Code</th>
-                                                                <th>Schwierigkeit</th>
-                                                                <th>Korrektheit</th>
-                                                            </tr>
-                                                        </thead>
-                                                        <tbody>
-                            """
-                            
-                            # Sortiere nach Datum
-                            sorted_codes = sorted(card_validation_codes, key=lambda x: x.get('date', ''))
-                            
-                            for i, code_data in enumerate(sorted_codes):
-                                code = code_data.get('validationCode', '')
-                                date = code_data.get('date', '')
-                                correct = code_data.get('correctPercent', 0)
-                                difficulty = code_data.get('difficulty', 0)
-                                
-                                # Formatiere das Datum
-                                formatted_date = date
-                                try:
-                                    if date:
-                                        date_obj = datetime.strptime(date, "%Y-%m-%d").date()
-                                        formatted_date = format_date(date_obj)
-                                except ValueError:
-                                    pass
-                                
-                                html += f"""
-                                                            <tr>
-                                                                <td>{formatted_date}</td>
-                                                                <td class="font-mono">{code}</td>
-                                                                <td class="text-center">{difficulty}</td>
-                                                                <td class="text-center">{correct}%</td>
-                                                            </tr>
-                                """
-                            
-                            html += """
-                                                        </tbody>
-                                                    </table>
-                                                </div>
-                            """
-                        else:
-                            html += """
-                                                <div class="bg-white rounded border p-3 text-center text-gray-500">
-                                                    Keine Validierungscodes für diese Karte vorhanden.
-                                                </div>
-                            """
-                        
-                        html += """
-                                            </div>
-                        """
-                
-                html += """
-                                        </div>
-                                    </div>
-                                </td>
+                            <tr id="{expand_id}" class="expandable-row" data-date="{date_str}">
+                                <td colspan="4" class="p-0 border-b"></td>
                             </tr>
                 """
+                detail_dates.append(date_str)
                 
                 row_index += 1
         
@@ -4059,12 +7844,141 @@ class ReportGenerator:
         <script>
         """
         
-        # Füge verbesserte JavaScript-Funktionen ein
-        js_functions = """
-    // Definiere globale Variablen für die Daten
+        # Kompakte Nutzlast für die Tagesdetails, gerendert wird erst beim Aufklappen
+        summarized = {
+            date_str: daily_stats[date_str]['summary_period']
+            for date_str in detail_dates if daily_stats[date_str].get('summary_period')
+        }
+        detail_payload = self.build_detail_payload(detail_dates, day_details, codes_by_card, summarized)
+        detail_payload_json = json.dumps(detail_payload, separators=(',', ':')).replace("</", "<\\/").replace("<!--", "<\\!--")
+        
+        # Globale Variablen für die Daten
+        html += """
     window.levelChangesData = """ + level_history_json + """;
     window.deckName = """ + json.dumps(deck_name) + """;
-    window.validationData = """ + validation_data_json + """;
+    window.reportDetails = """ + detail_payload_json + """;
+        </script>
+        <script>
+"""
+        
+        # Füge verbesserte JavaScript-Funktionen ein (statisch, daher minifiziert und gecacht)
+        js_functions = """
+
+    function escapeHtml(text) {
+        return String(text == null ? '' : text)
+            .replace(/&/g, '&amp;')
+            .replace(/</g, '&lt;')
+            .replace(/>/g, '&gt;')
+            .replace(/"/g, '&quot;')
+            .replace(/'/g, '&#39;');
+    }
+
+    function formatDate(dateStr) {
+        const parts = String(dateStr || '').split('-');
+        return parts.length === 3 ? `${parts[2]}.${parts[1]}.${parts[0]}` : dateStr;
+    }
+
+    const CHATGPT_ICON = '<svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2" stroke-linecap="round" stroke-linejoin="round"><path d="M21 11.5a8.38 8.38 0 0 1-.9 3.8 8.5 8.5 0 0 1-7.6 4.7 8.38 8.38 0 0 1-3.8-.9L3 21l1.9-5.7a8.38 8.38 0 0 1-.9-3.8 8.5 8.5 0 0 1 4.7-7.6 8.38 8.38 0 0 1 3.8-.9h.5a8.48 8.48 0 0 1 8 8v.5z"></path></svg>';
+    const CLOSE_ICON = '<svg xmlns="http://www.w3.org/2000/svg" class="h-5 w-5" viewBox="0 0 20 20" fill="currentColor"><path fill-rule="evenodd" d="M4.293 4.293a1 1 0 011.414 0L10 8.586l4.293-4.293a1 1 0 111.414 1.414L11.414 10l4.293 4.293a1 1 0 01-1.414 1.414L10 11.414l-4.293 4.293a1 1 0 01-1.414-1.414L8.586 10 4.293 5.707a1 1 0 010-1.414z" clip-rule="evenodd" /></svg>';
+
+    /**
+    * Erzeugt die Kartenzeile für eine Karte eines Tages
+    */
+    function renderCardRow(rowIndex, cardIndex, cardId, card) {
+        const title = card[0];
+        const link = card[1];
+        let html = `<tr class="card-row hover:bg-blue-50 cursor-pointer" data-target="comp-${rowIndex}-${cardIndex}" data-card-id="${escapeHtml(cardId)}">`
+            + '<td class="px-4 py-3 text-sm text-gray-900"><div class="flex items-center">'
+            + `<span>${escapeHtml(title)}</span>`;
+        if (String(title).startsWith('Karte')) {
+            html += '<span class="ml-2 text-xs text-gray-500">(verschoben/archiviert)</span>';
+        }
+        if (link) {
+            html += `<a href="${escapeHtml(link)}" target="_blank" class="inline-flex items-center ml-2" onclick="event.stopPropagation();">`
+                + `<span class="chatgpt-badge">${CHATGPT_ICON} ChatGPT</span></a></div>`
+                + `<div class="chatgpt-url" title="${escapeHtml(link)}">${escapeHtml(link)}</div>`;
+        } else {
+            html += '</div>';
+        }
+        html += '</td><td class="px-4 py-3 whitespace-nowrap text-center">'
+            + '<button class="bg-blue-100 hover:bg-blue-200 text-blue-700 font-bold py-1 px-2 rounded text-xs">Details</button>'
+            + '</td></tr>';
+        return html;
+    }
+
+    /**
+    * Erzeugt die Kompetenzansicht mit den Validierungscodes einer Karte
+    */
+    function renderCompetencyView(rowIndex, cardIndex, cardId, card) {
+        const compId = `comp-${rowIndex}-${cardIndex}`;
+        const codes = window.reportDetails.codes[cardId] || [];
+        let html = `<div id="${compId}" class="competency-view bg-blue-50 p-4 rounded border border-blue-200 mb-3 hidden">`
+            + '<div class="flex justify-between items-center mb-3">'
+            + `<h5 class="font-medium text-blue-800">Kompetenzentwicklung: ${escapeHtml(card[0])}</h5>`
+            + `<button class="close-competency-view text-gray-500 hover:bg-gray-200 p-1 rounded-full" data-comp-id="${compId}">${CLOSE_ICON}</button>`
+            + '</div>';
+        if (codes.length > 0) {
+            html += '<div class="mb-4"><h6 class="font-medium text-sm mb-2">Vorhandene Validierungscodes:</h6>'
+                + '<table class="validation-code-table"><thead><tr>'
+                + '<th>Datum</th><th>Code</th><th>Schwierigkeit</th><th>Korrektheit</th>'
+                + '</tr></thead><tbody>';
+            codes.forEach(code => {
+                html += `<tr><td>${escapeHtml(formatDate(code[0]))}</td>`
+                    + `<td class="font-mono">${escapeHtml(code[1])}</td>`
+                    + `<td class="text-center">${escapeHtml(code[2])}</td>`
+                    + `<td class="text-center">${escapeHtml(code[3])}%</td></tr>`;
+            });
+            html += '</tbody></table></div>';
+        } else {
+            html += '<div class="bg-white rounded border p-3 text-center text-gray-500">'
+                + 'Keine Validierungscodes für diese Karte vorhanden.</div>';
+        }
+        return html + '</div>';
+    }
+
+    /**
+    * Rendert die Details eines Tages beim ersten Aufklappen aus window.reportDetails
+    */
+    function renderDayDetails(row) {
+        if (row.getAttribute('data-rendered') === '1') {
+            return;
+        }
+        const dateStr = row.getAttribute('data-date');
+        const rowIndex = row.id.replace('expand-', '');
+        const cardIds = window.reportDetails.days[dateStr] || [];
+        let cardsHtml = '';
+        let competencyHtml = '';
+
+        if (cardIds.length > 0) {
+            cardsHtml = '<table class="min-w-full divide-y divide-gray-200"><thead class="bg-gray-50"><tr>'
+                + '<th scope="col" class="px-4 py-3 text-left text-xs font-medium text-gray-500 uppercase tracking-wider">Karte</th>'
+                + '<th scope="col" class="px-4 py-3 text-center text-xs font-medium text-gray-500 uppercase tracking-wider">Aktionen</th>'
+                + '</tr></thead><tbody class="bg-white divide-y divide-gray-200">';
+            cardIds.forEach((cardId, cardIndex) => {
+                const card = window.reportDetails.cards[cardId] || ['Unbekannte Karte', ''];
+                cardsHtml += renderCardRow(rowIndex, cardIndex, cardId, card);
+                competencyHtml += renderCompetencyView(rowIndex, cardIndex, cardId, card);
+            });
+            cardsHtml += '</tbody></table>';
+        } else if (window.reportDetails.summarized && window.reportDetails.summarized[dateStr]) {
+            const summary = window.reportDetails.summarized[dateStr];
+            cardsHtml = '<p class="text-gray-500 py-4 text-center">Die einzelnen Karten dieses Tages wurden zusammengefasst. '
+                + `${escapeHtml(formatDate(summary[0]))} bis ${escapeHtml(formatDate(summary[1]))}: `
+                + `${summary[2]} verschiedene Karten, ${summary[3]} Einträge.</p>`;
+        } else {
+            cardsHtml = '<p class="text-gray-500 py-4 text-center">Keine Kartendetails für diesen Tag verfügbar.</p>';
+        }
+
+        row.cells[0].innerHTML = '<div class="expandable-content">'
+            + `<h4 class="font-medium mb-3">Lerndetails für ${escapeHtml(formatDate(dateStr))}</h4>`
+            + `<div class="card-list-container bg-white p-4 rounded border mb-4">${cardsHtml}</div>`
+            + `<div class="competency-container">${competencyHtml}</div>`
+            + '</div>';
+        row.setAttribute('data-rendered', '1');
+
+        // Event-Handler für die neu erzeugten Karten- und Schließen-Elemente setzen
+        setupCardRowEventListeners();
+    }
 
     function toggleRow(rowId) {
         console.log(`toggleRow aufgerufen für: ${rowId}`);
@@ -4096,7 +8010,8 @@ class ReportGenerator:
                 view.classList.add('hidden');
             });
             
-            // Öffne die neue Zeile
+            // Inhalt bei Bedarf erzeugen und die neue Zeile öffnen
+            renderDayDetails(row);
             row.style.display = 'table-row';
         } else {
             // Zeile schließen
@@ -4237,7 +8152,7 @@ class ReportGenerator:
     };
     """
         
-        html += js_functions
+        html += report_assets.script(js_functions)
         
         html += """
         </script>
@@ -4245,12 +8160,15 @@ class ReportGenerator:
     </html>
     """
         
-        return html
+        # Nur das CSS der tatsächlich verwendeten Klassen einbetten
+        return html.replace(REPORT_STYLE_PLACEHOLDER, report_assets.stylesheet(html, css), 1)
     
-    def updated_html_generator(self, date_str, formatted_date, stats, day_details, validation_data_json, row_index):
+    def updated_html_generator(self, date_str, formatted_date, stats, day_details, validation_data_json, row_index, codes_by_card=None):
         """
         Generiert den HTML-Code für die ausklappbaren Zeilen der Tagesstatistik
-        mit korrekter Darstellung des ChatGPT-Links neben dem Kartentitel
+        mit korrekter Darstellung des ChatGPT-Links neben dem Kartentitel.
+        Ein bereits aufgebauter Index Karten-ID -> Codes kann über codes_by_card
+        übergeben werden, damit das JSON nicht für jeden Tag neu gelesen wird.
         """
         success_class = "text-green-600" if stats['success'] else "text-red-600"
         success_text = "✓" if stats['success'] else "✗"
@@ -4354,11 +8272,13 @@ class ReportGenerator:
         
         # Für jede Karte ein verstecktes Kompetenz-Div erstellen
         if cards and len(cards) > 0:
-            # Wandle validation_data_json in Python-Objekt um für die Filterung
-            try:
-                validation_data = json.loads(validation_data_json)
-            except (json.JSONDecodeError, TypeError):
-                validation_data = []
+            # Index der Validierungscodes nach Karte, sofern nicht übergeben
+            if codes_by_card is None:
+                try:
+                    validation_data = json.loads(validation_data_json)
+                except (json.JSONDecodeError, TypeError):
+                    validation_data = []
+                codes_by_card = self.index_validation_codes(validation_data)
                 
             for card_index, card in enumerate(cards):
                 card_id = card.get('card_id', '')
@@ -4366,7 +8286,7 @@ class ReportGenerator:
                 comp_id = f"comp-{row_index}-{card_index}"
                 
                 # RICHTIG: Filtere die Validierungscodes, um nur die für diese spezifische Karte zu zeigen
-                card_validation_codes = [v for v in validation_data if str(v.get('cardId', '')) == str(card_id)]
+                card_validation_codes = codes_by_card.get(str(card_id), [])
                 
                 has_validation_codes = len(card_validation_codes) > 0
                 
@@ -4471,11 +8391,10 @@ class ReportGenerator:
             cards_dict = {}
             
             # 1. Hole alle gelernten Karten im Zeitraum
-            cursor = self.db.conn.execute("""
-                SELECT DISTINCT s.card_id, s.date
-                FROM studied_cards s
-                WHERE s.deck_id = ? AND s.date BETWEEN ? AND ?
-            """, (deck_id, start_date, end_date))
+            cursor = self.db.conn.execute(
+                STUDIED_CARDS_BY_DECK_RANGE_SQL,
+                (deck_id, day_number(start_date), day_number(end_date))
+            )
             
             studied_cards = cursor.fetchall()
             print(f"Study Tracker: Gefunden {len(studied_cards)} gelernte Karten im Zeitraum")
@@ -4497,19 +8416,19 @@ class ReportGenerator:
                 # Füge Lerndatum hinzu
                 cards_dict[card_id]['studied_dates'].append(studied_date)
             
+            self._check_cancelled()
+            
             # 2. Hole Kartentitel für alle gefundenen Karten
             if cards_dict:
-                card_ids = list(cards_dict.keys())
+                # Schlüssel sind Strings für den Bericht, die Tabellen speichern Integer
+                card_ids = [normalize_card_id(card_id) for card_id in cards_dict]
                 placeholders = ','.join(['?'] * len(card_ids))
                 
                 try:
                     # Versuche Titel aus validation_codes zu holen
-                    cursor = self.db.conn.execute(f"""
-                        SELECT card_id, card_title
-                        FROM validation_codes
-                        WHERE card_id IN ({placeholders}) AND card_title IS NOT NULL
-                        GROUP BY card_id
-                    """, card_ids)
+                    cursor = self.db.conn.execute(
+                        VALIDATION_TITLES_BY_CARDS_SQL.format(placeholders=placeholders), card_ids
+                    )
                     
                     for row in cursor.fetchall():
                         card_id = str(row[0])
@@ -4517,11 +8436,9 @@ class ReportGenerator:
                             cards_dict[card_id]['card_title'] = row[1]
                     
                     # Versuche Titel aus chat_links zu holen, wenn noch nicht gefunden
-                    cursor = self.db.conn.execute(f"""
-                        SELECT card_id, card_title
-                        FROM chat_links
-                        WHERE card_id IN ({placeholders}) AND card_title IS NOT NULL
-                    """, card_ids)
+                    cursor = self.db.conn.execute(
+                        CHAT_LINK_TITLES_BY_CARDS_SQL.format(placeholders=placeholders), card_ids
+                    )
                     
                     for row in cursor.fetchall():
                         card_id = str(row[0])
@@ -4541,15 +8458,14 @@ class ReportGenerator:
             
             # 3. Hole ChatGPT-Links für alle gefundenen Karten
             if cards_dict:
-                card_ids = list(cards_dict.keys())
+                # Schlüssel sind Strings für den Bericht, die Tabellen speichern Integer
+                card_ids = [normalize_card_id(card_id) for card_id in cards_dict]
                 placeholders = ','.join(['?'] * len(card_ids))
                 
                 try:
-                    cursor = self.db.conn.execute(f"""
-                        SELECT card_id, link
-                        FROM chat_links
-                        WHERE card_id IN ({placeholders})
-                    """, card_ids)
+                    cursor = self.db.conn.execute(
+                        CHAT_LINKS_BY_CARDS_SQL.format(placeholders=placeholders), card_ids
+                    )
                     
                     for row in cursor.fetchall():
                         card_id = str(row[0])
@@ -4561,16 +8477,14 @@ class ReportGenerator:
             
             # 4. Hole Validierungscodes für alle gefundenen Karten
             if cards_dict:
-                card_ids = list(cards_dict.keys())
+                # Schlüssel sind Strings für den Bericht, die Tabellen speichern Integer
+                card_ids = [normalize_card_id(card_id) for card_id in cards_dict]
                 placeholders = ','.join(['?'] * len(card_ids))
                 
                 try:
-                    cursor = self.db.conn.execute(f"""
-                        SELECT card_id, date, code, correct_percent, difficulty
-                        FROM validation_codes
-                        WHERE card_id IN ({placeholders})
-                        ORDER BY date
-                    """, card_ids)
+                    cursor = self.db.conn.execute(
+                        VALIDATION_CODES_BY_CARDS_SQL.format(placeholders=placeholders), card_ids
+                    )
                     
                     for row in cursor.fetchall():
                         card_id = str(row[0])
@@ -4600,144 +8514,240 @@ class ReportGenerator:
             print(f"Study Tracker: Insgesamt geladen: {len(cards_dict)} Karten, {total_codes} Validierungscodes, {total_links} ChatGPT-Links")
             
             return cards_dict
+        except OperationCancelledError:
+            raise
         except Exception as e:
             print(f"Study Tracker: Fehler beim Laden der Karteninformationen: {e}")
             traceback.print_exc()
             return {}
     
-    def generate_report_with_direct_data(self, deck_id, start_date, end_date):
+    def get_report_data(self, deck_id, start_date, end_date, prepare=True):
         """
-        Generiert einen vollständigen HTML-Bericht für den angegebenen Zeitraum
-        mit direktem Datenbankzugriff für zuverlässigere Ergebnisse und Fortschrittsanzeige
+        Liefert die gesammelten Berichtsdaten für Deck und Zeitraum. Solange sich
+        die zugrunde liegenden Tabellen nicht geändert haben, werden die Daten aus
+        dem Cache genommen und die gesamte Datensammlung übersprungen.
+        
+        Die Vorbereitung läuft vor der Cache-Abfrage: Sie übernimmt geänderte
+        Validierungscodes und Deck-Zuordnungen aus der Sammlung und erhöht dabei
+        die Datenversion, sodass veraltete Cache-Einträge nicht mehr passen.
         
         Args:
             deck_id: ID des Decks
             start_date: Startdatum im Format YYYY-MM-DD
             end_date: Enddatum im Format YYYY-MM-DD
-                
+            prepare: Bei False werden Vorbereitung und Validierung übersprungen
+            
         Returns:
-            str: HTML-Inhalt des Berichts
+            dict: Berichtsdaten (siehe collect_report_data)
         """
-        try:
-            # Erstelle Fortschrittsdialog
-            progress = QProgressDialog("Generiere Bericht...", "Abbrechen", 0, 100, mw)
-            progress.setWindowTitle("Study Tracker")
-            progress.setWindowModality(get_qt_enum(Qt.WindowModality, "WindowModal"))
-            progress.setValue(0)
-            progress.show()
-            progress.setValue(3)
-            progress.setLabelText("Synchronisiere Kartendaten...")
-            QApplication.processEvents()
+        if prepare:
+            self._report_progress(2, "Validiere Daten...")
+            validation_errors = self.validate_data_before_report(deck_id, start_date, end_date)
+            if validation_errors:
+                return {'validation_errors': validation_errors}
             
+            self._check_cancelled()
+            self.prepare_report_data(deck_id, start_date, end_date)
+        
+        report_data = self.get_cached_report_data(deck_id, start_date, end_date)
+        if report_data is not None:
+            return report_data
+        
+        report_data = self.collect_report_data(deck_id, start_date, end_date, prepare=False)
+        
+        if 'validation_errors' not in report_data and report_data.get('data_version') is not None:
+            self.cache.set(self._cache_key(deck_id, start_date, end_date), report_data, report_data['data_version'])
+        
+        return report_data
+    
+    def _cache_key(self, deck_id, start_date, end_date):
+        """
+        Cache-Schlüssel für Berichtsdaten; fremde Datenbanken (Schüler-Backups) werden über
+        ihren Pfad unterschieden, geänderte Tagesziele der Level-Regeln über deren Signatur
+        """
+        rules_signature = get_level_rules().day_signature
+        source_path = getattr(self.db, 'source_path', None)
+        if source_path:
+            # Arbeitskopie: Original samt Änderungszeit, ein ersetztes Backup ergibt neue Schlüssel
             try:
-                # Verwende die neue Vorbereitungsfunktion
-                self.db.prepare_for_report(deck_id, start_date, end_date)
-            except Exception as e:
-                print(f"Study Tracker: Fehler bei der Berichtsvorbereitung: {e}")
-                traceback.print_exc()
-
-            # Validiere Daten
-            progress.setValue(5)
-            progress.setLabelText("Validiere Daten...")
-            QApplication.processEvents()
+                modified = os.path.getmtime(source_path)
+            except OSError:
+                modified = None
+            return (os.path.abspath(source_path), modified, deck_id, start_date, end_date, rules_signature)
+        db_path = getattr(self.db, 'db_path', DB_PATH)
+        if db_path == DB_PATH:
+            return (deck_id, start_date, end_date, rules_signature)
+        return (os.path.abspath(db_path), deck_id, start_date, end_date, rules_signature)
+    
+    def get_cached_report_data(self, deck_id, start_date, end_date):
+        """Liefert gecachte Berichtsdaten, sofern sie zum aktuellen Datenstand passen"""
+        data_version = self.db.get_data_version(start_date, end_date)
+        if data_version is None:
+            return None
+        
+        report_data = self.cache.get(self._cache_key(deck_id, start_date, end_date), data_version)
+        if report_data is not None:
+            print(f"Study Tracker: Verwende gecachte Berichtsdaten für {start_date} bis {end_date} (Version {data_version})")
+            # Umbenennungen in Anki ändern die Datenversion nicht
+            report_data = dict(report_data, deck_name=self.get_deck_name(deck_id))
+        return report_data
+    
+    def prepare_report_data(self, deck_id, start_date, end_date):
+        """
+        Bringt die Datenbank vor einer Berichtserstellung auf den aktuellen Stand:
+        Deck-Zuordnungen, Kartentitel und Validierungscodes aus den Notizen.
+        Bei mehrteiligen Berichten wird dies nur einmal für den Gesamtzeitraum ausgeführt.
+        
+        Args:
+            deck_id: ID des Decks
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+        """
+        self._report_progress(3, "Synchronisiere Kartendaten...")
+        
+        try:
+            # Verwende die neue Vorbereitungsfunktion
+            self.db.prepare_for_report(deck_id, start_date, end_date, collection=self.collection)
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Berichtsvorbereitung: {e}")
+            traceback.print_exc()
+        
+        # Aktualisiere Validierungscodes und ChatGPT-Links vor der Berichterstellung
+        self._check_cancelled()
+        self._report_progress(20, "Aktualisiere Kartendaten...")
+        
+        try:
+            print("Study Tracker: Aktualisiere Validierungscodes und ChatGPT-Links vor Berichtserstellung...")
+            collector = StudyStatisticsCollector(self.db)
+            collector.parse_validation_codes_from_cards(
+                cancel_token=self.cancel_token,
+                notes=self.collection.validation_notes if self.collection is not None else None
+            )
+            print("Study Tracker: Aktualisierung abgeschlossen")
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Aktualisierung vor Berichtserstellung: {e}")
+            traceback.print_exc()
+    
+    def collect_report_data(self, deck_id, start_date, end_date, prepare=True):
+        """
+        Sammelt alle Daten für einen Bericht: bereitet die Datenbank vor,
+        aktualisiert Validierungscodes und lädt Karten, Level-Historie und
+        Tagesstatistiken.
+        
+        Args:
+            deck_id: ID des Decks
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            prepare: Bei False werden Vorbereitung und Validierung übersprungen,
+                     z.B. weil sie für einen größeren Zeitraum bereits erfolgt sind
             
-            validation_errors = self.validate_data_before_report(deck_id, start_date, end_date)
-            if validation_errors:
-                error_msg = "\n".join(validation_errors)
-                progress.close()
-                return self._generate_error_report(f"Fehler bei der Datenvalidierung:\n{error_msg}")
+        Returns:
+            dict: deck_name, daily_stats, day_details, validation_data, level_history,
+                  summary und data_version, oder validation_errors bei ungültigen Eingaben
+        """
+        try:
+            if prepare:
+                # Validiere Daten
+                self._report_progress(2, "Validiere Daten...")
+                
+                validation_errors = self.validate_data_before_report(deck_id, start_date, end_date)
+                if validation_errors:
+                    return {'validation_errors': validation_errors}
+                
+                self._check_cancelled()
+                self.prepare_report_data(deck_id, start_date, end_date)
             
             # Hole Deckname
-            progress.setValue(10)
-            progress.setLabelText("Lade Deckdaten...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(10, "Lade Deckdaten...")
             
-            deck_name = "Unbekannter Stapel"
-            if mw and mw.col:
-                try:
-                    deck = mw.col.decks.get(deck_id)
-                    if deck:
-                        deck_name = deck['name']
-                except Exception as e:
-                    print(f"Study Tracker: Fehler beim Abrufen des Decknamens: {e}")
+            deck_name = self.get_deck_name(deck_id)
             
-            # Aktualisiere Validierungscodes und ChatGPT-Links vor der Berichterstellung
-            progress.setValue(20)
-            progress.setLabelText("Aktualisiere Kartendaten...")
-            QApplication.processEvents()
-            
-            try:
-                print("Study Tracker: Aktualisiere Validierungscodes und ChatGPT-Links vor Berichtserstellung...")
-                collector = StudyStatisticsCollector(self.db)
-                collector.parse_validation_codes_from_cards()
-                print("Study Tracker: Aktualisierung abgeschlossen")
-            except Exception as e:
-                print(f"Study Tracker: Fehler bei der Aktualisierung vor Berichtserstellung: {e}")
-                traceback.print_exc()
+            # Ab hier werden nur noch Daten gelesen; die Version kennzeichnet den Stand
+            data_version = self.db.get_data_version(start_date, end_date)
             
             # NEUE METHODE: Lade alle Karten mit ihren Daten direkt aus der Datenbank
-            progress.setValue(40)
-            progress.setLabelText("Lade Karteninformationen...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(40, "Lade Karteninformationen...")
             
             cards_dict = self.load_all_cards_with_data(deck_id, start_date, end_date)
             
             # Hole Level-Historie DIREKT
-            progress.setValue(50)
-            progress.setLabelText("Lade Level-Historie...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(50, "Lade Level-Historie...")
             
             print(f"Study Tracker: Hole Level-Historie für Bericht...")
             level_history = self.get_level_history_direct(deck_id, start_date, end_date)
             print(f"Study Tracker: Gefunden: {len(level_history)} Level-Änderungen für Bericht")
             
-            # Konvertiere in JSON-Format für JavaScript
-            level_history_json = json.dumps(level_history)
-            
             # Bereite Tagesstatistiken und Kartendetails vor
-            progress.setValue(60)
-            progress.setLabelText("Bereite Tagesstatistiken vor...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(60, "Bereite Tagesstatistiken vor...")
             
             daily_stats = {}
             day_details = {}
             
+            # Lade alle Tagesstatistiken und indexiere die Karten nach Lerndatum
+            stats_by_date = self.db.get_daily_stats_range(start_date, end_date, deck_id)
+            cards_by_date = self.build_day_index(cards_dict)
+            empty_stats = {'cards_due': 0, 'cards_studied': 0}
+            rules = get_level_rules()
+            
             # Bereite tägliche Statistiken vor
             current_date = datetime.strptime(start_date, "%Y-%m-%d").date()
             end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
             
             while current_date <= end_date_obj:
+                self._check_cancelled()
                 date_str = current_date.strftime("%Y-%m-%d")
-                stats = self.db.get_daily_stats(date_str, deck_id)
+                stats = stats_by_date.get(date_str, empty_stats)
                 
                 daily_stats[date_str] = {
                     'cards_due': stats['cards_due'],
                     'cards_studied': stats['cards_studied'],
-                    'success': stats['cards_due'] > 0 and stats['cards_studied'] >= stats['cards_due']
+                    'success': rules.is_successful(stats['cards_due'], stats['cards_studied'])
                 }
                 
-                # Finde Karten, die an diesem Tag gelernt wurden
+                # Karten, die an diesem Tag gelernt wurden
                 cards_for_day = []
                 
-                for card_id, card_data in cards_dict.items():
-                    if date_str in card_data['studied_dates']:
-                        cards_for_day.append({
-                            'card_id': card_id,
-                            'card_title': card_data['card_title'],
-                            'chat_link': card_data['chat_link'],
-                            'validation_codes': card_data['validation_codes'],
-                            'time_spent': 0  # Default-Wert, könnte durch eine Abfrage ersetzt werden
-                        })
+                for card_id in cards_by_date.get(date_str, []):
+                    card_data = cards_dict[card_id]
+                    cards_for_day.append({
+                        'card_id': card_id,
+                        'card_title': card_data['card_title'],
+                        'chat_link': card_data['chat_link'],
+                        'validation_codes': card_data['validation_codes'],
+                        'time_spent': 0  # Default-Wert, könnte durch eine Abfrage ersetzt werden
+                    })
                 
                 if cards_for_day:
                     day_details[date_str] = cards_for_day
                 
                 current_date += timedelta(days=1)
             
+            # Verdichtete Tage haben keine einzelnen Karten mehr; die Tageszeile verweist
+            # dann auf die Zusammenfassung des Zeitraums
+            for summary in self.db.get_studied_card_summaries(deck_id, start_date, end_date):
+                summary_period = [
+                    summary['period_start'], summary['period_end'],
+                    summary['distinct_cards'], summary['review_count']
+                ]
+                current_date = max(datetime.strptime(summary['period_start'], "%Y-%m-%d").date(),
+                                   datetime.strptime(start_date, "%Y-%m-%d").date())
+                last_date = min(datetime.strptime(summary['period_end'], "%Y-%m-%d").date(), end_date_obj)
+                while current_date <= last_date:
+                    date_str = current_date.strftime("%Y-%m-%d")
+                    stats = daily_stats[date_str]
+                    if date_str not in day_details and (stats['cards_due'] > 0 or stats['cards_studied'] > 0):
+                        stats['summary_period'] = summary_period
+                    current_date += timedelta(days=1)
+            
             # Erstelle validationData für JavaScript
-            progress.setValue(80)
-            progress.setLabelText("Bereite Validierungsdaten vor...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(80, "Bereite Validierungsdaten vor...")
             
             validation_data = []
             
@@ -4753,8 +8763,6 @@ class ReportGenerator:
                         'chatLink': card_data['chat_link']
                     })
             
-            validation_data_json = json.dumps(validation_data)
-            
             for card_id, card_data in cards_dict.items():
                 # Stelle sicher, dass jede Karte einen benutzerfreundlichen Titel hat
                 if not card_data['card_title'] or card_data['card_title'].startswith("173800"):
@@ -4765,36 +8773,707 @@ class ReportGenerator:
                     if card_data['card_title'].startswith("173800"):
                         short_id = card_id[-8:] if len(card_id) > 8 else card_id
                         card_data['card_title'] = f"Karte #{short_id} (nicht mehr verfügbar)"
+            
+            # Kennzahlen für Übersichtsseiten (werden mit den Daten gecacht)
+            card_totals = self.db.get_studied_card_totals(deck_id, start_date, end_date)
+            summary = self.build_report_summary(daily_stats, validation_data, level_history, card_totals)
 
+            return {
+                'deck_name': deck_name,
+                'daily_stats': daily_stats,
+                'day_details': day_details,
+                'validation_data': validation_data,
+                'level_history': level_history,
+                'summary': summary,
+                'data_version': data_version
+            }
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Sammeln der Berichtsdaten: {e}")
+            traceback.print_exc()
+            raise
+    
+    def build_report_summary(self, daily_stats, validation_data, level_history, card_totals=None):
+        """
+        Berechnet die zusammenfassenden Kennzahlen eines Berichtszeitraums
+        
+        Args:
+            card_totals: Optional, Ergebnis von Database.get_studied_card_totals
+                (enthält auch bereits verdichtete Zeiträume)
+        
+        Returns:
+            dict: Kennzahlen wie gelernte Karten, erfolgreiche Tage und Anzahl Codes
+        """
+        total_days = len(daily_stats)
+        studied_cards = sum(stats['cards_studied'] for stats in daily_stats.values())
+        return {
+            'total_days': total_days,
+            'studied_cards': studied_cards,
+            'due_cards': sum(stats['cards_due'] for stats in daily_stats.values()),
+            'successful_days': sum(1 for stats in daily_stats.values() if stats['success']),
+            'active_days': sum(1 for stats in daily_stats.values() if stats['cards_studied'] > 0),
+            'validation_codes': len(validation_data),
+            'level_changes': len(level_history),
+            'avg_cards_per_day': round(studied_cards / total_days, 1) if total_days else 0,
+            'distinct_cards': card_totals['distinct_cards'] if card_totals else None,
+            'distinct_cards_approximate': bool(card_totals and card_totals['approximate'])
+        }
+    
+    def generate_report_with_direct_data(self, deck_id, start_date, end_date):
+        """
+        Generiert einen vollständigen HTML-Bericht für den angegebenen Zeitraum
+        mit direktem Datenbankzugriff für zuverlässigere Ergebnisse.
+        
+        Kann in einem Hintergrundthread laufen: Der Fortschritt wird über
+        progress_callback gemeldet, und zwischen den Phasen sowie in längeren
+        Schleifen wird das cancel_token geprüft.
+        
+        Args:
+            deck_id: ID des Decks
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+                
+        Returns:
+            str: HTML-Inhalt des Berichts
+            
+        Raises:
+            OperationCancelledError: Wenn der Benutzer den Vorgang abgebrochen hat
+        """
+        try:
+            report_data = self.get_report_data(deck_id, start_date, end_date)
+            
+            if 'validation_errors' in report_data:
+                error_msg = "\n".join(report_data['validation_errors'])
+                return self._generate_error_report(f"Fehler bei der Datenvalidierung:\n{error_msg}")
+            
             # Erzeuge den HTML-Bericht
-            progress.setValue(90)
-            progress.setLabelText("Generiere HTML-Bericht...")
-            QApplication.processEvents()
+            self._check_cancelled()
+            self._report_progress(90, "Generiere HTML-Bericht...")
             
             html_content = self._generate_html_report(
-                deck_name,
-                validation_data_json,
-                level_history_json,
-                day_details,
+                report_data['deck_name'],
+                json.dumps(report_data['validation_data']),
+                json.dumps(report_data['level_history']),
+                report_data['day_details'],
                 start_date,
                 end_date,
-                deck_id
+                deck_id,
+                daily_stats=report_data['daily_stats']
             )
             
-            progress.setValue(100)
-            progress.close()
+            self._report_progress(100, "Bericht erstellt")
             
             return html_content
+        except OperationCancelledError:
+            print("Study Tracker: Berichtsgenerierung abgebrochen")
+            raise
         except Exception as e:
-            if 'progress' in locals():
-                progress.close()
-                
             print(f"Study Tracker: Fehler bei der Berichtsgenerierung: {e}")
             traceback.print_exc()
             
             # Erstelle minimalen Fehlerbericht
             return self._generate_error_report(str(e))
             
+    def split_report_periods(self, start_date, end_date, period="month"):
+        """
+        Teilt einen Zeitraum in Monats- oder Quartalsabschnitte auf. Der erste und
+        letzte Abschnitt werden auf den gewählten Zeitraum begrenzt.
+        
+        Args:
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            period: "month" oder "quarter"
+            
+        Returns:
+            list: Abschnitte als Dictionaries mit key, label, start_date und end_date
+        """
+        month_names = [
+            "Januar", "Februar", "März", "April", "Mai", "Juni",
+            "Juli", "August", "September", "Oktober", "November", "Dezember"
+        ]
+        months_per_section = 3 if period == "quarter" else 1
+        
+        current_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end_date_obj = datetime.strptime(end_date, "%Y-%m-%d").date()
+        sections = []
+        
+        while current_date <= end_date_obj:
+            first_month = (current_date.month - 1) // months_per_section * months_per_section
+            next_month = first_month + months_per_section
+            next_start = datetime(current_date.year + next_month // 12, next_month % 12 + 1, 1).date()
+            section_end = min(next_start - timedelta(days=1), end_date_obj)
+            
+            if period == "quarter":
+                quarter = first_month // 3 + 1
+                key = f"{current_date.year}-q{quarter}"
+                label = f"{quarter}. Quartal {current_date.year}"
+            else:
+                key = current_date.strftime("%Y-%m")
+                label = f"{month_names[current_date.month - 1]} {current_date.year}"
+            
+            sections.append({
+                'key': key,
+                'label': label,
+                'start_date': current_date.strftime("%Y-%m-%d"),
+                'end_date': section_end.strftime("%Y-%m-%d")
+            })
+            current_date = next_start
+        
+        return sections
+    
+    def collect_section_data(self, deck_id, sections):
+        """
+        Sammelt die Berichtsdaten aller Abschnitte. Gecachte Abschnitte werden
+        direkt übernommen, fehlende parallel mit je eigener Datenbankverbindung
+        gesammelt. Die gemeinsame Vorbereitung muss bereits erfolgt sein.
+        
+        Args:
+            deck_id: ID des Decks
+            sections: Abschnitte aus split_report_periods
+            
+        Returns:
+            list: Berichtsdaten je Abschnitt in der Reihenfolge der Abschnitte
+        """
+        results = [None] * len(sections)
+        pending = []
+        
+        for index, section in enumerate(sections):
+            cached = self.get_cached_report_data(deck_id, section['start_date'], section['end_date'])
+            if cached is not None:
+                results[index] = cached
+            else:
+                pending.append(index)
+        
+        print(f"Study Tracker: {len(sections) - len(pending)} von {len(sections)} Abschnitten aus dem Cache")
+        
+        def build_section(section):
+            # SQLite-Verbindungen sind threadgebunden, daher eine eigene Verbindung pro Abschnitt
+            db = Database()
+            try:
+                generator = ReportGenerator(db, cancel_token=self.cancel_token, cache=self.cache, collection=self.collection)
+                return generator.get_report_data(deck_id, section['start_date'], section['end_date'], prepare=False)
+            finally:
+                db.close()
+        
+        if len(pending) == 1:
+            section = sections[pending[0]]
+            results[pending[0]] = self.get_report_data(deck_id, section['start_date'], section['end_date'], prepare=False)
+        elif pending:
+            with ThreadPoolExecutor(max_workers=min(REPORT_SECTION_WORKERS, len(pending))) as executor:
+                futures = {executor.submit(build_section, sections[index]): index for index in pending}
+                for done_count, future in enumerate(as_completed(futures), 1):
+                    results[futures[future]] = future.result()
+                    self._report_progress(
+                        25 + int(45 * done_count / len(pending)),
+                        f"Abschnitt {done_count} von {len(pending)} gesammelt..."
+                    )
+        
+        return results
+    
+    def generate_multi_period_report(self, deck_id, start_date, end_date, period="month", as_folder=False):
+        """
+        Generiert einen mehrteiligen Bericht ohne Begrenzung der Zeitraumlänge.
+        Der Zeitraum wird in Monats- oder Quartalsabschnitte aufgeteilt, die
+        unabhängig voneinander gesammelt und gecacht werden.
+        
+        Args:
+            deck_id: ID des Decks
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            period: "month" oder "quarter"
+            as_folder: True für einen Ordner mit verlinkten Seiten, False für
+                       eine einzelne Datei mit Navigationsindex
+            
+        Returns:
+            dict: Dateiname -> HTML-Inhalt. Die Übersicht heißt immer "index.html";
+                  als Einzeldatei ist sie der einzige Eintrag.
+            
+        Raises:
+            OperationCancelledError: Wenn der Benutzer den Vorgang abgebrochen hat
+        """
+        try:
+            self._report_progress(1, "Validiere Daten...")
+            validation_errors = self.validate_data_before_report(deck_id, start_date, end_date, max_days=None)
+            if validation_errors:
+                error_msg = "\n".join(validation_errors)
+                return {'index.html': self._generate_error_report(f"Fehler bei der Datenvalidierung:\n{error_msg}")}
+            
+            # Gemeinsame Vorbereitung nur einmal für den gesamten Zeitraum
+            self._check_cancelled()
+            self.prepare_report_data(deck_id, start_date, end_date)
+            
+            self._check_cancelled()
+            self._report_progress(25, "Sammle Abschnitte...")
+            sections = self.split_report_periods(start_date, end_date, period)
+            section_data = self.collect_section_data(deck_id, sections)
+            
+            deck_name = section_data[0]['deck_name'] if section_data else "Unbekannter Stapel"
+            for section, report_data in zip(sections, section_data):
+                section['file_name'] = f"abschnitt-{section['key']}.html"
+                section['summary'] = report_data.get('summary') or self.build_report_summary(
+                    report_data['daily_stats'],
+                    report_data['validation_data'],
+                    report_data['level_history']
+                )
+            
+            # Abschnitte rendern
+            pages = {}
+            for index, (section, report_data) in enumerate(zip(sections, section_data)):
+                self._check_cancelled()
+                self._report_progress(
+                    70 + int(25 * index / len(sections)),
+                    f"Generiere Abschnitt {section['label']}..."
+                )
+                
+                navigation_html = self._build_section_navigation(sections, index) if as_folder else ""
+                pages[section['file_name']] = self._generate_html_report(
+                    deck_name,
+                    json.dumps(report_data['validation_data']),
+                    json.dumps(report_data['level_history']),
+                    report_data['day_details'],
+                    section['start_date'],
+                    section['end_date'],
+                    deck_id,
+                    daily_stats=report_data['daily_stats'],
+                    navigation_html=navigation_html
+                )
+            
+            self._report_progress(96, "Erstelle Übersicht...")
+            if as_folder:
+                pages['index.html'] = self._generate_section_index(deck_name, sections, start_date, end_date)
+            else:
+                pages = {'index.html': self._generate_paginated_report(deck_name, sections, pages, start_date, end_date)}
+            
+            self._report_progress(100, "Bericht erstellt")
+            return pages
+        except OperationCancelledError:
+            print("Study Tracker: Berichtsgenerierung abgebrochen")
+            raise
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Generierung des mehrteiligen Berichts: {e}")
+            traceback.print_exc()
+            return {'index.html': self._generate_error_report(str(e))}
+    
+    def _build_section_navigation(self, sections, index):
+        """Erzeugt die Navigationsleiste einer Abschnittsseite im Ordner-Modus"""
+        links = ['<a href="index.html" class="text-blue-700 hover:underline">Übersicht</a>']
+        if index > 0:
+            previous = sections[index - 1]
+            links.append(f'<a href="{previous["file_name"]}" class="text-blue-700 hover:underline">&lsaquo; {escape_html(previous["label"])}</a>')
+        if index < len(sections) - 1:
+            following = sections[index + 1]
+            links.append(f'<a href="{following["file_name"]}" class="text-blue-700 hover:underline">{escape_html(following["label"])} &rsaquo;</a>')
+        
+        return f"""
+            <nav class="bg-white rounded-lg shadow-md p-4 mb-6 flex justify-between items-center">
+                <span class="font-semibold">{escape_html(sections[index]['label'])}</span>
+                <span class="space-x-4">{' '.join(links)}</span>
+            </nav>
+        """
+    
+    def _build_section_rows(self, sections, link_attribute):
+        """Erzeugt die Tabellenzeilen der Abschnittsübersicht"""
+        rows = ""
+        for index, section in enumerate(sections):
+            summary = section['summary']
+            link = link_attribute(index, section)
+            # Ältere Zusammenfassungen (Cache) haben noch keine Kartenzahl; "≈" bei verdichteten Zeiträumen
+            distinct_cards = summary.get('distinct_cards')
+            if distinct_cards is None:
+                distinct_cards = "–"
+            elif summary.get('distinct_cards_approximate'):
+                distinct_cards = f"≈{distinct_cards}"
+            rows += f"""
+                    <tr>
+                        <td><a {link}>{escape_html(section['label'])}</a></td>
+                        <td>{format_date(section['start_date'])} – {format_date(section['end_date'])}</td>
+                        <td class="num">{summary['studied_cards']}</td>
+                        <td class="num">{distinct_cards}</td>
+                        <td class="num">{summary['successful_days']}/{summary['total_days']}</td>
+                        <td class="num">{summary['avg_cards_per_day']:.1f}</td>
+                        <td class="num">{summary['validation_codes']}</td>
+                        <td class="num">{summary['level_changes']}</td>
+                    </tr>
+            """
+        return rows
+    
+    def _section_index_table(self, rows, first_column="Abschnitt"):
+        """Umschließt die Abschnittszeilen mit Tabellenkopf"""
+        return f"""
+            <table class="section-index">
+                <thead>
+                    <tr>
+                        <th>{first_column}</th>
+                        <th>Zeitraum</th>
+                        <th class="num">Gelernte Karten</th>
+                        <th class="num">Verschiedene Karten</th>
+                        <th class="num">Erfolgreiche Tage</th>
+                        <th class="num">∅ Karten/Tag</th>
+                        <th class="num">Validierungscodes</th>
+                        <th class="num">Level-Änderungen</th>
+                    </tr>
+                </thead>
+                <tbody>{rows}</tbody>
+            </table>
+        """
+    
+    def _section_index_css(self):
+        """Gemeinsame Stile für Übersichtsseiten mehrteiliger Berichte"""
+        return """
+            body { font-family: -apple-system, "Segoe UI", Roboto, sans-serif; margin: 0; background: #f9fafb; color: #111827; }
+            h1 { font-size: 1.5rem; margin: 0 0 0.25rem 0; }
+            .period { color: #4b5563; margin: 0 0 1rem 0; }
+            table.section-index { width: 100%; border-collapse: collapse; background: #fff; font-size: 0.875rem; }
+            table.section-index th, table.section-index td { padding: 0.5rem; border-bottom: 1px solid #e5e7eb; text-align: left; }
+            table.section-index th { background: #f3f4f6; }
+            table.section-index .num { text-align: right; }
+            table.section-index a { color: #1d4ed8; text-decoration: none; cursor: pointer; }
+            table.section-index a:hover { text-decoration: underline; }
+            table.section-index tr.active { background: #eff6ff; }
+        """
+    
+    def _generate_section_index(self, deck_name, sections, start_date, end_date):
+        """Erzeugt die Übersichtsseite für einen Bericht als Ordner mit verlinkten Seiten"""
+        rows = self._build_section_rows(
+            sections,
+            lambda index, section: f'href="{section["file_name"]}"'
+        )
+        return f"""<!DOCTYPE html>
+    <html lang="de">
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Lernbericht: {escape_html(deck_name)}</title>
+        <style>
+        {self._section_index_css()}
+        .page {{ max-width: 1100px; margin: 0 auto; padding: 2rem 1rem; }}
+        </style>
+    </head>
+    <body>
+        <div class="page">
+            <h1>Lernbericht: {escape_html(deck_name)}</h1>
+            <p class="period">Zeitraum: {format_date(start_date)} bis {format_date(end_date)} · {len(sections)} Abschnitte</p>
+            {self._section_index_table(rows)}
+        </div>
+    </body>
+    </html>
+    """
+    
+    def build_batch_targets(self, deck_ids=None, backup_dir=None):
+        """
+        Stellt die Einzelberichte eines Sammelberichts zusammen
+        
+        Args:
+            deck_ids: Decks, für die Berichte erstellt werden. Bei Schüler-Backups
+                      optionaler Filter; ohne Angabe werden alle Decks eines Backups verwendet.
+            backup_dir: Ordner mit Schüler-Datenbanken (*.db); ohne Angabe wird die
+                        eigene Datenbank verwendet
+            
+        Returns:
+            list: Berichte als Dictionaries mit key, student, db_path, copy_path und deck_id
+            
+        Schüler-Backups werden nur gelesen: ausgewertet wird eine Arbeitskopie
+        in einem temporären Ordner (siehe remove_student_copies).
+        """
+        targets = []
+        used_keys = set()
+        
+        def add_target(student, db_path, deck_id, copy_path=None):
+            base_key = re.sub(r'[^A-Za-z0-9_-]+', '-', f"{student}-{deck_id}" if student else str(deck_id)).strip('-')
+            key = base_key or "bericht"
+            suffix = 2
+            while key in used_keys:
+                key = f"{base_key}-{suffix}"
+                suffix += 1
+            used_keys.add(key)
+            targets.append({
+                'key': key, 'student': student, 'db_path': db_path,
+                'copy_path': copy_path, 'deck_id': deck_id
+            })
+        
+        if not backup_dir:
+            for deck_id in deck_ids or []:
+                add_target(None, None, deck_id)
+            return targets
+        
+        for file_name in sorted(os.listdir(backup_dir)):
+            if not file_name.lower().endswith(".db"):
+                continue
+            self._check_cancelled()
+            db_path = os.path.join(backup_dir, file_name)
+            student = os.path.splitext(file_name)[0]
+            
+            if self.student_copy_dir is None:
+                self.student_copy_dir = tempfile.mkdtemp(prefix="study_tracker_students_")
+            copy_path = os.path.join(self.student_copy_dir, f"{len(os.listdir(self.student_copy_dir))}.db")
+            copy_read_only(db_path, copy_path, self.cancel_token)
+            
+            # Schema-Anpassungen betreffen nur die Kopie
+            db = Database(copy_path, source_path=db_path)
+            try:
+                tracked_decks = db.get_tracked_deck_ids()
+            finally:
+                db.close()
+            
+            for deck_id in tracked_decks:
+                if not deck_ids or deck_id in deck_ids:
+                    add_target(student, db_path, deck_id, copy_path)
+        
+        return targets
+    
+    def remove_student_copies(self):
+        """Löscht die Arbeitskopien der Schüler-Backups"""
+        if self.student_copy_dir:
+            shutil.rmtree(self.student_copy_dir, ignore_errors=True)
+            self.student_copy_dir = None
+    
+    def generate_batch_reports(self, targets, start_date, end_date):
+        """
+        Generiert Berichte für mehrere Decks und/oder Schüler-Datenbanken in einem Lauf.
+        Die deckübergreifende Vorbereitung erfolgt nur einmal; die Einzelberichte
+        werden parallel mit je eigener Datenbankverbindung gesammelt und gerendert.
+        
+        Args:
+            targets: Berichte aus build_batch_targets
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            
+        Returns:
+            dict: Dateiname -> HTML-Inhalt, mit "index.html" als Übersicht
+            
+        Raises:
+            OperationCancelledError: Wenn der Benutzer den Vorgang abgebrochen hat
+        """
+        try:
+            if not targets:
+                return {'index.html': self._generate_error_report("Keine Decks oder Schüler-Datenbanken mit Lerndaten gefunden")}
+            
+            # Gemeinsame Vorbereitung nur einmal und nur für die eigene Datenbank;
+            # Schüler-Backups werden unverändert ausgewertet
+            if any(target['db_path'] is None for target in targets):
+                self._report_progress(5, "Synchronisiere Kartendaten...")
+                self.db.prepare_shared_report_data(self.collection)
+                
+                self._check_cancelled()
+                self._report_progress(15, "Aktualisiere Kartendaten...")
+                collector = StudyStatisticsCollector(self.db)
+                collector.parse_validation_codes_from_cards(
+                    cancel_token=self.cancel_token,
+                    notes=self.collection.validation_notes if self.collection is not None else None
+                )
+            
+            def build_target(target):
+                # Eigene Verbindung pro Bericht, da SQLite-Verbindungen threadgebunden sind
+                db = Database(target['copy_path'], source_path=target['db_path'])
+                try:
+                    generator = ReportGenerator(db, cancel_token=self.cancel_token, cache=self.cache, collection=self.collection)
+                    validation_errors = generator.validate_data_before_report(target['deck_id'], start_date, end_date)
+                    if validation_errors:
+                        return None, "; ".join(validation_errors)
+                    
+                    report_data = generator.get_report_data(target['deck_id'], start_date, end_date, prepare=False)
+                    if 'validation_errors' in report_data:
+                        return None, "; ".join(report_data['validation_errors'])
+                    
+                    generator._check_cancelled()
+                    html = generator._generate_html_report(
+                        report_data['deck_name'],
+                        json.dumps(report_data['validation_data']),
+                        json.dumps(report_data['level_history']),
+                        report_data['day_details'],
+                        start_date,
+                        end_date,
+                        target['deck_id'],
+                        daily_stats=report_data['daily_stats']
+                    )
+                    return report_data, html
+                finally:
+                    db.close()
+            
+            self._check_cancelled()
+            self._report_progress(25, "Erstelle Einzelberichte...")
+            pages = {}
+            with ThreadPoolExecutor(max_workers=min(REPORT_SECTION_WORKERS, len(targets))) as executor:
+                futures = {executor.submit(build_target, target): target for target in targets}
+                for done_count, future in enumerate(as_completed(futures), 1):
+                    target = futures[future]
+                    report_data, result = future.result()
+                    
+                    if report_data is None:
+                        target['error'] = result
+                        target['label'] = self._batch_target_label(target, f"Deck {target['deck_id']}")
+                    else:
+                        target['file_name'] = f"bericht-{target['key']}.html"
+                        target['label'] = self._batch_target_label(target, report_data['deck_name'])
+                        target['start_date'] = start_date
+                        target['end_date'] = end_date
+                        target['summary'] = report_data.get('summary') or self.build_report_summary(
+                            report_data['daily_stats'],
+                            report_data['validation_data'],
+                            report_data['level_history']
+                        )
+                        pages[target['file_name']] = result
+                    
+                    self._report_progress(
+                        25 + int(70 * done_count / len(targets)),
+                        f"Bericht {done_count} von {len(targets)} erstellt..."
+                    )
+            
+            self._report_progress(96, "Erstelle Übersicht...")
+            pages['index.html'] = self._generate_batch_index(targets, start_date, end_date)
+            
+            self._report_progress(100, "Berichte erstellt")
+            return pages
+        except OperationCancelledError:
+            print("Study Tracker: Sammelbericht abgebrochen")
+            raise
+        except Exception as e:
+            print(f"Study Tracker: Fehler bei der Generierung des Sammelberichts: {e}")
+            traceback.print_exc()
+            return {'index.html': self._generate_error_report(str(e))}
+    
+    def _batch_target_label(self, target, deck_name):
+        """Anzeigename eines Einzelberichts im Sammelbericht"""
+        if target['student']:
+            return f"{target['student']} – {deck_name}"
+        return deck_name
+    
+    def _generate_batch_index(self, targets, start_date, end_date):
+        """Erzeugt die Übersichtsseite eines Sammelberichts mit Links auf alle Einzelberichte"""
+        reports = sorted((t for t in targets if 'file_name' in t), key=lambda t: t['label'].lower())
+        skipped = sorted((t for t in targets if 'file_name' not in t), key=lambda t: t['label'].lower())
+        
+        rows = self._build_section_rows(
+            reports,
+            lambda index, target: f'href="{target["file_name"]}"'
+        )
+        for target in skipped:
+            rows += f"""
+                    <tr>
+                        <td>{escape_html(target['label'])}</td>
+                        <td colspan="6" class="period">Kein Bericht: {escape_html(target['error'])}</td>
+                    </tr>
+            """
+        
+        return f"""<!DOCTYPE html>
+    <html lang="de">
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Sammelbericht</title>
+        <style>
+        {self._section_index_css()}
+        .page {{ max-width: 1100px; margin: 0 auto; padding: 2rem 1rem; }}
+        </style>
+    </head>
+    <body>
+        <div class="page">
+            <h1>Sammelbericht</h1>
+            <p class="period">Zeitraum: {format_date(start_date)} bis {format_date(end_date)} · {len(reports)} Berichte</p>
+            {self._section_index_table(rows, first_column="Bericht")}
+        </div>
+    </body>
+    </html>
+    """
+    
+    def _generate_paginated_report(self, deck_name, sections, pages, start_date, end_date):
+        """
+        Erzeugt eine einzelne HTML-Datei mit Navigationsindex. Die Abschnitte
+        werden als eigenständige Seiten eingebettet und erst beim Aufruf in
+        einem Rahmen angezeigt, sodass immer nur ein Abschnitt gerendert wird.
+        """
+        rows = self._build_section_rows(
+            sections,
+            lambda index, section: f'href="#{section["key"]}" data-section="{index}"'
+        )
+        
+        section_payload = [
+            {'key': section['key'], 'label': section['label'], 'html': pages[section['file_name']]}
+            for section in sections
+        ]
+        # Verhindert, dass eingebettete Seiten das umgebende Script-Tag beenden
+        payload_json = json.dumps(section_payload).replace("</", "<\\/").replace("<!--", "<\\!--")
+        
+        return f"""<!DOCTYPE html>
+    <html lang="de">
+    <head>
+        <meta charset="utf-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <title>Lernbericht: {escape_html(deck_name)}</title>
+        <style>
+        {self._section_index_css()}
+        .layout {{ display: flex; height: 100vh; }}
+        .sidebar {{ width: 38%; min-width: 320px; overflow-y: auto; padding: 1.5rem 1rem; box-sizing: border-box; border-right: 1px solid #e5e7eb; }}
+        .content {{ flex: 1; display: flex; flex-direction: column; }}
+        .pager {{ display: flex; justify-content: space-between; align-items: center; padding: 0.5rem 1rem; background: #fff; border-bottom: 1px solid #e5e7eb; }}
+        .pager button {{ padding: 0.25rem 0.75rem; border: 1px solid #d1d5db; background: #fff; border-radius: 4px; cursor: pointer; }}
+        .pager button:disabled {{ opacity: 0.4; cursor: default; }}
+        #section-frame {{ flex: 1; width: 100%; border: 0; background: #fff; }}
+        @media (max-width: 800px) {{
+            .layout {{ flex-direction: column; height: auto; }}
+            .sidebar {{ width: 100%; min-width: 0; border-right: 0; }}
+            #section-frame {{ height: 100vh; }}
+        }}
+        </style>
+    </head>
+    <body>
+        <div class="layout">
+            <aside class="sidebar">
+                <h1>Lernbericht: {escape_html(deck_name)}</h1>
+                <p class="period">Zeitraum: {format_date(start_date)} bis {format_date(end_date)} · {len(sections)} Abschnitte</p>
+                {self._section_index_table(rows)}
+            </aside>
+            <main class="content">
+                <div class="pager">
+                    <button id="prev-section">&lsaquo; Zurück</button>
+                    <strong id="section-label"></strong>
+                    <button id="next-section">Weiter &rsaquo;</button>
+                </div>
+                <iframe id="section-frame" title="Berichtsabschnitt"></iframe>
+            </main>
+        </div>
+        <script>
+        const sections = {payload_json};
+        let currentSection = -1;
+        
+        function showSection(index) {{
+            if (index < 0 || index >= sections.length || index === currentSection) return;
+            currentSection = index;
+            document.getElementById('section-frame').srcdoc = sections[index].html;
+            document.getElementById('section-label').textContent = sections[index].label;
+            document.getElementById('prev-section').disabled = index === 0;
+            document.getElementById('next-section').disabled = index === sections.length - 1;
+            document.querySelectorAll('table.section-index tbody tr').forEach(function(row, rowIndex) {{
+                row.classList.toggle('active', rowIndex === index);
+            }});
+            if (location.hash !== '#' + sections[index].key) {{
+                history.replaceState(null, '', '#' + sections[index].key);
+            }}
+        }}
+        
+        function sectionFromHash() {{
+            const key = location.hash.substring(1);
+            const index = sections.findIndex(function(section) {{ return section.key === key; }});
+            return index >= 0 ? index : sections.length - 1;
+        }}
+        
+        document.querySelectorAll('a[data-section]').forEach(function(link) {{
+            link.addEventListener('click', function(event) {{
+                event.preventDefault();
+                showSection(parseInt(this.getAttribute('data-section'), 10));
+            }});
+        }});
+        document.getElementById('prev-section').addEventListener('click', function() {{ showSection(currentSection - 1); }});
+        document.getElementById('next-section').addEventListener('click', function() {{ showSection(currentSection + 1); }});
+        window.addEventListener('hashchange', function() {{ showSection(sectionFromHash()); }});
+        
+        showSection(sectionFromHash());
+        </script>
+    </body>
+    </html>
+    """
+    
     def _generate_error_report(self, error_message):
         """Generiert einen HTML-Fehlerbericht"""
         error_html = f"""<!DOCTYPE html>
@@ -4808,8 +9487,11 @@ class ReportGenerator:
         </html>"""
         return error_html
     
-    def validate_data_before_report(self, deck_id, start_date, end_date):
-        """Validiert Daten vor der Berichterstellung, um Probleme frühzeitig zu erkennen"""
+    def validate_data_before_report(self, deck_id, start_date, end_date, max_days=366):
+        """
+        Validiert Daten vor der Berichterstellung, um Probleme frühzeitig zu erkennen.
+        Mit max_days=None entfällt die Längenbegrenzung (mehrteilige Berichte).
+        """
         validation_errors = []
         
         # 1. Prüfe, ob deck_id gültig ist
@@ -4830,14 +9512,17 @@ class ReportGenerator:
             
         # 4. Prüfe maximalen Zeitraum (optional)
         date_diff = (end_date_obj - start_date_obj).days
-        if date_diff > 366:  # Mehr als ein Jahr
-            validation_errors.append(f"Der gewählte Zeitraum von {date_diff} Tagen ist zu lang. Maximum: 366 Tage")
+        if max_days is not None and date_diff > max_days:
+            validation_errors.append(
+                f"Der gewählte Zeitraum von {date_diff} Tagen ist zu lang. Maximum: {max_days} Tage. "
+                f"Für längere Zeiträume bitte einen monatlich oder quartalsweise aufgeteilten Bericht wählen."
+            )
             
         # 5. Prüfe Datenverfügbarkeit (optional)
         try:
             cursor = self.db.conn.execute(
-                "SELECT COUNT(*) FROM daily_stats WHERE deck_id = ? AND date BETWEEN ? AND ?", 
-                (deck_id, start_date, end_date)
+                "SELECT COUNT(*) FROM daily_stats WHERE deck_id = ? AND day_num BETWEEN ? AND ?", 
+                (deck_id, day_number(start_date), day_number(end_date))
             )
             if cursor.fetchone()[0] == 0:
                 validation_errors.append(f"Keine Lernstatistiken für Deck {deck_id} im angegebenen Zeitraum")
@@ -4863,6 +9548,10 @@ class HeatmapWidget(QWidget):
         # Initialisiere Datenbank
         self.db = Database()
         
+        # Laufende Hintergrundaufgabe (z.B. Berichtserstellung)
+        self.report_job = None
+        self.export_job = None
+        
         # Konstanten für die Heatmap
         self.TOTAL_WEEKS = 29  # 203 Tage / 7 = 29 Wochen
         self.ROWS = self.TOTAL_WEEKS
@@ -4895,10 +9584,9 @@ class HeatmapWidget(QWidget):
         # Hole Installationsdatum
         installation_date_str = self.db.get_setting('installation_date')
         if installation_date_str:
-            try:
-                self.installation_date = datetime.strptime(installation_date_str, "%Y-%m-%d").date()
-            except ValueError:
-                self.installation_date = self.today - timedelta(days=30)  # Fallback
+            self.installation_date = self.db.get_date_setting(
+                'installation_date', self.today - timedelta(days=30)  # Fallback
+            )
         else:
             # Setze und speichere Installationsdatum
             self.installation_date = self.today
@@ -5041,16 +9729,26 @@ class HeatmapWidget(QWidget):
             if widget:
                 widget.setParent(None)
         
+        # Statistiken des sichtbaren Zeitraums mit einer Abfrage laden
+        last_date = self.start_date + timedelta(days=self.ROWS * 7 - 1)
+        visible_stats = self.db.get_daily_stats_range(
+            self.start_date.strftime("%Y-%m-%d"),
+            last_date.strftime("%Y-%m-%d"),
+            self.deck_id
+        )
+        empty_stats = {'cards_due': 0, 'cards_studied': 0, 'study_time': 0}
+        
         for row in range(self.ROWS):
             for col in range(self.COLS):
                 current_date = self.start_date + timedelta(days=row * 7 + col)
+                stats = visible_stats.get(current_date.strftime("%Y-%m-%d"), empty_stats)
                 
                 # Standard: Grau
                 intensity = 0
                 
                 # Prüfe, ob das Datum nach der Installation liegt
                 if current_date >= self.installation_date and current_date <= self.today:
-                    intensity = self.get_day_intensity(current_date)
+                    intensity = self.get_day_intensity(current_date, stats)
                 
                 # Markiere heutigen Tag
                 is_today = current_date == self.today
@@ -5077,7 +9775,6 @@ class HeatmapWidget(QWidget):
                 
                 # Tooltip mit Details für den Tag
                 if current_date >= self.installation_date:
-                    stats = self.get_day_stats(current_date)
                     tooltip = (
                         f"<b>{current_date.strftime('%d.%m.%Y')}</b><br>"
                         f"Fällige Karten: {stats['cards_due']}<br>"
@@ -5087,22 +9784,25 @@ class HeatmapWidget(QWidget):
                 
                 self.grid_layout.addWidget(cell, row, col)
     
-    def get_day_intensity(self, date):
+    def get_day_intensity(self, date, stats=None):
         """
         Bestimmt die Intensität (Farbe) eines Tages in der Heatmap
         
+        Args:
+            date: Datum des Tages
+            stats: Optional bereits geladene Tagesstatistik
+        
         Returns:
             int: 0=Grau, 1=Grün, 2=Orange, 3=Rot
         """
-        stats = self.get_day_stats(date)
+        if stats is None:
+            stats = self.get_day_stats(date)
         cards_due = stats['cards_due']
         cards_studied = stats['cards_studied']
         
-        # Wenn keine Karten fällig waren, sollte der Tag grün sein
-        if cards_due == 0:
-            return 1  # Grün
-        # Wenn alle fälligen Karten gelernt wurden
-        elif cards_studied >= cards_due:
+        # Wenn das Tagesziel der Level-Regeln erreicht wurde (z.B. keine Karten fällig
+        # oder alle fälligen Karten gelernt), sollte der Tag grün sein
+        if not get_level_rules().is_missed(cards_due, cards_studied):
             return 1  # Grün
         # Wenn teilweise gelernt wurde
         elif cards_studied > 0:
@@ -5355,26 +10055,115 @@ class HeatmapWidget(QWidget):
         date_layout.addWidget(QLabel("Bis:"), 1, 0)
         date_layout.addWidget(end_date, 1, 1)
         
+        # Aufteilung für lange Zeiträume (mehr als ein Jahr nur mehrteilig)
+        period_combo = QComboBox()
+        period_combo.addItem("Ein Bericht (max. 1 Jahr)", None)
+        period_combo.addItem("Monatliche Abschnitte", "month")
+        period_combo.addItem("Quartalsabschnitte", "quarter")
+        
+        output_combo = QComboBox()
+        output_combo.addItem("Eine Datei mit Navigation", False)
+        output_combo.addItem("Ordner mit verlinkten Seiten", True)
+        output_combo.setEnabled(False)
+        period_combo.currentIndexChanged.connect(
+            lambda index: output_combo.setEnabled(period_combo.itemData(index) is not None)
+        )
+        
+        date_layout.addWidget(QLabel("Aufteilung:"), 2, 0)
+        date_layout.addWidget(period_combo, 2, 1)
+        date_layout.addWidget(QLabel("Ausgabe:"), 3, 0)
+        date_layout.addWidget(output_combo, 3, 1)
+        
+        # Sammelberichte für mehrere Stapel oder einen Ordner mit Schüler-Backups
+        scope_combo = QComboBox()
+        scope_combo.addItem("Aktueller Stapel", None)
+        scope_combo.addItem("Mehrere Stapel", "decks")
+        scope_combo.addItem("Ordner mit Schüler-Backups", "backups")
+        date_layout.addWidget(QLabel("Bericht für:"), 4, 0)
+        date_layout.addWidget(scope_combo, 4, 1)
+        
         layout.addLayout(date_layout)
         
+        deck_list_label = QLabel("Stapel (bei Backups optional als Filter):")
+        deck_list = QListWidget()
+        deck_list.setMinimumHeight(120)
+        try:
+            if mw and mw.col:
+                for deck in sorted(mw.col.decks.all(), key=lambda d: d['name'].lower()):
+                    item = QListWidgetItem(deck['name'])
+                    item.setData(Qt.ItemDataRole.UserRole, deck['id'])
+                    item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                    item.setCheckState(
+                        Qt.CheckState.Checked if deck['id'] == self.deck_id else Qt.CheckState.Unchecked
+                    )
+                    deck_list.addItem(item)
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Laden der Stapel für den Sammelbericht: {e}")
+        deck_list_label.setVisible(False)
+        deck_list.setVisible(False)
+        layout.addWidget(deck_list_label)
+        layout.addWidget(deck_list)
+        
+        def update_scope(index):
+            is_batch = scope_combo.itemData(index) is not None
+            deck_list_label.setVisible(is_batch)
+            deck_list.setVisible(is_batch)
+            # Sammelberichte bestehen aus je einem Einzelbericht pro Stapel
+            period_combo.setEnabled(not is_batch)
+            output_combo.setEnabled(not is_batch and period_combo.currentData() is not None)
+        
+        scope_combo.currentIndexChanged.connect(update_scope)
+        
+        def accept_dialog():
+            scope = scope_combo.currentData()
+            if scope:
+                deck_ids = [
+                    deck_list.item(row).data(Qt.ItemDataRole.UserRole)
+                    for row in range(deck_list.count())
+                    if deck_list.item(row).checkState() == Qt.CheckState.Checked
+                ]
+                if scope == "decks" and not deck_ids:
+                    QMessageBox.warning(dialog, "Keine Stapel ausgewählt", "Bitte wählen Sie mindestens einen Stapel aus.")
+                    return
+                dialog.accept()
+                self.export_batch_report(
+                    start_date.date().toString("yyyy-MM-dd"),
+                    end_date.date().toString("yyyy-MM-dd"),
+                    deck_ids=deck_ids,
+                    from_backups=scope == "backups"
+                )
+                return
+            
+            dialog.accept()
+            self.export_report(
+                start_date.date().toString("yyyy-MM-dd"),
+                end_date.date().toString("yyyy-MM-dd"),
+                period=period_combo.currentData(),
+                as_folder=bool(output_combo.currentData()) if period_combo.currentData() else False
+            )
+        
         # Buttons
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | 
             QDialogButtonBox.StandardButton.Cancel
         )
-        buttons.accepted.connect(
-            lambda: self.export_report(
-                start_date.date().toString("yyyy-MM-dd"),
-                end_date.date().toString("yyyy-MM-dd")
-            )
-        )
+        buttons.accepted.connect(accept_dialog)
         buttons.rejected.connect(dialog.reject)
         
         layout.addWidget(buttons)
         dialog.exec()
     
-    def export_report(self, start_date, end_date):
-        """Exportiert den Bericht für den gewählten Zeitraum mit direkter Datenbankabfrage"""
+    def export_report(self, start_date, end_date, period=None, as_folder=False):
+        """
+        Exportiert den Bericht für den gewählten Zeitraum mit direkter Datenbankabfrage
+        
+        Args:
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            period: None für einen Einzelbericht, "month" oder "quarter" für
+                    einen mehrteiligen Bericht ohne Längenbegrenzung
+            as_folder: Mehrteiligen Bericht als Ordner mit verlinkten Seiten speichern
+        """
         if not self.deck_id:
             QMessageBox.warning(
                 self,
@@ -5383,67 +10172,221 @@ class HeatmapWidget(QWidget):
             )
             return
         
-        file_name, _ = QFileDialog.getSaveFileName(
-            self,
-            "Bericht speichern",
-            "",
-            "HTML Dateien (*.html);;Alle Dateien (*.*)"
-        )
+        if period and as_folder:
+            file_name = QFileDialog.getExistingDirectory(
+                self,
+                "Ordner für den Bericht wählen"
+            )
+        else:
+            file_name, _ = QFileDialog.getSaveFileName(
+                self,
+                "Bericht speichern",
+                "",
+                "HTML Dateien (*.html);;Alle Dateien (*.*)"
+            )
         
-        if file_name:
+        if not file_name:
+            return
+        
+        deck_id = self.deck_id
+        # Die Anki-Sammlung wird nur hier im Hauptthread gelesen
+        collection = CollectionSnapshot.capture(self.db)
+        
+        def build_report(report_progress, cancel_token):
+            # Läuft im Hintergrundthread und benötigt daher eine eigene Verbindung
+            db = Database()
             try:
-                # Zeige Fortschrittsdialog
-                progress = QProgressDialog("Bereite Bericht vor...", "Abbrechen", 0, 100, self)
-                progress.setWindowTitle("Study Tracker")
-                progress.setWindowModality(get_qt_enum(Qt.WindowModality, "WindowModal"))
-                progress.setValue(0)
-                progress.show()
-                QApplication.processEvents()
-                
                 # Prüfe Datenbankintegrität vor Berichtserstellung
-                progress.setValue(5)
-                progress.setLabelText("Prüfe Datenbank...")
-                QApplication.processEvents()
-                
-                self.db.repair_database_if_needed()
+                report_progress(2, "Prüfe Datenbank...")
+                if not db.repair_database_if_needed():
+                    raise DatabaseIntegrityError("Die Datenbank ist beschädigt.")
+                cancel_token.raise_if_cancelled()
                 
                 # Erzeuge Bericht mit direkter Datenbankabfrage
-                progress.setValue(10)
-                progress.setLabelText("Generiere Bericht...")
-                QApplication.processEvents()
-                
-                report_generator = ReportGenerator(self.db)
-                html_content = report_generator.generate_report_with_direct_data(
-                    self.deck_id,
+                report_generator = ReportGenerator(db, report_progress, cancel_token, collection=collection)
+                if period:
+                    return report_generator.generate_multi_period_report(
+                        deck_id,
+                        start_date,
+                        end_date,
+                        period=period,
+                        as_folder=as_folder
+                    )
+                return report_generator.generate_report_with_direct_data(
+                    deck_id,
                     start_date,
                     end_date
                 )
-                
-                # Speichere Bericht
-                progress.setValue(90)
-                progress.setLabelText("Speichere Bericht...")
-                QApplication.processEvents()
-                
-                with open(file_name, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-                progress.setValue(100)
-                progress.close()
+            finally:
+                db.close()
+        
+        def save_report(report_content):
+            # Nur das Speichern der Datei(en) erfolgt im Hauptthread
+            try:
+                if isinstance(report_content, dict) and as_folder:
+                    os.makedirs(file_name, exist_ok=True)
+                    for page_name, page_html in report_content.items():
+                        with open(os.path.join(file_name, page_name), 'w', encoding='utf-8') as f:
+                            f.write(page_html)
+                    saved_path = os.path.join(file_name, "index.html")
+                else:
+                    if isinstance(report_content, dict):
+                        report_content = report_content['index.html']
+                    with open(file_name, 'w', encoding='utf-8') as f:
+                        f.write(report_content)
+                    saved_path = file_name
                 
                 QMessageBox.information(
                     self,
                     "Erfolg",
-                    f"Bericht wurde erfolgreich gespeichert unter:\n{file_name}"
+                    f"Bericht wurde erfolgreich gespeichert unter:\n{saved_path}"
                 )
             except Exception as e:
-                if 'progress' in locals():
-                    progress.close()
-                    
                 QMessageBox.critical(
                     self,
                     "Fehler",
                     f"Fehler beim Speichern des Berichts:\n{str(e)}"
                 )
+        
+        def report_failed(error):
+            if isinstance(error, DatabaseIntegrityError):
+                self.offer_database_repair(error)
+                return
+            QMessageBox.critical(
+                self,
+                "Fehler",
+                f"Fehler beim Erstellen des Berichts:\n{str(error)}"
+            )
+        
+        self.report_job = BackgroundJob(
+            self,
+            "Bereite Bericht vor...",
+            build_report,
+            save_report,
+            on_failure=report_failed
+        )
+        self.report_job.start()
+    
+    def export_batch_report(self, start_date, end_date, deck_ids=None, from_backups=False):
+        """
+        Exportiert einen Sammelbericht mit je einem Bericht pro Stapel bzw. pro
+        Schüler-Backup und einer verlinkten Übersichtsseite in einen Ordner
+        
+        Args:
+            start_date: Startdatum im Format YYYY-MM-DD
+            end_date: Enddatum im Format YYYY-MM-DD
+            deck_ids: Ausgewählte Stapel (bei Backups optionaler Filter)
+            from_backups: True, um einen Ordner mit Schüler-Datenbanken auszuwerten
+        """
+        backup_dir = None
+        if from_backups:
+            backup_dir = QFileDialog.getExistingDirectory(
+                self,
+                "Ordner mit Schüler-Backups wählen"
+            )
+            if not backup_dir:
+                return
+        
+        output_dir = QFileDialog.getExistingDirectory(
+            self,
+            "Ordner für den Sammelbericht wählen"
+        )
+        if not output_dir:
+            return
+        
+        # Die Anki-Sammlung wird nur hier im Hauptthread gelesen; Schüler-Backups
+        # brauchen sie nicht, ihre Decknamen stehen im Backup
+        collection = None if from_backups else CollectionSnapshot.capture(self.db)
+        
+        def build_reports(report_progress, cancel_token):
+            # Läuft im Hintergrundthread und benötigt daher eine eigene Verbindung
+            db = Database()
+            report_generator = ReportGenerator(db, report_progress, cancel_token, collection=collection)
+            try:
+                # Integritätsprüfung einmal für alle Berichte
+                report_progress(2, "Prüfe Datenbank...")
+                if not db.repair_database_if_needed():
+                    raise DatabaseIntegrityError("Die Datenbank ist beschädigt.")
+                cancel_token.raise_if_cancelled()
+                
+                targets = report_generator.build_batch_targets(deck_ids, backup_dir)
+                return report_generator.generate_batch_reports(targets, start_date, end_date)
+            finally:
+                report_generator.remove_student_copies()
+                db.close()
+        
+        def save_reports(pages):
+            # Nur das Speichern der Dateien erfolgt im Hauptthread
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                for page_name, page_html in pages.items():
+                    with open(os.path.join(output_dir, page_name), 'w', encoding='utf-8') as f:
+                        f.write(page_html)
+                
+                QMessageBox.information(
+                    self,
+                    "Erfolg",
+                    f"{len(pages) - 1} Berichte wurden gespeichert. Übersicht:\n{os.path.join(output_dir, 'index.html')}"
+                )
+            except Exception as e:
+                QMessageBox.critical(
+                    self,
+                    "Fehler",
+                    f"Fehler beim Speichern des Sammelberichts:\n{str(e)}"
+                )
+        
+        def reports_failed(error):
+            if isinstance(error, DatabaseIntegrityError):
+                self.offer_database_repair(error)
+                return
+            QMessageBox.critical(
+                self,
+                "Fehler",
+                f"Fehler beim Erstellen des Sammelberichts:\n{str(error)}"
+            )
+        
+        self.report_job = BackgroundJob(
+            self,
+            "Bereite Sammelbericht vor...",
+            build_reports,
+            save_reports,
+            on_failure=reports_failed
+        )
+        self.report_job.start()
+    
+    def offer_database_repair(self, error):
+        """Bietet nach einer fehlgeschlagenen Integritätsprüfung die Reparatur an"""
+        answer = QMessageBox.question(
+            self,
+            "Datenbank beschädigt",
+            f"{error}\n\nBerichte sind gesperrt, bis die Datenbank repariert ist. "
+            "Ein Backup der beschädigten Datenbank liegt im Backup-Ordner.\n\n"
+            "Jetzt reparieren? Alternativ kann ein Backup importiert werden.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        
+        def run_repair(report_progress, cancel_token):
+            # Eigene Verbindung für den Hintergrundthread
+            db = Database()
+            try:
+                return IntegrityChecker(db).repair()
+            finally:
+                db.close()
+        
+        def repair_done(success):
+            if success:
+                QMessageBox.information(self, "Erfolg", "Die Datenbank wurde repariert.")
+            else:
+                QMessageBox.critical(
+                    self,
+                    "Fehler",
+                    "Die Datenbank konnte nicht repariert werden. Bitte ein Backup importieren."
+                )
+        
+        self.repair_job = BackgroundJob(self, "Repariere Datenbank...", run_repair, repair_done)
+        self.repair_job.start()
     
     def show_backup_dialog(self):
         """Dialog für Backup-Verwaltung"""
@@ -5461,6 +10404,260 @@ class HeatmapWidget(QWidget):
         import_btn.clicked.connect(self.import_backup)
         layout.addWidget(import_btn)
         
+        # Rohdaten-Export für externe Auswertungen
+        raw_export_btn = QPushButton("Rohdaten exportieren (CSV/JSONL)")
+        raw_export_btn.clicked.connect(self.show_raw_export_dialog)
+        layout.addWidget(raw_export_btn)
+        
+        dialog.exec()
+    
+    def show_raw_export_dialog(self):
+        """Dialog für den Export der Rohdaten als CSV oder JSON Lines"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Rohdaten exportieren")
+        layout = QVBoxLayout(dialog)
+        form_layout = QGridLayout()
+        
+        format_combo = QComboBox()
+        format_combo.addItem("CSV", "csv")
+        format_combo.addItem("JSON Lines", "jsonl")
+        form_layout.addWidget(QLabel("Format:"), 0, 0)
+        form_layout.addWidget(format_combo, 0, 1)
+        
+        # Optionaler Zeitraum
+        range_check = QCheckBox("Nur Zeitraum:")
+        start_date = QDateEdit()
+        start_date.setDate(QDate.currentDate().addDays(-30))
+        end_date = QDateEdit()
+        end_date.setDate(QDate.currentDate())
+        start_date.setEnabled(False)
+        end_date.setEnabled(False)
+        range_check.toggled.connect(start_date.setEnabled)
+        range_check.toggled.connect(end_date.setEnabled)
+        form_layout.addWidget(range_check, 1, 0)
+        form_layout.addWidget(start_date, 1, 1)
+        form_layout.addWidget(QLabel("bis"), 2, 0)
+        form_layout.addWidget(end_date, 2, 1)
+        layout.addLayout(form_layout)
+        
+        deck_check = QCheckBox("Nur aktueller Stapel")
+        deck_check.setChecked(bool(self.deck_id))
+        deck_check.setEnabled(bool(self.deck_id))
+        layout.addWidget(deck_check)
+        
+        compress_check = QCheckBox("gzip-komprimiert")
+        layout.addWidget(compress_check)
+        
+        incremental_check = QCheckBox("Nur Änderungen seit dem letzten Export")
+        layout.addWidget(incremental_check)
+        
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+        layout.addWidget(buttons)
+        
+        if not dialog.exec():
+            return
+        
+        self.export_raw_data(
+            fmt=format_combo.currentData(),
+            compress=compress_check.isChecked(),
+            deck_id=self.deck_id if deck_check.isChecked() else None,
+            start_date=start_date.date().toString("yyyy-MM-dd") if range_check.isChecked() else None,
+            end_date=end_date.date().toString("yyyy-MM-dd") if range_check.isChecked() else None,
+            incremental=incremental_check.isChecked()
+        )
+    
+    def export_raw_data(self, fmt="csv", compress=False, deck_id=None, start_date=None, end_date=None, incremental=False):
+        """Exportiert die Rohdaten im Hintergrund in einen gewählten Ordner"""
+        directory = QFileDialog.getExistingDirectory(
+            self,
+            "Ordner für den Rohdaten-Export wählen"
+        )
+        if not directory:
+            return
+        
+        def run_export(report_progress, cancel_token):
+            # Eigene Verbindung für den Hintergrundthread
+            db = Database()
+            try:
+                exporter = RawDataExporter(db, report_progress, cancel_token)
+                return exporter.export(
+                    directory,
+                    fmt=fmt,
+                    compress=compress,
+                    deck_id=deck_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    incremental=incremental
+                )
+            finally:
+                db.close()
+        
+        def export_done(manifest):
+            row_counts = "\n".join(
+                f"{table}: {info['rows']} Zeilen" for table, info in manifest['files'].items()
+            )
+            mode = "Inkrementeller Export" if manifest['incremental'] else "Vollständiger Export"
+            QMessageBox.information(
+                self,
+                "Erfolg",
+                f"{mode} gespeichert unter:\n{directory}\n\n{row_counts}"
+            )
+        
+        self.export_job = BackgroundJob(
+            self,
+            "Exportiere Rohdaten...",
+            run_export,
+            export_done
+        )
+        self.export_job.start()
+    
+    def show_level_rule_simulator(self):
+        """Dialog zum Durchspielen alternativer Level-Regeln über die bisherigen Tagesstatistiken"""
+        simulator = LevelRuleSimulator(self.db)
+        try:
+            simulator.load()
+        except Exception as e:
+            print(f"Study Tracker: Fehler beim Laden der Tagesstatistiken für die Simulation: {e}")
+            traceback.print_exc()
+            QMessageBox.warning(self, "Fehler", f"Die Tagesstatistiken konnten nicht geladen werden:\n{e}")
+            return
+        
+        rules = get_level_rules()
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Level-Regeln simulieren")
+        dialog.resize(640, 480)
+        layout = QVBoxLayout(dialog)
+        form_layout = QGridLayout()
+        
+        period_spin = QSpinBox()
+        period_spin.setRange(1, LevelRules.MAX_PERIOD_DAYS)
+        period_spin.setValue(rules.period_days)
+        form_layout.addWidget(QLabel("Abschnittslänge (Tage):"), 0, 0)
+        form_layout.addWidget(period_spin, 0, 1)
+        
+        required_spin = QSpinBox()
+        required_spin.setRange(1, LevelRules.MAX_PERIOD_DAYS)
+        required_spin.setValue(rules.required_days)
+        form_layout.addWidget(QLabel("Erfolgreiche Tage für Level-Up:"), 1, 0)
+        form_layout.addWidget(required_spin, 1, 1)
+        
+        share_spin = QSpinBox()
+        share_spin.setRange(1, 100)
+        share_spin.setSuffix(" %")
+        share_spin.setValue(int(round(rules.due_share * 100)))
+        form_layout.addWidget(QLabel("Gelernter Anteil der fälligen Karten:"), 2, 0)
+        form_layout.addWidget(share_spin, 2, 1)
+        
+        min_cards_spin = QSpinBox()
+        min_cards_spin.setRange(0, 1000)
+        min_cards_spin.setValue(rules.min_cards)
+        form_layout.addWidget(QLabel("Mindestens gelernte Karten pro Tag:"), 3, 0)
+        form_layout.addWidget(min_cards_spin, 3, 1)
+        
+        calendar_check = QCheckBox("Kalenderwochen (Montag bis Sonntag)")
+        calendar_check.setChecked(rules.calendar_weeks)
+        calendar_check.toggled.connect(lambda checked: period_spin.setEnabled(not checked))
+        period_spin.setEnabled(not rules.calendar_weeks)
+        form_layout.addWidget(calendar_check, 4, 0, 1, 2)
+        layout.addLayout(form_layout)
+        
+        button_layout = QHBoxLayout()
+        simulate_btn = QPushButton("Simulieren")
+        sweep_btn = QPushButton("Zieltage vergleichen")
+        button_layout.addWidget(simulate_btn)
+        button_layout.addWidget(sweep_btn)
+        layout.addLayout(button_layout)
+        
+        summary_label = QLabel(f"{len(simulator.series)} Stapel mit Tagesstatistiken geladen.")
+        layout.addWidget(summary_label)
+        
+        table = QTableWidget()
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        layout.addWidget(table)
+        
+        def current_variant():
+            return {
+                'periodDays': period_spin.value(),
+                'requiredDays': required_spin.value(),
+                'dueShare': share_spin.value() / 100,
+                'minCardsStudied': min_cards_spin.value(),
+                'calendarWeeks': calendar_check.isChecked(),
+                'cooldownDays': rules.cooldown_days
+            }
+        
+        def fill_table(headers, rows):
+            table.clear()
+            table.setColumnCount(len(headers))
+            table.setHorizontalHeaderLabels(headers)
+            table.setRowCount(len(rows))
+            for row_index, row in enumerate(rows):
+                for column, value in enumerate(row):
+                    table.setItem(row_index, column, QTableWidgetItem(str(value)))
+            table.resizeColumnsToContents()
+        
+        def deck_name(deck_id):
+            try:
+                deck = mw.col.decks.get(deck_id) if mw and mw.col else None
+                return deck['name'] if deck else str(deck_id)
+            except Exception:
+                return str(deck_id)
+        
+        def run_simulation():
+            try:
+                result = simulator.simulate(current_variant())
+            except (TypeError, ValueError) as e:
+                QMessageBox.warning(dialog, "Ungültige Regeln", str(e))
+                return
+            progress = {}
+            for deck_id in result['decks']:
+                level_data = self.db.get_level_progress(deck_id)
+                progress[deck_id] = level_data['level'] if level_data else "-"
+            rows = [
+                (
+                    deck_name(deck_id), progress[deck_id], deck_result['level'],
+                    deck_result['level_ups'], deck_result['level_downs'], deck_result['resets'],
+                    deck_result['current_streak'], deck_result['longest_streak']
+                )
+                for deck_id, deck_result in sorted(result['decks'].items(), key=lambda item: deck_name(item[0]).lower())
+            ]
+            fill_table(
+                ["Stapel", "Level aktuell", "Level simuliert", "Level-Ups", "Level-Downs",
+                 "Zurückgesetzt", "Serie aktuell", "Längste Serie"],
+                rows
+            )
+            totals = result['totals']
+            summary_label.setText(
+                f"{totals['decks']} Stapel: Ø Level {totals['average_level']:.1f}, "
+                f"{totals['level_ups']} Level-Ups, {totals['level_downs']} Level-Downs"
+            )
+        
+        def run_sweep():
+            base = current_variant()
+            period_days = 7 if base['calendarWeeks'] else base['periodDays']
+            variants = [dict(base, requiredDays=required) for required in range(1, period_days + 1)]
+            rows = [
+                (
+                    f"{variant['requiredDays']} von {period_days}", f"{totals['average_level']:.1f}",
+                    totals['level_ups'], totals['level_downs'], totals['resets']
+                )
+                for variant, totals in simulator.sweep(variants)
+            ]
+            fill_table(["Regel", "Ø Level", "Level-Ups", "Level-Downs", "Zurückgesetzt"], rows)
+            summary_label.setText(f"{len(rows)} Varianten über {len(simulator.series)} Stapel verglichen.")
+        
+        simulate_btn.clicked.connect(run_simulation)
+        sweep_btn.clicked.connect(run_sweep)
+        
+        close_btn = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        close_btn.rejected.connect(dialog.reject)
+        layout.addWidget(close_btn)
+        
+        run_simulation()
         dialog.exec()
     
     def create_backup(self):
@@ -5481,19 +10678,45 @@ class HeatmapWidget(QWidget):
             )
             
             if ok:  # User clicked OK
-                if self.db.export_backup(file_name, password if password else None):
-                    QMessageBox.information(
-                        self,
-                        "Erfolg",
-                        "Daten wurden erfolgreich exportiert." +
-                        ("\nBitte merken Sie sich das Passwort!" if password else "")
-                    )
-                else:
-                    QMessageBox.critical(
-                        self,
-                        "Fehler",
-                        "Daten konnten nicht exportiert werden."
-                    )
+                # Decknamen ins Backup übernehmen, damit Sammelberichte sie anzeigen können
+                if mw and mw.col:
+                    self.db.save_deck_names(CollectionSnapshot.read_deck_names())
+                
+                def run_backup(report_progress, cancel_token):
+                    # Eigene Verbindung für den Hintergrundthread
+                    db = Database()
+                    try:
+                        return db.export_backup(
+                            file_name,
+                            password if password else None,
+                            lambda value: report_progress(value, "Sichere Daten..."),
+                            cancel_token
+                        )
+                    finally:
+                        db.close()
+                
+                def backup_done(success):
+                    if success:
+                        QMessageBox.information(
+                            self,
+                            "Erfolg",
+                            "Daten wurden erfolgreich exportiert." +
+                            ("\nBitte merken Sie sich das Passwort!" if password else "")
+                        )
+                    else:
+                        QMessageBox.critical(
+                            self,
+                            "Fehler",
+                            "Daten konnten nicht exportiert werden."
+                        )
+                
+                self.backup_job = BackgroundJob(
+                    self,
+                    "Exportiere Daten...",
+                    run_backup,
+                    backup_done
+                )
+                self.backup_job.start()
     
     def import_backup(self):
         """Importiert ein Backup"""
@@ -5522,14 +10745,38 @@ class HeatmapWidget(QWidget):
                 
                 if ok:  # User clicked OK
                     if self.db.import_backup(file_name, password if password else None):
-                        QMessageBox.information(
+                        def run_replay(report_progress, cancel_token):
+                            # Eigene Verbindung für den Hintergrundthread
+                            db = Database()
+                            try:
+                                return LevelReplayEngine(db).rebuild_all(
+                                    progress_callback=lambda value: report_progress(value, "Berechne Level-Historie..."),
+                                    cancel_token=cancel_token
+                                )
+                            finally:
+                                db.close()
+                        
+                        def replay_done(result=None):
+                            QMessageBox.information(
+                                self,
+                                "Erfolg",
+                                "Daten wurden erfolgreich importiert."
+                            )
+                            # Aktualisiere Anzeige
+                            self.level_system = LevelSystem(self.db, self.deck_id)
+                            self.update_stats_and_heatmap()
+                        
+                        # Level-Historie passend zu den importierten Tagesstatistiken neu
+                        # berechnen; bei Abbruch holt check_period_completion sie je Deck nach
+                        self.replay_job = BackgroundJob(
                             self,
-                            "Erfolg",
-                            "Daten wurden erfolgreich importiert."
+                            "Berechne Level-Historie...",
+                            run_replay,
+                            replay_done,
+                            on_failure=lambda error: replay_done(),
+                            on_cancel=replay_done
                         )
-                        # Aktualisiere Anzeige
-                        self.level_system = LevelSystem(self.db, self.deck_id)
-                        self.update_stats_and_heatmap()
+                        self.replay_job.start()
                     else:
                         QMessageBox.critical(
                             self,
@@ -5811,6 +11058,13 @@ def initialize_addon():
         # Schedule periodic validation code cleanup (every 14 days by default)
         schedule_periodic_cleanup(interval_days=14)
         
+        # Scheduled backup with rotation, then roll up old studied cards
+        # (both in the background; compaction waits so it cannot restart the backup)
+        schedule_auto_backup(on_finished=schedule_studied_cards_compaction)
+        
+        # Full integrity check in the background once Anki is idle
+        schedule_integrity_check()
+        
         # Clean up duplicate level entries
         deleted_count = db.clean_duplicate_level_entries()
         print(f"Study Tracker: {deleted_count} duplicate level entries cleaned up")
@@ -6161,6 +11415,11 @@ def create_widget():
         refresh_action.triggered.connect(lambda: widget.force_refresh())
         menu.addAction(refresh_action)
         
+        # Level-Regeln über die bisherigen Daten simulieren
+        simulate_action = QAction('Level-Regeln simulieren...', mw)
+        simulate_action.triggered.connect(lambda: widget.show_level_rule_simulator())
+        menu.addAction(simulate_action)
+        
         # Trennlinie
         menu.addSeparator()
         
@@ -6780,7 +12039,9 @@ def schedule_periodic_cleanup(interval_days=14):
             print("Study Tracker: First run, setting initial cleanup date")
         else:
             try:
-                last_cleanup_date = datetime.strptime(last_cleanup, "%Y-%m-%d").date()
+                last_cleanup_date = db.get_date_setting('last_validation_cleanup')
+                if last_cleanup_date is None:
+                    raise ValueError(f"Invalid cleanup date '{last_cleanup}'")
                 today = datetime.now().date()
                 days_since_cleanup = (today - last_cleanup_date).days
                 
@@ -6912,6 +12173,78 @@ def test_report_generation():
         if 'db' in locals():
             db.close()
 
+# Häufige Abfragen aus Berichten, Widget und Levelsystem mit Beispielparametern.
+# Neue Abfragen auf großen Tabellen als Konstante anlegen (siehe oben), am
+# Aufrufer verwenden und hier eintragen, damit test_query_plans sie prüft.
+HOT_QUERIES = {
+    'studied_cards_by_deck_range': (STUDIED_CARDS_BY_DECK_RANGE_SQL, (1, 20000, 20030)),
+    'studied_cards_by_day': (STUDIED_CARDS_BY_DAY_SQL, ('2026-01-01', 1)),
+    'validation_codes_by_cards': (VALIDATION_CODES_BY_CARDS_SQL.format(placeholders="?, ?, ?"), (1, 2, 3)),
+    'validation_titles_by_cards': (VALIDATION_TITLES_BY_CARDS_SQL.format(placeholders="?, ?, ?"), (1, 2, 3)),
+    'chat_link_titles_by_cards': (CHAT_LINK_TITLES_BY_CARDS_SQL.format(placeholders="?, ?, ?"), (1, 2, 3)),
+    'chat_links_by_cards': (CHAT_LINKS_BY_CARDS_SQL.format(placeholders="?, ?, ?"), (1, 2, 3)),
+    'validation_codes_by_deck_range': (
+        VALIDATION_CODES_BY_DECK_RANGE_SQL, (1, 20000, 20030, 1, 1, 20000, 20030)
+    ),
+    'level_history_by_deck_range': (LEVEL_HISTORY_BY_DECK_RANGE_SQL, (1, 20000, 20030)),
+    'level_history_managed_by_deck': (
+        LEVEL_HISTORY_MANAGED_SQL.format(
+            types=", ".join("?" for _ in LevelReplayEngine.MANAGED_TYPES),
+            deck_filter=" AND deck_id = ?"
+        ),
+        LevelReplayEngine.MANAGED_TYPES + (1,)
+    ),
+    'daily_stats_by_deck_range': (DAILY_STATS_BY_DECK_RANGE_SQL, (1, 20000, 20030)),
+    'daily_stats_range': (DAILY_STATS_RANGE_SQL, (20000, 20030)),
+    'competency_daily_by_deck': (
+        COMPETENCY_DAILY_SQL + " AND deck_id = ? AND date >= ? AND date <= ? ORDER BY date, deck_id",
+        (1, '2026-01-01', '2026-01-31')
+    ),
+}
+
+def find_full_scans(conn, sql, params=()):
+    """
+    Führt EXPLAIN QUERY PLAN für eine Abfrage aus
+    
+    Returns:
+        list: Planzeilen, die eine Tabelle vollständig durchlaufen (leer = alles per Index)
+    """
+    plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    scans = []
+    for row in plan:
+        detail = row[-1]
+        # "SCAN tabelle" ohne Index; SCAN über Unterabfragen oder Konstanten ist unkritisch
+        if detail.startswith("SCAN ") and " INDEX " not in detail and "CONSTANT ROW" not in detail \
+                and "SUBQUERY" not in detail.upper():
+            scans.append(detail)
+    return scans
+
+def test_query_plans(db=None):
+    """Prüft, dass keine der registrierten häufigen Abfragen auf einen Full Table Scan zurückfällt"""
+    own_db = db is None
+    try:
+        if own_db:
+            db = Database()
+        
+        failures = {}
+        for name, (sql, params) in HOT_QUERIES.items():
+            scans = find_full_scans(db.conn, sql, params)
+            if scans:
+                failures[name] = scans
+                print(f"❌ {name}: {'; '.join(scans)}")
+            else:
+                print(f"✅ {name}")
+        
+        print(f"Study Tracker Test: {len(HOT_QUERIES) - len(failures)}/{len(HOT_QUERIES)} Abfragen nutzen Indizes")
+        return not failures
+    except Exception as e:
+        print(f"Fehler beim Prüfen der Abfragepläne: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        if own_db and db is not None:
+            db.close()
+
 # Füge einen Menüpunkt für das Starten des Tests hinzu
 def add_test_menu_item():
     try:
@@ -7041,6 +12374,13 @@ try:
 except ImportError:
     print("Study Tracker: Konnte sync_did_finish-Hook nicht registrieren")
 
+# Nach Änderungen an der Add-on-Konfiguration (Level-Regeln neu kompilieren)
+if mw is not None:
+    try:
+        mw.addonManager.setConfigUpdatedAction(__name__, on_config_updated)
+    except Exception as e:
+        print(f"Study Tracker: Konnte Konfigurations-Hook nicht registrieren: {e}")
+
 # Starte die Initialisierung
 if mw is not None:
     QTimer.singleShot(2000, initialize_addon)
@@ -7302,11 +12642,11 @@ def purge_and_reimport_validation_codes():
                 # Get card and deck info for the first card (all cards in note share content)
                 card = mw.col.get_card(card_ids[0])
                 deck_id = card.did
-                card_id_str = str(card_ids[0])
+                card_id_int = normalize_card_id(card_ids[0])
                 
                 # Get card title
                 title_getter = ValidationCodeHandler(db)
-                card_title = title_getter.get_card_title(card_id_str)
+                card_title = title_getter.get_card_title(card_id_int)
                 
                 # Extract validation codes using regex
                 all_codes = re.findall(validation_pattern, validation_content)
@@ -7322,10 +12662,10 @@ def purge_and_reimport_validation_codes():
                     date_str = date_str.replace('.', '-')
                     
                     # Create unique key to prevent duplicates
-                    unique_key = f"{card_id_str}_{date_str}_{code}"
+                    unique_key = f"{card_id_int}_{date_str}_{code}"
                     
                     if unique_key in processed_codes:
-                        print(f"Study Tracker: Skipping duplicate: {date_str}: {code} for card {card_id_str}")
+                        print(f"Study Tracker: Skipping duplicate: {date_str}: {code} for card {card_id_int}")
                         continue
                     
                     # Parse code components
@@ -7339,7 +12679,7 @@ def purge_and_reimport_validation_codes():
                          page_number, chat_link, card_title, created_at)
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                     """, (
-                        card_id_str,
+                        card_id_int,
                         deck_id,
                         date_str,
                         code,
@@ -7355,11 +12695,11 @@ def purge_and_reimport_validation_codes():
                     processed_codes.add(unique_key)
                     imported_count += 1
                     
-                    print(f"Study Tracker: Imported {date_str}: {code} for card {card_id_str}")
+                    print(f"Study Tracker: Imported {date_str}: {code} for card {card_id_int}")
                 
                 # Save ChatGPT link if available
                 if chat_link:
-                    db.save_chat_link(card_id_str, chat_link, deck_id, card_title)
+                    db.save_chat_link(card_id_int, chat_link, deck_id, card_title)
                     
             except Exception as e:
                 print(f"Study Tracker: Error processing note {note_id}: {e}")